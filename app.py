@@ -2,9 +2,10 @@ from flask import Flask
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 from models import db, bcrypt, User # Import db, bcrypt, User AFTER initializing them in models.py
-from routes import register_routes
+from routes import register_routes, user_cache
 
 # --- App Initialization ---
 app = Flask(__name__)
@@ -17,6 +18,11 @@ if not app.debug and app.config['SECRET_KEY'] == 'a_default_secret_key':
     # This stops the app if the default key is used outside of debug mode
     raise ValueError('A proper SECRET_KEY must be set in the .env file for production.')
 
+# --- Reverse Proxy ---
+# Take the client's IP from X-Forwarded-For, set by the trusted proxies only
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
 # --- Extension Initialization ---
 db.init_app(app) # Initialize SQLAlchemy
 bcrypt.init_app(app) # Initialize Bcrypt
@@ -31,9 +37,9 @@ login_manager.login_view = 'login' # The route name for the login page
 # User loader function required by Flask-Login
 @login_manager.user_loader
 def user_loader(user_id):
-    # Fetches the user object from the database based on their ID
-    # Uses db.session.get() which is the recommended way to get by primary key
-    return db.session.get(User, user_id)
+    # Returns a snapshot of the user, fetched by primary key (db.session.get())
+    # only when this worker hasn't cached it recently (see user_cache.py)
+    return user_cache.load(user_id)
 
 # --- Route Registration ---
 # Import and register all application routes defined in routes.py
@@ -0,0 +1,311 @@
+import os
+import re
+import hashlib
+import posixpath
+from markupsafe import Markup
+from asset_manifest import CSS_URL_RE
+
+# Folder inside static/ where `python bundle_static.py` writes the bundles
+BUNDLES_DIRNAME = 'bundles'
+
+# Bundle name -> the static files it is made of, in order. A page links its
+# bundles with the macros in templates/partials/bundles.html.
+BUNDLES = {
+    # Every page
+    'site.css': ['styles/navbar.css', 'styles/footer.css'],
+    # One per page (or group of pages sharing the same styles)
+    'home.css': ['styles/indexpage.css', 'styles/post-summary.css', 'styles/swiper.css'],
+    'post.css': ['styles/post-content.css', 'styles/view-post.css', 'styles/accordion.css'],
+    'about.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/accordion.css', 'styles/about.css'],
+    'faq.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/accordion.css', 'styles/faq.css'],
+    'materials.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/materials.css', 'styles/accordion.css'],
+    'months-problems.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/months-problems.css'],
+    'news.css': ['styles/separador.css', 'styles/post-summary.css', 'styles/generic-pages.css',
+                 'styles/news.css', 'styles/swiper.css'],
+    'news-list.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/news.css'],
+    'contact.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/contact.css'],
+    'drafts.css': ['styles/separador.css', 'styles/generic-pages.css', 'styles/drafts.css'],
+    'manage-materials.css': ['styles/generic-pages.css', 'styles/drafts.css'],
+    'account-settings.css': ['styles/separador.css', 'styles/account-settings.css'],
+    'login.css': ['styles/login.css'],
+    'editor.css': ['styles/editor.css', 'styles/media-library.css'],
+    # Classic (non-module) scripts
+    'pages.js': ['js/video-size-adjust.js'],
+    'home.js': ['js/swiper-init.js'],
+    'news.js': ['js/video-size-adjust.js', 'js/swiper-init.js'],
+    'editor.js': ['js/media-library.js'],
+}
+
+# Page -> the rules for what is visible before scrolling (navbar, header and
+# the first block of content), as (source file, selectors) pairs. A rule is
+# kept when one of its selectors starts with a listed one ('.post-meta' keeps
+# '.post-meta span', not '.post-metadata'); @media blocks keep their matching
+# rules. They are inlined in a <style> tag, so the page paints without waiting
+# for a stylesheet, and the full bundles load after.
+NAVBAR_SELECTORS = ('nav', 'span.nemo-icon', '.navbar-nav', '.navbar-collapse')
+CRITICAL_CSS = {
+    'home': [
+        ('styles/navbar.css', NAVBAR_SELECTORS),
+        ('styles/indexpage.css', ('body', '.logocominfo', '.textos-logo', '@keyframes fadeIn')),
+    ],
+    'post': [
+        ('styles/navbar.css', NAVBAR_SELECTORS),
+        ('styles/view-post.css', ('.post-container', '.post-header', '.header-overlay', '.post-title',
+                                  '.post-desc', '.post-meta', '.post-body-wrapper')),
+        ('styles/post-content.css', ('.post-body',)),
+    ],
+}
+
+def critical_name(page):
+    return f"{BUNDLES_DIRNAME}/{page}.critical.css"
+
+def critical_sources(page):
+    return [source for source, _ in CRITICAL_CSS[page]]
+
+# --- Asset Bundles ---
+# Picks, once per worker, between the built bundles and their source files:
+# a bundle is only used when it exists and is newer than all of its sources,
+# so pages keep working (unbundled) in development or after editing a file
+# without rebuilding. Bundle URLs go through url_for('static', ...) and get
+# fingerprinted like any other file (see asset_manifest.py).
+class AssetBundles:
+    def __init__(self):
+        self.built = set()
+        self.critical = {}
+        # Changes when a different set of bundles is in use, since pages link them
+        self.version = None
+
+    def init_app(self, app, resolve=None):
+        """`resolve` maps a static name to its fingerprinted copy (AssetManifest.resolve)."""
+        resolve = resolve or (lambda name: name)
+        self.built = set()
+        self.critical = {}
+        for name, sources in BUNDLES.items():
+            if _is_fresh(app.static_folder, f"{BUNDLES_DIRNAME}/{name}", sources):
+                self.built.add(name)
+        for page in CRITICAL_CSS:
+            if _is_fresh(app.static_folder, critical_name(page), critical_sources(page)):
+                # The fingerprinted copy has its url()s pointing at fingerprinted files too
+                path = os.path.join(app.static_folder, *resolve(critical_name(page)).split('/'))
+                with open(path, encoding='utf-8') as f:
+                    self.critical[page] = Markup(f.read().replace('</', '<\\/'))
+        state = sorted(self.built) + [f"{page}:{css}" for page, css in sorted(self.critical.items())]
+        self.version = hashlib.sha1('\n'.join(state).encode('utf-8')).hexdigest()
+        app.jinja_env.globals['bundle_files'] = self.files
+        app.jinja_env.globals['critical_css'] = self.critical.get
+
+    def files(self, name):
+        """Static files to link for a bundle: the bundle itself once built, its sources otherwise."""
+        if name in self.built:
+            return [f"{BUNDLES_DIRNAME}/{name}"]
+        return BUNDLES[name]
+
+def _is_fresh(static_folder, name, sources):
+    try:
+        mtime = os.stat(os.path.join(static_folder, *name.split('/'))).st_mtime
+        return all(os.stat(os.path.join(static_folder, *s.split('/'))).st_mtime <= mtime for s in sources)
+    except OSError:
+        return False
+
+# --- Build Step ---
+def build_bundles(static_folder, static_url_path='/static'):
+    """Writes every bundle and critical stylesheet. Returns {name: (bytes before, bytes after)}."""
+    out_dir = os.path.join(static_folder, BUNDLES_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+    # name -> [(source, selectors to keep, or None for the whole file)]
+    outputs = {name: [(source, None) for source in sources] for name, sources in BUNDLES.items()}
+    outputs.update({posixpath.basename(critical_name(page)): entries for page, entries in CRITICAL_CSS.items()})
+
+    sizes = {}
+    for name, entries in outputs.items():
+        parts = []
+        for source, selectors in entries:
+            with open(os.path.join(static_folder, *source.split('/')), encoding='utf-8') as f:
+                text = f.read()
+            if name.endswith('.css'):
+                # Bundles live in another folder, so relative url()s are made absolute
+                text = minify_css(_absolute_urls(text, source, static_url_path))
+                parts.append(text if selectors is None else extract_rules(text, selectors))
+            else:
+                parts.append(minify_js(text))
+        data = ('\n' if name.endswith('.css') else ';\n').join(parts) + '\n'
+        target = os.path.join(out_dir, name)
+        with open(target + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(target + '.tmp', target)
+        before = sum(os.path.getsize(os.path.join(static_folder, *s.split('/'))) for s, _ in entries)
+        sizes[name] = (before, len(data.encode('utf-8')))
+    return sizes
+
+def _absolute_urls(text, source, static_url_path):
+    base_dir = posixpath.dirname(source)
+
+    def replace(match):
+        quote, reference = match.group(1), match.group(2)
+        if '://' in reference or reference.startswith(('/', 'data:', '#')):
+            return match.group(0)
+        return f"url({quote}{static_url_path}/{posixpath.normpath(posixpath.join(base_dir, reference))}{quote})"
+
+    return CSS_URL_RE.sub(replace, text)
+
+# --- Minification ---
+# Whitespace and comment removal only: names and values are left alone, so a
+# minified file behaves exactly like its source.
+CSS_TOKEN_RE = re.compile(r'''(/\*.*?\*/)|("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|([^"'/]+|/)''', re.S)
+# Spaces around these can always go ('a > b', 'color: red', 'x, y'); not
+# around '+', '-' (calc()) or before ':' (a descendant ':hover' selector)
+CSS_TIGHT_RE = re.compile(r'\s*([{};,>])\s*|:\s+')
+
+def minify_css(text):
+    pieces = []
+    code = []
+
+    def flush():
+        collapsed = re.sub(r'\s+', ' ', ''.join(code))
+        pieces.append(CSS_TIGHT_RE.sub(lambda m: m.group(1) or ':', collapsed).replace(';}', '}'))
+        code.clear()
+
+    for comment, string, other in CSS_TOKEN_RE.findall(text):
+        if string:
+            flush()
+            pieces.append(string)
+        elif other:
+            code.append(other)
+        # Comments are dropped
+    flush()
+    return ''.join(pieces).strip()
+
+# --- Critical Rules ---
+def extract_rules(css, selectors):
+    """The rules of minified CSS that have a selector starting with one of
+    `selectors` (see CRITICAL_CSS), keeping @media and @supports around them."""
+    kept = []
+    for prelude, body in _css_blocks(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = extract_rules(body, selectors)
+            if inner:
+                kept.append(f"{prelude}{{{inner}}}")
+        elif any(_selector_matches(selector.strip(), wanted) for selector in prelude.split(',') for wanted in selectors):
+            kept.append(f"{prelude}{{{body}}}")
+    return ''.join(kept)
+
+def _selector_matches(selector, wanted):
+    if not selector.startswith(wanted):
+        return False
+    rest = selector[len(wanted):]
+    return not rest or not (rest[0].isalnum() or rest[0] in '-_')
+
+def _css_blocks(css):
+    """Yields (prelude, body) of each top-level block; statements like @import are skipped."""
+    depth, start, open_at = 0, 0, 0
+    i, n = 0, len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and css[j] != c:
+                j += 2 if css[j] == '\\' else 1
+            i = j + 1
+            continue
+        if c == '{':
+            if depth == 0:
+                open_at = i
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                yield css[start:open_at].strip(), css[open_at + 1:i]
+                start = i + 1
+        elif c == ';' and depth == 0:
+            start = i + 1
+        i += 1
+
+# After one of these (or a line start / `return`), a '/' starts a regex, not a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+def minify_js(text):
+    """Drops comments, indentation and blank lines. Line breaks are kept, so
+    automatic semicolon insertion still sees the same statements."""
+    out = []
+    i, n = 0, len(text)
+    stack = [] # Brace depth of each `${` we are inside
+    while i < n:
+        c = text[i]
+        nxt = text[i + 1] if i + 1 < n else ''
+        if c in '"\'':
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == '\\' else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif c == '`':
+            i = _copy_template(text, i, out, stack)
+        elif c == '}' and stack and stack[-1] == 0:
+            stack.pop() # End of a `${...}`: back inside the template literal
+            out.append('}')
+            i = _copy_template(text, i, out, stack, resume=True)
+        elif c in '{}':
+            if stack:
+                stack[-1] += 1 if c == '{' else -1
+            out.append(c)
+            i += 1
+        elif c == '/' and nxt == '/':
+            while i < n and text[i] != '\n':
+                i += 1
+        elif c == '/' and nxt == '*':
+            end = text.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+        elif c == '/' and _starts_regex(out):
+            j = i + 1
+            in_class = False
+            while j < n and (text[j] != '/' or in_class):
+                if text[j] == '\\':
+                    j += 1
+                elif text[j] == '[':
+                    in_class = True
+                elif text[j] == ']':
+                    in_class = False
+                j += 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif c.isspace():
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            space = '\n' if '\n' in text[i:j] else ' '
+            if out and out[-1] in (' ', '\n'):
+                # Merges with the space left by a removed comment; a line break wins
+                if space == '\n':
+                    out[-1] = space
+            elif out:
+                out.append(space)
+            i = j
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out).strip()
+
+def _copy_template(text, i, out, stack, resume=False):
+    """Copies a template literal verbatim up to its end or its next `${`. Returns the new index."""
+    j = i + 1
+    start = j if resume else i
+    while j < len(text):
+        if text[j] == '\\':
+            j += 2
+        elif text[j] == '`':
+            out.append(text[start:j + 1])
+            return j + 1
+        elif text.startswith('${', j):
+            out.append(text[start:j + 2])
+            stack.append(0)
+            return j + 2
+        else:
+            j += 1
+    out.append(text[start:])
+    return j
+
+def _starts_regex(out):
+    previous = ''.join(out[-8:]).rstrip()
+    return not previous or previous[-1] in REGEX_PRECEDERS or re.search(r'\b(?:return|typeof|case|in|of)$', previous)
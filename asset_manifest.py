@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import hashlib
+import posixpath
+
+# Written by `python fingerprint_static.py`, read once per worker at startup
+MANIFEST_NAME = 'asset-manifest.json'
+# Folders inside static/ that are not fingerprinted: uploads already have
+# hashed names (see blob_store.py), and the PDF.js viewer app isn't used
+SKIPPED_FOLDERS = ('uploads', 'pdfjs/web')
+# Length of the content hash in fingerprinted names ('navbar.1a2b3c4d5e6f.css')
+HASH_LENGTH = 12
+
+FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{%d}\.\w+$' % HASH_LENGTH)
+# References rewritten inside CSS and JS, so hashed files only point at hashed files
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+JS_IMPORT_RE = re.compile(r'''((?:\bfrom|\bimport)\s*\(?\s*)(['"])(\.{1,2}/[^'"]+)\2''')
+
+def fingerprinted_name(name, digest):
+    """'styles/navbar.css' -> 'styles/navbar.1a2b3c4d5e6f.css'."""
+    base, extension = posixpath.splitext(name)
+    return f"{base}.{digest[:HASH_LENGTH]}{extension}"
+
+# --- Asset Manifest ---
+# Maps logical static names ('styles/navbar.css') to content-hashed copies
+# ('styles/navbar.1a2b3c4d5e6f.css'), so every CSS/JS/image/video URL changes
+# when the file does and can be cached for a year (see static_files.py).
+# Templates keep calling url_for('static', filename=...): a url_defaults hook
+# swaps in the hashed name from the in-memory map. Without a manifest (e.g.
+# in development) the plain names are used.
+class AssetManifest:
+    def __init__(self):
+        self.manifest = {}
+        # Changes with every build, so pages linking to the old names aren't revalidated as current
+        self.version = None
+
+    def init_app(self, app):
+        path = os.path.join(app.static_folder, MANIFEST_NAME)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.manifest = json.loads(data)
+            self.version = hashlib.sha1(data).hexdigest()
+        except FileNotFoundError:
+            self.manifest = {}
+            self.version = None
+        app.url_defaults(self._hashed_static_url)
+
+    def resolve(self, filename):
+        """Returns the hashed name of a static file, or the name itself if it has none."""
+        return self.manifest.get(filename, filename)
+
+    def _hashed_static_url(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.resolve(values['filename'])
+
+# --- Build Step ---
+def build_manifest(static_folder, static_url_path='/static'):
+    """Writes the hashed copy of every static file and returns the new manifest."""
+    names = []
+    for cur_path, dirnames, filenames in os.walk(static_folder):
+        rel_dir = os.path.relpath(cur_path, static_folder).replace(os.sep, '/')
+        dirnames[:] = sorted(d for d in dirnames
+                             if posixpath.normpath(posixpath.join(rel_dir, d)) not in SKIPPED_FOLDERS)
+        for filename in sorted(filenames):
+            name = posixpath.normpath(posixpath.join(rel_dir, filename))
+            # Skip our own output, what compress_static.py makes from it, and
+            # files without an extension (LICENSE, .nojekyll), which no page links to
+            if name == MANIFEST_NAME or FINGERPRINTED_RE.search(name) or filename.endswith(('.gz', '.br')) \
+                    or '.' not in filename.lstrip('.'):
+                continue
+            names.append(name)
+
+    manifest = {}
+    building = set()
+
+    def hashed(name):
+        """Hashes one file, after first hashing the files its CSS/JS refers to."""
+        if name in manifest or name in building or name not in known:
+            return manifest.get(name)
+        building.add(name) # Breaks reference cycles (those keep the plain name)
+        source = os.path.join(static_folder, *name.split('/'))
+        with open(source, 'rb') as f:
+            data = f.read()
+        if name.endswith('.css'):
+            data = _rewrite(CSS_URL_RE, data, name, hashed, static_url_path, group=2)
+        elif name.endswith(('.js', '.mjs')):
+            data = _rewrite(JS_IMPORT_RE, data, name, hashed, static_url_path, group=3)
+            data = _rewrite_static_literals(data, hashed, static_url_path)
+
+        target_name = fingerprinted_name(name, hashlib.sha256(data).hexdigest())
+        target = os.path.join(static_folder, *target_name.split('/'))
+        if not os.path.exists(target):
+            with open(target + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(target + '.tmp', target)
+        manifest[name] = target_name
+        return target_name
+
+    known = set(names)
+    for name in names:
+        hashed(name)
+
+    tmp_path = os.path.join(static_folder, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(static_folder, MANIFEST_NAME))
+    return manifest
+
+def remove_stale_copies(static_folder, manifest):
+    """Deletes hashed copies (and their .br/.gz) that the manifest no longer uses. Returns how many."""
+    current = set(manifest.values())
+    removed = 0
+    for cur_path, _, filenames in os.walk(static_folder):
+        for filename in filenames:
+            full_name = os.path.join(cur_path, filename)
+            name = os.path.relpath(full_name, static_folder).replace(os.sep, '/')
+            plain = name[:-3] if name.endswith(('.gz', '.br')) else name
+            if FINGERPRINTED_RE.search(plain) and not plain.startswith('uploads/') and plain not in current:
+                os.remove(full_name)
+                removed += 1
+    return removed
+
+def _rewrite(pattern, data, name, hashed, static_url_path, group):
+    """Replaces references matched by `pattern` (relative or under /static/) with hashed names."""
+    text = data.decode('utf-8')
+    base_dir = posixpath.dirname(name)
+
+    def replace(match):
+        reference = match.group(group)
+        path, sep, rest = reference.partition('?') if '?' in reference else reference.partition('#')
+        if path.startswith(static_url_path + '/'):
+            target = path[len(static_url_path) + 1:]
+            new_path = hashed(target)
+            new_reference = static_url_path + '/' + new_path if new_path else None
+        elif '://' in path or path.startswith(('/', 'data:')):
+            return match.group(0) # External, root-relative outside static/, or inline
+        else:
+            target = posixpath.normpath(posixpath.join(base_dir, path))
+            new_path = hashed(target)
+            new_reference = posixpath.relpath(new_path, base_dir or '.') if new_path else None
+            if new_reference and path.startswith('./') and not new_reference.startswith('.'):
+                new_reference = './' + new_reference # Keep ES module specifiers relative
+        if not new_reference:
+            return match.group(0)
+        start, end = match.span(group)
+        whole_start = match.start(0)
+        return match.group(0)[:start - whole_start] + new_reference + sep + rest + match.group(0)[end - whole_start:]
+
+    return pattern.sub(replace, text).encode('utf-8')
+
+def _rewrite_static_literals(data, hashed, static_url_path):
+    """Rewrites quoted absolute static URLs in JS (e.g. the PDF.js workerSrc)."""
+    pattern = re.compile(r'''(['"])(%s/[^'"?#]+)\1''' % re.escape(static_url_path))
+    return _rewrite(pattern, data, '', hashed, static_url_path, group=2)
@@ -0,0 +1,33 @@
+# --- 1. IMPORTS ---
+import argparse
+import time
+import bcrypt
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Times one bcrypt verification per work factor, to choose BCRYPT_LOG_ROUNDS for this machine."""
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt work factors.")
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12, 13],
+                        help="Work factors to test (default: 10 11 12 13).")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Verifications per work factor; the fastest is reported (default: 5).")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Sync workers serving the site, to estimate logins per second (default: 4).")
+    args = parser.parse_args()
+
+    password = b'correct horse battery staple'
+    print(f"{'rounds':>6} {'verify (ms)':>12} {'logins/s':>9}")
+    for rounds in args.rounds:
+        pw_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            bcrypt.checkpw(password, pw_hash)
+            timings.append((time.perf_counter() - start) * 1000)
+        best = min(timings)
+        # Every worker busy verifying passwords and doing nothing else
+        print(f"{rounds:>6} {best:>12.1f} {args.workers * 1000 / best:>9.1f}")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
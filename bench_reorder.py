@@ -0,0 +1,88 @@
+# --- 1. IMPORTS ---
+import os
+import time
+import random
+import argparse
+import tempfile
+from flask import Flask
+from models import db, Material
+import material_order
+
+# --- 2. SETUP ---
+def make_app(db_file):
+    """A bare app on a throwaway SQLite file (a file, not :memory:, so commits cost what they do in production)."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_file
+    db.init_app(app)
+    return app
+
+def reset(count):
+    """Recreates the table with `count` materials at positions 0..count-1. Returns their ids in order."""
+    db.drop_all()
+    db.create_all()
+    db.session.add_all(Material(f"Lista {i}", "", f"uploads/lista{i}.pdf", i) for i in range(count))
+    db.session.commit()
+    return [item_id for item_id, _ in material_order.current_order()]
+
+# --- 3. IMPLEMENTATIONS ---
+def reorder_before(ids):
+    """How save_material_order used to work: one SELECT per id, then an UPDATE per changed row."""
+    for index, item_id in enumerate(ids):
+        material = Material.query.filter_by(id=item_id).first()
+        if material:
+            material.position = index
+            db.session.add(material)
+    db.session.commit()
+
+def reorder_after(ids):
+    material_order.reorder(ids)
+    db.session.commit()
+
+def move_after(item_id, index):
+    material_order.move(item_id, index)
+    db.session.commit()
+
+def timed(func, *args):
+    db.session.expire_all() # Every request starts with an empty session
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000 # ms
+
+# --- 4. MAIN SCRIPT LOGIC ---
+def main():
+    """Compares saving a new material order before and after material_order.py."""
+    parser = argparse.ArgumentParser(description="Benchmark reordering the materials list.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000],
+                        help="Numbers of materials to test (default: 100 1000 5000).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = make_app(os.path.join(tmp_dir, 'bench.sqlite3'))
+        with app.app_context():
+            print(f"{'materials':>10} {'before (ms)':>12} {'order (ms)':>11} {'move (ms)':>10} {'speedup':>8}")
+            for count in args.sizes:
+                # The same new order (a random shuffle) for both implementations
+                permutation = list(range(count))
+                random.Random(count).shuffle(permutation)
+                results = []
+                timings = []
+                for reorder in (reorder_before, reorder_after):
+                    ids = reset(count)
+                    new_order = [ids[i] for i in permutation]
+                    timings.append(timed(reorder, new_order))
+                    results.append([item_id for item_id, _ in material_order.current_order()] == new_order)
+                if not all(results):
+                    raise SystemExit("An implementation saved the wrong order; the benchmark would be meaningless.")
+                before, after = timings
+
+                # A typical drag: one material a few places up, near the end of the list
+                order = [item_id for item_id, _ in material_order.current_order()]
+                move = timed(move_after, order[-1], max(count - 10, 0))
+                order.insert(max(count - 10, 0), order.pop())
+                if [item_id for item_id, _ in material_order.current_order()] != order:
+                    raise SystemExit("The move saved the wrong order.")
+                print(f"{count:>10} {before:>12.1f} {after:>11.1f} {move:>10.1f} {before / after:>7.1f}x")
+
+# --- 5. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# --- 1. IMPORTS ---
+import argparse
+import gc
+import time
+import bleach
+import markdown
+from sanitizer import POST_TAGS, POST_ATTRS, render_markdown, sanitize
+
+# --- 2. SAMPLE CONTENT ---
+# One "section" of a typical long post: text, a video, an embedded PDF and a YouTube iframe
+SECTION = """
+## Seção {i}
+
+Texto com **negrito**, *itálico* e um [link](https://nemo.icmc.usp.br/{i}). Seja $x_{i} = {i}^2$.
+
+<video src="/static/uploads/video{i}.webm" width="640" controls muted playsinline></video>
+
+<a class="pdf-embed" href="/static/uploads/pdfs/lista{i}.pdf">Lista {i}</a>
+
+<iframe src="https://www.youtube.com/embed/abc{i}" width="560" height="315" frameborder="0" allowfullscreen></iframe>
+
+- item um
+- item dois <script>alert({i})</script>
+
+> Citação {i} com <span onclick="x()">atributos</span> não permitidos.
+"""
+
+# A short solution, rendered alongside the body of every solved problem
+SOLUTION = "Seja $n$ o número de **casos**. Pelo [lema](https://nemo.icmc.usp.br/lema), temos $n = 2$.\n"
+
+def make_post(sections):
+    return ''.join(SECTION.format(i=i) for i in range(sections))
+
+# --- 3. IMPLEMENTATIONS ---
+def render_before(text, solution=None):
+    """How view_post used to render a solved problem: fresh rule lists, then
+    markdown.markdown() and bleach.clean() for the body and again for the solution."""
+    allowed_tags = list(bleach.sanitizer.ALLOWED_TAGS) + [
+        'h1', 'h2', 'h3', 'p', 'br', 'img', 'a', 'ul', 'li', 'ol',
+        'strong', 'em', 'u', 's', 'blockquote', 'pre', 'code',
+        'video', 'iframe', 'div'
+    ]
+    allowed_attrs = {**bleach.sanitizer.ALLOWED_ATTRIBUTES, **POST_ATTRS}
+    html = bleach.clean(markdown.markdown(text), tags=allowed_tags, attributes=allowed_attrs)
+    if solution is not None:
+        html += bleach.clean(markdown.markdown(solution), tags=allowed_tags, attributes=allowed_attrs)
+    return html
+
+def render_after(text, solution=None):
+    """The sanitizer module: reused Markdown instance and prebuilt Cleaner per policy."""
+    html = sanitize(render_markdown(text), 'post')
+    if solution is not None:
+        html += sanitize(render_markdown(solution), 'solution')
+    return html
+
+def bench(funcs, text, solution, repeat, rounds):
+    """Best time of each function (ms per post) over `rounds` interleaved rounds.
+
+    Measures CPU time, so time spent waiting for other processes isn't
+    counted, and alternates the functions so slow rounds hit both sides.
+    """
+    best = [float('inf')] * len(funcs)
+    for func in funcs:
+        func(text, solution) # Warm-up (imports, first-use setup)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for i, func in enumerate(funcs):
+                start = time.process_time()
+                for _ in range(repeat):
+                    func(text, solution)
+                best[i] = min(best[i], (time.process_time() - start) / repeat * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+# --- 4. MAIN SCRIPT LOGIC ---
+def main():
+    """Compares the per-post render + sanitize latency before and after the sanitizer module."""
+    parser = argparse.ArgumentParser(description="Benchmark post sanitization.")
+    parser.add_argument('--sections', type=int, nargs='+', default=[0, 1, 10, 50],
+                        help="Post sizes to test, in content sections; 0 is a post with only "
+                             "a solution, where the per-call setup is most of the cost (default: 0 1 10 50).")
+    parser.add_argument('--repeat', type=int, default=20, help="Renders per round (default: 20).")
+    parser.add_argument('--rounds', type=int, default=7, help="Rounds per measurement; the best one is kept (default: 7).")
+    args = parser.parse_args()
+
+    print("Solved problem (body + solution), best of "
+          f"{args.rounds} rounds of {args.repeat} renders each:")
+    print(f"{'body':>10} {'before (ms)':>12} {'after (ms)':>12} {'saved (ms)':>11} {'speedup':>8}")
+    for sections in args.sections:
+        text = make_post(sections)
+        # Both paths must produce exactly the same HTML
+        if render_before(text, SOLUTION) != render_after(text, SOLUTION):
+            raise SystemExit("Outputs differ; the benchmark would not be comparing like with like.")
+        before, after = bench((render_before, render_after), text, SOLUTION, args.repeat, args.rounds)
+        print(f"{len(text) / 1024:>8.1f}KB {before:>12.2f} {after:>12.2f} {before - after:>11.2f} {before / after:>7.2f}x")
+    # What is saved is the fixed cost of each call (building the rule lists,
+    # Markdown and Cleaner); parsing a large body costs the same either way.
+    print("The saving is a fixed cost per rendered document; large bodies are kept fast by the render cache.")
+
+# --- 5. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
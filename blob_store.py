@@ -0,0 +1,293 @@
+import os
+import re
+import time
+import mimetypes
+import sqlite3
+import hashlib
+import secrets
+import threading
+from PIL import Image
+
+# Folder (inside the upload folder) holding every blob
+BLOBS_DIRNAME = '_blobs'
+# Blobs younger than this (in seconds) are never collected, so an upload
+# that hasn't been linked or inserted into a post yet is safe
+GC_GRACE_PERIOD = 60 * 60
+# Uploads are hashed while they are copied, in pieces of this size
+COPY_BUFFER = 64 * 1024
+
+# Media library filters: kind -> SQL condition on the MIME type
+KIND_FILTERS = {
+    'image': "mime LIKE 'image/%'",
+    'video': "mime LIKE 'video/%'",
+    'audio': "mime LIKE 'audio/%'",
+    'pdf': "mime = 'application/pdf'",
+}
+
+# Finds blob references in post Markdown, front-matter or database paths
+BLOB_REF_RE = re.compile(BLOBS_DIRNAME + r'/[0-9a-f]{2}/([0-9a-f]{64})')
+
+def blob_references(text):
+    """Returns the hashes of every blob mentioned in a piece of text."""
+    return set(BLOB_REF_RE.findall(text or ''))
+
+# --- Blob Store ---
+# Content-addressed storage for uploads: every file is stored once, named by
+# the SHA-256 of its contents (uploads/_blobs/ab/ab12....png), so the same
+# image uploaded for several posts takes the space of one, and a URL never
+# changes meaning and can be cached forever. The name the file was uploaded
+# under is kept in a per-folder mapping (folder, name) -> blob in a SQLite
+# file, which the media library lists; uploading a new file under the same
+# name just points the name at the new blob. Blobs no longer referenced by
+# any post, material or mapping are removed by `python gc_blobs.py`.
+#
+# The mapping doubles as the media library's index: each name also records
+# the file's size, MIME type, image dimensions, hash and timestamps, so a
+# folder is listed with one query instead of a stat per file. Files saved
+# straight into a folder before the blob store existed are indexed the first
+# time their folder is listed (and again only when the folder changes).
+class BlobStore:
+    def __init__(self):
+        self.static_folder = None
+        self.blobs_dir = None
+        self.db_path = None
+        # One connection per process and thread (workers are forked after import)
+        self._local = threading.local()
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        upload_folder = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+        self.blobs_dir = os.path.join(upload_folder, BLOBS_DIRNAME)
+        self.db_path = app.config.get('ASSET_STORE_PATH') or os.path.join(app.instance_path, 'assets.sqlite3')
+
+    # --- Storing Blobs ---
+    def store(self, stream, filename):
+        """Stores the contents of a file-like object. Returns (path inside static/, created).
+
+        `created` is False when an identical file was already stored.
+        """
+        tmp_file = self.temp_file()
+        try:
+            digest = hashlib.sha256()
+            with open(tmp_file, 'wb') as f:
+                for chunk in iter(lambda: stream.read(COPY_BUFFER), b''):
+                    f.write(chunk)
+                    digest.update(chunk)
+            return self._commit(tmp_file, digest.hexdigest(), filename)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def store_file(self, path, filename):
+        """Moves a file already on disk (same filesystem) into the store. Returns like store()."""
+        try:
+            return self._commit(path, self._hash_file(path), filename)
+        finally:
+            if os.path.exists(path):
+                os.remove(path) # Duplicate of a stored blob
+
+    def discard(self, static_path):
+        """Deletes a blob just stored by a request that then failed, unless a name points at it."""
+        try:
+            linked = self._connect().execute('SELECT 1 FROM asset WHERE blob = ? LIMIT 1', (static_path,)).fetchone()
+        except sqlite3.Error:
+            return # Can't tell; collect_garbage() removes it later if it stays unused
+        if linked is None:
+            try:
+                os.remove(self._file(static_path))
+            except OSError:
+                pass
+
+    def temp_file(self):
+        """A fresh path inside the store, for files that are then passed to store_file()."""
+        tmp_dir = os.path.join(self.blobs_dir, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, secrets.token_hex(16))
+
+    def is_blob(self, static_path):
+        return bool(blob_references(static_path))
+
+    # --- Name Mapping ---
+    def link(self, folder, name, static_path):
+        """Points `name` in an upload folder (e.g. 'news/my-post') at a blob and records its metadata."""
+        now = time.time()
+        with self._connect() as conn:
+            self._index(conn, folder, name, static_path, now)
+
+    def unlink(self, folder, name):
+        """Removes a name from an upload folder. Returns the file it pointed at, or None."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT blob FROM asset WHERE folder = ? AND name = ?', (folder, name)).fetchone()
+            if row is None:
+                return None
+            conn.execute('DELETE FROM asset WHERE folder = ? AND name = ?', (folder, name))
+        return row[0]
+
+    def lookup(self, folder, name):
+        """Returns the blob a name points at, or None."""
+        row = self._connect().execute(
+            'SELECT blob FROM asset WHERE folder = ? AND name = ?', (folder, name)
+        ).fetchone()
+        return row[0] if row else None
+
+    def listing(self, folder, offset=0, limit=100, kind=None, query=None):
+        """Returns (one page of the folder's files as dicts sorted by name, total matching).
+
+        `kind` is one of KIND_FILTERS; `query` matches part of the name.
+        """
+        where = 'folder = ?'
+        params = [folder]
+        if kind:
+            where += ' AND ' + KIND_FILTERS[kind]
+        if query:
+            where += " AND name LIKE ? ESCAPE '\\'"
+            params.append('%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM asset WHERE {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f'SELECT name, blob, size, mime, width, height, sha256, created_at, updated_at FROM asset'
+            f' WHERE {where} ORDER BY name LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        ).fetchall()
+        columns = ('name', 'path', 'size', 'mime', 'width', 'height', 'sha256', 'created_at', 'updated_at')
+        return [dict(zip(columns, row)) for row in rows], total
+
+    def sync_folder(self, folder, directory):
+        """Indexes the files saved directly in an upload folder (before the blob store existed).
+
+        Costs one stat when the folder hasn't changed since the last call.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None # No such folder: nothing saved there directly
+        conn = self._connect()
+        row = conn.execute('SELECT mtime_ns FROM asset_folder WHERE folder = ?', (folder,)).fetchone()
+        if row is not None and row[0] == mtime:
+            return
+
+        prefix = os.path.relpath(directory, self.static_folder).replace(os.sep, '/') + '/'
+        on_disk = set()
+        if mtime is not None:
+            on_disk = {name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))}
+        now = time.time()
+        with conn:
+            indexed = dict(conn.execute('SELECT name, blob FROM asset WHERE folder = ?', (folder,)).fetchall())
+            for name in on_disk:
+                # A name already pointing at a blob wins over an old file of the same name
+                if name not in indexed:
+                    self._index(conn, folder, name, prefix + name, now)
+            for name, path in indexed.items():
+                if path == prefix + name and name not in on_disk:
+                    conn.execute('DELETE FROM asset WHERE folder = ? AND name = ?', (folder, name)) # Deleted on disk
+            conn.execute(
+                'INSERT INTO asset_folder (folder, mtime_ns) VALUES (?, ?)'
+                ' ON CONFLICT (folder) DO UPDATE SET mtime_ns = excluded.mtime_ns',
+                (folder, mtime)
+            )
+
+    # --- Garbage Collection ---
+    def collect_garbage(self, referenced, dry_run=False):
+        """Deletes blobs whose hash is neither in `referenced` nor in the name mapping.
+
+        Returns [(path inside static/, size)] of the blobs removed (or that would be).
+        """
+        live = set(referenced)
+        for (blob,) in self._connect().execute('SELECT DISTINCT blob FROM asset'):
+            live |= blob_references(blob)
+
+        removed = []
+        cutoff = time.time() - GC_GRACE_PERIOD
+        for cur_path, dirnames, filenames in os.walk(self.blobs_dir):
+            for filename in filenames:
+                full_name = os.path.join(cur_path, filename)
+                static_path = os.path.relpath(full_name, self.static_folder).replace(os.sep, '/')
+                hashes = blob_references(static_path)
+                stat = os.stat(full_name)
+                if stat.st_mtime > cutoff or (hashes and hashes <= live):
+                    continue
+                # Anything else here (stale temporary files included) is garbage
+                removed.append((static_path, stat.st_size))
+                if not dry_run:
+                    os.remove(full_name)
+        return removed
+
+    # --- Internals ---
+    def _file(self, static_path):
+        return os.path.join(self.static_folder, *static_path.split('/'))
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _index(self, conn, folder, name, static_path, now):
+        filename = self._file(static_path)
+        stat = os.stat(filename)
+        mime = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        width = height = None
+        if mime.startswith('image/') and mime != 'image/svg+xml':
+            try:
+                with Image.open(filename) as image: # Reads just the header
+                    width, height = image.size
+            except (OSError, ValueError, Image.DecompressionBombError):
+                pass
+        # Blobs are named by their hash; files saved before the blob store are hashed once here
+        sha256 = next(iter(blob_references(static_path)), None)
+        created_at = now
+        if sha256 is None:
+            sha256 = self._hash_file(filename)
+            created_at = stat.st_mtime
+        conn.execute(
+            'INSERT INTO asset (folder, name, blob, size, mime, width, height, sha256, created_at, updated_at)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+            ' ON CONFLICT (folder, name) DO UPDATE SET blob = excluded.blob, size = excluded.size,'
+            ' mime = excluded.mime, width = excluded.width, height = excluded.height,'
+            ' sha256 = excluded.sha256, updated_at = excluded.updated_at',
+            (folder, name, static_path, stat.st_size, mime, width, height, sha256, created_at, now)
+        )
+
+    def _commit(self, tmp_file, digest, filename):
+        extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'bin'
+        blob_file = os.path.join(self.blobs_dir, digest[:2], f"{digest}.{extension}")
+        static_path = os.path.relpath(blob_file, self.static_folder).replace(os.sep, '/')
+        if os.path.exists(blob_file):
+            # Same contents already stored; refresh its age so GC leaves it alone until it's linked
+            os.utime(blob_file)
+            return static_path, False
+        os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+        os.replace(tmp_file, blob_file) # Atomic: a blob is never seen half-written
+        return static_path, True
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS asset ('
+            ' folder TEXT NOT NULL,'
+            ' name TEXT NOT NULL,'
+            ' blob TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' PRIMARY KEY (folder, name))'
+        )
+        # Metadata columns, added to indexes created before they existed
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(asset)')}
+        for column, sql_type in (('mime', 'TEXT'), ('width', 'INTEGER'), ('height', 'INTEGER'), ('sha256', 'TEXT')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE asset ADD COLUMN {column} {sql_type}')
+        # Folders whose directly saved files were indexed, and the folder mtime at that point
+        conn.execute('CREATE TABLE IF NOT EXISTS asset_folder (folder TEXT PRIMARY KEY, mtime_ns INTEGER)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
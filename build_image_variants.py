@@ -0,0 +1,25 @@
+# --- 1. IMPORTS ---
+import argparse
+from app import app
+from routes import image_variants, response_cache
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Creates the resized WebP/AVIF variants of images uploaded before the pipeline existed."""
+    parser = argparse.ArgumentParser(description="Generate resized variants of the uploaded images.")
+    parser.add_argument('folder', nargs='?', default='uploads',
+                        help="Folder inside static/ to scan (default: 'uploads').")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild variants even for images that are already up to date.")
+    args = parser.parse_args()
+
+    with app.app_context():
+        processed, skipped = image_variants.backfill(args.folder.strip('/'), force=args.force)
+        # Cached pages were rendered without srcset; drop them in every worker
+        response_cache.invalidate(group='posts')
+
+    print(f"{processed} image(s) with variants, {skipped} skipped (animated or unreadable).")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
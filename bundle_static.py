@@ -0,0 +1,15 @@
+# --- 1. IMPORTS ---
+from app import app
+from asset_bundles import build_bundles, BUNDLES_DIRNAME
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Concatenates and minifies the per-page CSS/JS bundles and the critical CSS of the home and post pages."""
+    sizes = build_bundles(app.static_folder, app.static_url_path)
+    for name, (before, after) in sorted(sizes.items()):
+        print(f"static/{BUNDLES_DIRNAME}/{name}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+    print(f"Built {len(sizes)} bundle(s). Run fingerprint_static.py and compress_static.py next, then restart the app.")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import secrets
+
+try:
+    import fcntl # Serializes appends to the same upload across Gunicorn workers (not on Windows)
+except ImportError:
+    fcntl = None
+
+# Folder (inside the upload folder) holding uploads still in progress
+PARTIAL_DIRNAME = '_partial'
+# Unfinished uploads are deleted after this long (in seconds)
+ABANDONED_AFTER = 24 * 60 * 60
+# Request bodies are copied to disk in pieces of this size, so memory stays flat
+COPY_BUFFER = 64 * 1024
+
+UPLOAD_ID_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+class UploadError(Exception):
+    """A rejected upload request; carries the HTTP status to answer with."""
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset # Current offset, so the client can resume from there
+
+# --- Chunked Uploads ---
+# Resumable uploads for large media: the client creates an upload, sends the
+# file as raw chunks at increasing offsets (each with an optional SHA-256),
+# and finalizes it. Chunks are streamed straight into a '.part' file under
+# UPLOAD_FOLDER/_partial and moved into place on finalize (a rename, since
+# the blob store lives in the same folder). All state lives in files, so any
+# Gunicorn worker can take the next chunk, and the file size is the resume
+# offset after a dropped connection.
+class ChunkedUploads:
+    def __init__(self, upload_folder, max_bytes, chunk_bytes):
+        self.partial_dir = os.path.join(upload_folder, PARTIAL_DIRNAME)
+        self.max_bytes = max_bytes      # Largest file accepted
+        self.chunk_bytes = chunk_bytes  # Largest chunk accepted per request
+
+    # --- Public API ---
+    def create(self, size, sha256=None, meta=None):
+        """Starts an upload of `size` bytes and returns its id.
+
+        `meta` (JSON-serializable) is kept with the upload and returned by finish().
+        """
+        if size < 0 or size > self.max_bytes:
+            raise UploadError(f'File too large (limit: {self.max_bytes // (1024 * 1024)} MB)', 413)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._remove_abandoned()
+
+        upload_id = secrets.token_urlsafe(18)
+        info = {'size': size, 'sha256': sha256, 'meta': meta, 'created_at': time.time()}
+        tmp_path = self._info_path(upload_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(tmp_path, self._info_path(upload_id))
+        open(self._part_path(upload_id), 'wb').close()
+        return upload_id
+
+    def status(self, upload_id):
+        """Returns {'offset', 'size'} of an upload in progress."""
+        info = self._info(upload_id)
+        return {'offset': os.path.getsize(self._part_path(upload_id)), 'size': info['size']}
+
+    def append(self, upload_id, offset, stream, length, sha256=None):
+        """Writes one chunk read from `stream` at `offset`. Returns the new offset.
+
+        A chunk for the wrong offset is rejected with 409 (and the current offset),
+        and a chunk whose SHA-256 doesn't match is discarded.
+        """
+        info = self._info(upload_id)
+        if length is None:
+            raise UploadError('Content-Length is required', 411)
+        if length > self.chunk_bytes:
+            raise UploadError(f'Chunk too large (limit: {self.chunk_bytes} bytes)', 413)
+
+        with open(self._part_path(upload_id), 'r+b') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX) # Released when the file is closed
+            current = f.seek(0, os.SEEK_END)
+            if offset != current:
+                raise UploadError('Offset does not match the data received so far', 409, current)
+            if current + length > info['size']:
+                raise UploadError('Chunk goes past the declared file size', 400, current)
+
+            digest = hashlib.sha256()
+            remaining = length
+            while remaining > 0:
+                data = stream.read(min(COPY_BUFFER, remaining))
+                if not data:
+                    break # Client went away mid-chunk
+                f.write(data)
+                digest.update(data)
+                remaining -= len(data)
+
+            # Keep only whole, verified chunks, so the offset is always a safe resume point
+            if remaining > 0 or (sha256 and digest.hexdigest() != sha256.lower()):
+                f.truncate(current)
+                if remaining > 0:
+                    raise UploadError('Chunk was cut short', 400, current)
+                raise UploadError('Chunk checksum mismatch', 422, current)
+            return current + length
+
+    def finish(self, upload_id, target_file):
+        """Moves a complete upload to `target_file` and returns its meta."""
+        info = self._info(upload_id)
+        part_path = self._part_path(upload_id)
+        received = os.path.getsize(part_path)
+        if received != info['size']:
+            raise UploadError('Upload is incomplete', 409, received)
+
+        if info.get('sha256'):
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != info['sha256'].lower():
+                self.abort(upload_id)
+                raise UploadError('File checksum mismatch; upload discarded', 422)
+
+        os.makedirs(os.path.dirname(target_file), exist_ok=True)
+        # Same filesystem, so this is an atomic rename rather than a copy
+        os.replace(part_path, target_file)
+        os.remove(self._info_path(upload_id))
+        return info['meta']
+
+    def finalize(self, upload_id, blobs):
+        """Moves a complete upload into a BlobStore and links it under its name.
+
+        Returns (meta, path inside static/, created). If storing or linking
+        the file fails (OSError, sqlite3.Error), everything made of the upload
+        is removed before the error is re-raised; the user then simply
+        uploads the file anew.
+        """
+        tmp_file = blobs.temp_file()
+        static_path, created = None, False
+        try:
+            meta = self.finish(upload_id, tmp_file)
+            static_path, created = blobs.store_file(tmp_file, meta['name'])
+            blobs.link(meta['folder'], meta['name'], static_path)
+        except (OSError, sqlite3.Error):
+            # Once the part file was moved out, the upload is gone; a failure before that leaves it resumable
+            if os.path.exists(tmp_file):
+                self.abort(upload_id)
+                os.remove(tmp_file)
+            if created:
+                blobs.discard(static_path)
+            raise
+        return meta, static_path, created
+
+    def abort(self, upload_id):
+        for path in (self._part_path(upload_id), self._info_path(upload_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # --- Internals ---
+    def _info_path(self, upload_id):
+        return os.path.join(self.partial_dir, upload_id + '.json')
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.partial_dir, upload_id + '.part')
+
+    def _info(self, upload_id):
+        if not UPLOAD_ID_RE.match(upload_id or ''):
+            raise UploadError('Upload not found', 404)
+        try:
+            with open(self._info_path(upload_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadError('Upload not found', 404)
+
+    def _remove_abandoned(self):
+        cutoff = time.time() - ABANDONED_AFTER
+        for name in os.listdir(self.partial_dir):
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-len('.json')]
+            # The .part file is touched by every chunk, so it tells when the upload was last active
+            try:
+                last_active = os.path.getmtime(self._part_path(upload_id))
+            except OSError:
+                last_active = 0
+            if last_active < cutoff:
+                self.abort(upload_id)
@@ -0,0 +1,76 @@
+# --- 1. IMPORTS ---
+import os
+import gzip
+import argparse
+from app import app
+from static_files import COMPRESSIBLE_EXTENSIONS
+
+try:
+    import brotli # Optional: `pip install brotli` to also create '.br' files
+except ImportError:
+    brotli = None
+
+# Files smaller than this gain nothing from compression
+MIN_SIZE = 1024
+# Folders inside static/ holding user uploads (images, videos and PDFs are already compressed)
+SKIPPED_FOLDERS = {'uploads'}
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def compressors():
+    """(suffix, function) for each encoding available here."""
+    result = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        result.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+    return result
+
+def compress_file(path, force=False):
+    """Writes the '.br'/'.gz' siblings of a file. Returns the bytes saved (0 if skipped)."""
+    source_stat = os.stat(path)
+    data = None
+    saved = 0
+    for suffix, compress in compressors():
+        target = path + suffix
+        try:
+            if not force and os.stat(target).st_mtime >= source_stat.st_mtime:
+                continue # Already up to date
+        except OSError:
+            pass
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = compress(data)
+        if len(compressed) >= len(data) * 0.95:
+            continue # Not worth a second copy
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, target)
+        saved = max(saved, len(data) - len(compressed))
+    return saved
+
+def main():
+    """Precompresses the static CSS/JS/PDF.js files, which static_files.py then serves as-is."""
+    parser = argparse.ArgumentParser(description="Create '.br'/'.gz' copies of the compressible static files.")
+    parser.add_argument('--force', action='store_true',
+                        help="Recompress files whose copies are already up to date.")
+    args = parser.parse_args()
+
+    count = total_saved = 0
+    for cur_path, dirnames, filenames in os.walk(app.static_folder):
+        if cur_path == app.static_folder:
+            dirnames[:] = [d for d in dirnames if d not in SKIPPED_FOLDERS]
+        for filename in filenames:
+            path = os.path.join(cur_path, filename)
+            if filename.rsplit('.', 1)[-1].lower() not in COMPRESSIBLE_EXTENSIONS or os.path.getsize(path) < MIN_SIZE:
+                continue
+            saved = compress_file(path, force=args.force)
+            if saved:
+                count += 1
+                total_saved += saved
+
+    encodings = 'brotli and gzip' if brotli is not None else 'gzip (install brotli for .br files)'
+    print(f"Compressed {count} file(s) with {encodings}; {total_saved / (1024 * 1024):.1f} MB smaller in total.")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
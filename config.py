@@ -19,10 +19,115 @@ class Config:
     # CRITICAL: Should be set to a strong, unique value in the .env file for production.
     SECRET_KEY = os.getenv('SECRET_KEY', 'a_default_secret_key')
 
+    # Number of reverse proxies (e.g. nginx) in front of the app. Their
+    # X-Forwarded-For header then gives the client's IP, which login throttling
+    # counts attempts by. Leave at 0 when the app is reached directly.
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))
+
+    # --- Password Hashing ---
+    # bcrypt work factor for password hashes; each step up doubles the time of a
+    # login. Existing hashes are converted on each user's next successful login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # A single hash or verification slower than this (in milliseconds) is logged as a warning.
+    BCRYPT_SLOW_MS = int(os.getenv('BCRYPT_SLOW_MS', 500))
+
+    # --- User Cache ---
+    # Seconds each worker reuses a loaded user (the logged-in account, post authors)
+    # before querying it again. Changes made through the site apply at once; 0 disables it.
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+
+    # --- Login Throttling ---
+    # Where password attempts are counted: 'sqlite' (one file shared by all
+    # workers, so the limits hold for the whole site), 'memory' (per worker:
+    # each of Gunicorn's workers allows the full limits) or 'off'.
+    LOGIN_THROTTLE_BACKEND = os.getenv('LOGIN_THROTTLE_BACKEND', 'sqlite')
+    # SQLite file for the 'sqlite' backend. Defaults to 'login_throttle.sqlite3' inside the app's instance folder.
+    LOGIN_THROTTLE_PATH = os.getenv('LOGIN_THROTTLE_PATH')
+    # Attempts a single IP may make at once, and how many it regains per minute.
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 10))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', 5))
+    # Wrong passwords allowed for a single account from one network (/24 or /64), and how many it regains per minute.
+    LOGIN_ACCOUNT_BURST = int(os.getenv('LOGIN_ACCOUNT_BURST', 5))
+    LOGIN_ACCOUNT_PER_MINUTE = float(os.getenv('LOGIN_ACCOUNT_PER_MINUTE', 1))
+
     # --- Flask-FlatPages Configuration ---
     # The file extension for your Markdown post files.
     FLATPAGES_EXTENSION = '.md'
     # The root directory where your Markdown post files are stored.
     FLATPAGES_ROOT = 'posts'
     # Automatically reload FlatPages data when a file changes (useful for development).
-    FLATPAGES_AUTO_RELOAD = True
\ No newline at end of file
+    # This re-scans the posts folder on every request; set FLATPAGES_AUTO_RELOAD=false in
+    # production, where edits made through the site update only the changed page.
+    FLATPAGES_AUTO_RELOAD = os.getenv('FLATPAGES_AUTO_RELOAD', 'true').lower() in ('1', 'true', 'yes')
+    # How each worker notices posts changed directly on disk when auto-reload is off:
+    # 'auto' (inotify, falling back to polling), 'inotify', 'poll' or 'off'.
+    CONTENT_WATCHER = os.getenv('CONTENT_WATCHER', 'auto')
+
+    # --- Listing Pagination ---
+    # Posts shown per page on the news and problem listings.
+    POSTS_PER_PAGE = int(os.getenv('POSTS_PER_PAGE', 12))
+    # Largest batch the /api/posts endpoint returns in one response.
+    API_POSTS_MAX_LIMIT = int(os.getenv('API_POSTS_MAX_LIMIT', 50))
+    # Largest page of files the media library's /list-assets endpoint returns.
+    ASSETS_MAX_LIMIT = int(os.getenv('ASSETS_MAX_LIMIT', 200))
+
+    # --- Image Variants ---
+    # Widths (in pixels) of the resized WebP/AVIF copies made of every uploaded image.
+    IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',') if w.strip()]
+
+    # --- PDF Previews ---
+    # Also render every page of uploaded PDFs to a JPEG (needs poppler-utils), so the
+    # viewer shows images instead of downloading PDF.js and the whole file.
+    PDF_PAGE_PREVIEWS = os.getenv('PDF_PAGE_PREVIEWS', 'false').lower() in ('1', 'true', 'yes')
+    # Pages rendered per PDF; later pages are drawn by PDF.js in the browser.
+    PDF_PREVIEW_MAX_PAGES = int(os.getenv('PDF_PREVIEW_MAX_PAGES', 60))
+    # Width (in pixels) of each page image.
+    PDF_PREVIEW_WIDTH = int(os.getenv('PDF_PREVIEW_WIDTH', 1024))
+
+    # --- Chunked Uploads ---
+    # Largest file (in bytes) accepted through the resumable upload endpoints.
+    CHUNKED_UPLOAD_MAX_BYTES = int(os.getenv('CHUNKED_UPLOAD_MAX_BYTES', 1024 * 1024 * 1024))
+    # Largest chunk (in bytes) per request; nginx's client_max_body_size must allow it.
+    CHUNKED_UPLOAD_CHUNK_BYTES = int(os.getenv('CHUNKED_UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024))
+
+    # --- Static Files ---
+    # Who sends the bytes of /static/ files: 'off' (the app itself), 'x-accel'
+    # (nginx, through an internal location) or 'x-sendfile' (Apache/lighttpd).
+    STATIC_OFFLOAD = os.getenv('STATIC_OFFLOAD', 'off')
+    # URI prefix of the internal nginx location used with 'x-accel'.
+    STATIC_ACCEL_PREFIX = os.getenv('STATIC_ACCEL_PREFIX', '/static-internal/')
+
+    # --- Blob Store ---
+    # SQLite file mapping upload names to their content-addressed blobs.
+    # Defaults to 'assets.sqlite3' inside the app's instance folder.
+    ASSET_STORE_PATH = os.getenv('ASSET_STORE_PATH')
+
+    # --- Background Jobs ---
+    # Who runs post-upload jobs: 'external' (only `python job_worker.py`
+    # processes, which gunicorn_config.py starts next to the web workers) or
+    # 'thread' (a background thread in each worker, for development).
+    # Unset: 'thread' in debug mode, 'external' otherwise.
+    JOB_RUNNER = os.getenv('JOB_RUNNER')
+    # SQLite file holding the queue. Defaults to 'jobs.sqlite3' inside the app's instance folder.
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH')
+
+    # --- Render Cache Configuration ---
+    # Memory budget (in bytes) for the sanitized post HTML kept by each worker.
+    RENDER_CACHE_MAX_BYTES = int(os.getenv('RENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # SQLite file shared by all Gunicorn workers with pre-rendered posts.
+    # Defaults to 'render_cache.sqlite3' inside the app's instance folder.
+    RENDER_CACHE_PATH = os.getenv('RENDER_CACHE_PATH')
+
+    # --- Response Cache Configuration ---
+    # Full-page cache for anonymous visitors: 'memory' (per worker), 'sqlite'
+    # (one file shared by all workers) or 'off'.
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    # Maximum number of cached pages.
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512))
+    # SQLite file for the 'sqlite' backend. Defaults to the app's instance folder.
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')
+
+    # --- Static Export Configuration ---
+    # Directory with the static HTML export of the public pages (see export_static.py).
+    # When set, saving a post or material re-exports the affected pages automatically.
+    STATIC_EXPORT_DIR = os.getenv('STATIC_EXPORT_DIR')
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import re
+import hashlib
+import threading
+import yaml
+from flask_flatpages import FlatPages
+from werkzeug.utils import cached_property
+
+# --- Front-Matter Validation ---
+FRONT_MATTER_RE = re.compile(r'^---\s*(.*?)\s*---\s*(.*)', re.DOTALL)
+
+def parse_front_matter(full_content):
+    """Returns the metadata dict of a post's full text.
+
+    Raises ValueError (with a message for the editor) if the front-matter is invalid.
+    """
+    match = FRONT_MATTER_RE.match(full_content or '')
+    if not match: raise ValueError("Could not find YAML front-matter separator '---'")
+
+    try:
+        metadata = yaml.safe_load(match.group(1))
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from e
+    if not metadata or not isinstance(metadata, dict):
+        raise ValueError("Invalid YAML front-matter format")
+
+    if not metadata.get('title'): raise ValueError("Metadata must contain a 'title'")
+    return metadata
+
+def content_hash(full_content):
+    return hashlib.sha256(full_content.encode('utf-8')).hexdigest()
+
+# --- Content Store ---
+# Flask-FlatPages with single-page updates. FlatPages.reload() forgets every
+# page and re-walks the whole posts/ tree on the next access; update() only
+# re-reads the one file that changed.
+#
+# Every Page also records the version of the file it was built from:
+#   * page.file_stamp: (mtime_ns, size) of the file when it was read, or None
+#     if the file changed while being read;
+#   * page.content_hash: SHA-256 of the text it was parsed from.
+# Caches key on these (render_cache.py) instead of stat()ing the file again,
+# so cached HTML always belongs to the source that was actually rendered.
+#
+# `generation` counts changes to the set of loaded pages: every update(), and
+# every tree walk (after reload()) that found added, edited or removed files.
+# Indexes over all pages (post_index.py) compare it instead of the pages.
+class ContentStore(FlatPages):
+    def __init__(self, app=None, name=None):
+        super().__init__(app, name)
+        self._update_lock = threading.Lock()
+        self._generation = 0
+        # The pages dict `_generation` was last counted for
+        self._counted_pages = None
+
+    @property
+    def generation(self):
+        self._pages # After a reload(), walk the tree first
+        return self._generation
+
+    def filename_for(self, path):
+        """Returns the Markdown file that backs a page path."""
+        return os.path.join(self.root, *path.split('/')) + self.config('extension')
+
+    def parse(self, full_content, path):
+        """Validates a post's full text and builds its Page object, without touching disk.
+
+        Raises ValueError if the front-matter is invalid.
+        """
+        parse_front_matter(full_content)
+        page = self._parse(full_content, path, os.path.dirname(path).replace('/', os.sep))
+        page.file_stamp = None # Not on disk yet; write() sets it
+        page.content_hash = content_hash(full_content)
+        return page
+
+    def is_current(self, path):
+        """True if the loaded page (or its absence) matches the file on disk,
+        e.g. because this worker has just saved it."""
+        try:
+            stat = os.stat(self.filename_for(path))
+        except OSError:
+            return self.get(path) is None
+        page = self.get(path)
+        return page is not None and getattr(page, 'file_stamp', None) == (stat.st_mtime_ns, stat.st_size)
+
+    def write(self, path, full_content, page=None):
+        """Atomically writes a page's Markdown file and loads it into the store.
+
+        `page` is the Page already parsed from `full_content` (see parse()), so
+        it doesn't have to be read back from disk. Returns the stored Page.
+        """
+        filename = self.filename_for(path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Write to a temporary file and swap it in, so no reader (FlatPages, the
+        # content watcher, nginx) ever sees a half-written post. The '.tmp'
+        # suffix keeps it out of FlatPages' file walk.
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w', encoding=self.config('encoding')) as f:
+            f.write(full_content)
+        os.replace(tmp_filename, filename)
+        return self.update(path, page)
+
+    def update(self, path, page=None):
+        """Re-reads a single page from disk, adding, replacing or removing it.
+
+        If `page` is given, it is used as the page's current version instead.
+        Returns the new Page object, or None if the file no longer exists.
+        """
+        filename = self.filename_for(path)
+        with self._update_lock:
+            # Always re-parse: a quick second save can keep the same mtime
+            self._file_cache.pop(filename, None)
+
+            if not os.path.isfile(filename):
+                page = None
+            elif page is not None:
+                stat = os.stat(filename)
+                page.file_stamp = (stat.st_mtime_ns, stat.st_size)
+                self._file_cache[filename] = (page, stat.st_mtime)
+            else:
+                rel_path = os.path.dirname(path).replace('/', os.sep)
+                page = self._load_file(path, filename, rel_path)
+
+            pages = self.__dict__.get('_pages')
+            if pages is None:
+                return page # Nothing loaded yet; the first access walks the tree anyway
+
+            # Copy-on-write, so requests iterating the old dict are never disturbed
+            new_pages = dict(pages)
+            if page is None:
+                new_pages.pop(path, None)
+            else:
+                new_pages[path] = page
+            self.__dict__['_pages'] = new_pages
+            self._counted_pages = new_pages
+            self._generation += 1
+            return page
+
+    @cached_property
+    def _pages(self):
+        """FlatPages' tree walk, keeping the previous pages (and generation) when no file changed.
+
+        With FLATPAGES_AUTO_RELOAD this runs on every request; unchanged files
+        come back as the same Page objects, so an identity check is enough.
+        """
+        pages = FlatPages._pages.fget(self)
+        with self._update_lock:
+            previous = self._counted_pages
+            if previous is not None and len(previous) == len(pages) \
+                    and all(previous.get(path) is page for path, page in pages.items()):
+                return previous
+            self._counted_pages = pages
+            self._generation += 1
+            return pages
+
+    def _load_file(self, path, filename, rel_path):
+        """FlatPages' loader, also recording the file version on the Page (see above)."""
+        before = os.stat(filename)
+        cached = self._file_cache.get(filename)
+        if cached and cached[1] == before.st_mtime:
+            return cached[0]
+
+        with open(filename, encoding=self.config('encoding')) as f:
+            full_content = f.read()
+        page = self._parse(full_content, path, rel_path)
+        after = os.stat(filename)
+        stamp = (before.st_mtime_ns, before.st_size)
+        # Replaced while being read: no stamp, so no cache can tie this text to either version
+        page.file_stamp = stamp if stamp == (after.st_mtime_ns, after.st_size) else None
+        page.content_hash = content_hash(full_content)
+        self._file_cache[filename] = (page, before.st_mtime)
+        return page
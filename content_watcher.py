@@ -0,0 +1,215 @@
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+
+logger = logging.getLogger(__name__)
+
+# --- inotify Constants (from <sys/inotify.h>) ---
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII') # wd, mask, cookie, len
+
+# Marker passed to the callback when too much changed to track single files
+RELOAD_ALL = None
+
+# --- Content Watcher ---
+# Background thread (one per Gunicorn worker) that notices Markdown files
+# created, modified or deleted directly on disk, e.g. by a `git pull` into the
+# mounted posts/ volume, and hands the changed page paths to a callback.
+# Changes are debounced, so a bulk update is applied as a single batch.
+class ContentWatcher:
+    def __init__(self, root, extension, on_change, mode='auto',
+                 debounce=0.25, max_delay=1.0, poll_interval=1.0, bulk_threshold=50):
+        self.root = os.path.abspath(root)
+        self.extension = extension
+        # Called with a set of page paths (or RELOAD_ALL) from the watcher thread
+        self.on_change = on_change
+        self.mode = mode                    # 'auto', 'inotify' or 'poll'
+        self.debounce = debounce            # Quiet time before applying a batch
+        self.max_delay = max_delay          # Apply a batch at least this often
+        self.poll_interval = poll_interval  # Used by the polling fallback
+        self.bulk_threshold = bulk_threshold
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts the watcher thread, once per process (safe to call on every request)."""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+
+        run = self._run_poll
+        if self.mode in ('auto', 'inotify'):
+            try:
+                self._inotify = _Inotify()
+                run = self._run_inotify
+            except OSError as e:
+                if self.mode == 'inotify':
+                    raise
+                logger.info("inotify unavailable (%s), polling %s instead", e, self.root)
+
+        self._thread = threading.Thread(target=run, name='content-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Helpers ---
+    def _page_path(self, filename):
+        """Maps an absolute Markdown filename to its FlatPages path, or None."""
+        if not filename.endswith(self.extension):
+            return None
+        rel_path = os.path.relpath(filename, self.root)
+        return rel_path[:-len(self.extension)].replace(os.sep, '/')
+
+    def _flush(self, pending):
+        if not pending:
+            return
+        changed = RELOAD_ALL if RELOAD_ALL in pending or len(pending) > self.bulk_threshold else set(pending)
+        pending.clear()
+        try:
+            self.on_change(changed)
+        except Exception:
+            logger.exception("Failed to apply content changes from disk")
+
+    # --- Polling Fallback ---
+    def _scan(self):
+        """Returns {filename: (mtime_ns, size)} for every Markdown file under root."""
+        files = {}
+        for cur_path, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(self.extension):
+                    filename = os.path.join(cur_path, name)
+                    try:
+                        stat = os.stat(filename)
+                    except OSError:
+                        continue # Deleted while scanning
+                    files[filename] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _run_poll(self):
+        previous = self._scan()
+        pending = set()
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for filename in previous.keys() | current.keys():
+                if previous.get(filename) != current.get(filename):
+                    pending.add(self._page_path(filename))
+            previous = current
+            # A full scan is already spaced out, so apply right away
+            self._flush(pending)
+
+    # --- inotify ---
+    def _run_inotify(self):
+        inotify = self._inotify
+        dirs = {} # watch descriptor -> directory
+        for cur_path, _, _ in os.walk(self.root):
+            self._add_watch(inotify, dirs, cur_path)
+
+        pending = set()
+        first_change = None
+        while not self._stop.is_set():
+            timeout = self.debounce if pending else 1.0
+            readable, _, _ = select.select([inotify.fd], [], [], timeout)
+            if readable:
+                if first_change is None:
+                    first_change = time.monotonic()
+                for wd, mask, name in inotify.read_events():
+                    self._handle_event(inotify, dirs, pending, wd, mask, name)
+                # Keep collecting while events arrive, but never wait longer than max_delay
+                if time.monotonic() - first_change < self.max_delay:
+                    continue
+            self._flush(pending)
+            first_change = None
+
+    def _add_watch(self, inotify, dirs, directory):
+        try:
+            dirs[inotify.add_watch(directory, WATCH_MASK)] = directory
+        except OSError as e:
+            logger.warning("Cannot watch %s: %s", directory, e)
+
+    def _handle_event(self, inotify, dirs, pending, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            pending.add(RELOAD_ALL) # Events were lost; re-read everything
+            return
+        if mask & IN_IGNORED:
+            dirs.pop(wd, None)
+            return
+        directory = dirs.get(wd)
+        if directory is None:
+            return
+        filename = os.path.join(directory, name) if name else directory
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Watch the new folder and pick up files that landed before the watch
+                for cur_path, _, filenames in os.walk(filename):
+                    self._add_watch(inotify, dirs, cur_path)
+                    for file_name in filenames:
+                        page_path = self._page_path(os.path.join(cur_path, file_name))
+                        if page_path:
+                            pending.add(page_path)
+            elif mask & IN_MOVED_FROM:
+                pending.add(RELOAD_ALL) # A whole folder left the tree
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if directory == self.root:
+                pending.add(RELOAD_ALL)
+            return
+
+        page_path = self._page_path(filename)
+        if page_path:
+            pending.add(page_path)
+
+class _Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API."""
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not supported on this platform")
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self):
+        """Yields (wd, mask, name) for every event currently queued."""
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            yield wd, mask, name
@@ -1,6 +1,7 @@
 # --- 1. IMPORTS ---
 from getpass import getpass
 from app import app, db, User 
+from routes import user_cache
 
 # --- 2. MAIN SCRIPT LOGIC ---
 def main():
@@ -32,6 +33,8 @@ def main():
             new_user = User(email=email, password=password, name=name)
             db.session.add(new_user)
             db.session.commit()
+            # Running workers may have cached that no author has this email
+            user_cache.invalidate()
             print(f"User '{name}' with email '{email}' was added successfully.")
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,32 @@
+# --- 1. IMPORTS ---
+import argparse
+from app import app
+from static_export import export_all, export_changed
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Exports the public pages to static HTML files that nginx can serve directly."""
+    parser = argparse.ArgumentParser(description="Export the public pages of the site to static HTML.")
+    parser.add_argument('output_dir', nargs='?', default=app.config.get('STATIC_EXPORT_DIR') or 'export',
+                        help="Directory where the HTML files are written (default: STATIC_EXPORT_DIR or 'export').")
+    parser.add_argument('--post', action='append', default=[], metavar='PATH',
+                        help="Only re-export the pages affected by this post (e.g. 'news/others/my-post'). Can be repeated.")
+    parser.add_argument('--materials', action='store_true',
+                        help="Only re-export the materials page.")
+    parser.add_argument('--base-url', default='http://localhost',
+                        help="Public URL of the site, used for absolute links such as og:url.")
+    args = parser.parse_args()
+
+    # --- Incremental Export ---
+    if args.post or args.materials:
+        count = export_changed(app, args.output_dir, args.post, args.materials, args.base_url)
+        print(f"Re-exported {count} page(s) to '{args.output_dir}'.")
+        return
+
+    # --- Full Export ---
+    count = export_all(app, args.output_dir, args.base_url)
+    print(f"Exported {count} page(s) to '{args.output_dir}'.")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
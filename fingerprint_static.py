@@ -0,0 +1,23 @@
+# --- 1. IMPORTS ---
+import argparse
+from app import app
+from asset_manifest import build_manifest, remove_stale_copies, MANIFEST_NAME
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Creates content-hashed copies of the static files and the manifest the templates resolve them with."""
+    parser = argparse.ArgumentParser(description="Fingerprint the static CSS/JS/images for long-lived caching.")
+    parser.add_argument('--clean', action='store_true',
+                        help="Also delete hashed copies from previous builds. Only do this once no "
+                             "cached page can still link to them.")
+    args = parser.parse_args()
+
+    manifest = build_manifest(app.static_folder, app.static_url_path)
+    print(f"Fingerprinted {len(manifest)} file(s) into static/{MANIFEST_NAME}.")
+    if args.clean:
+        print(f"Removed {remove_stale_copies(app.static_folder, manifest)} outdated copy(ies).")
+    print("Restart the app (and run compress_static.py) to use them.")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
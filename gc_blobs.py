@@ -0,0 +1,44 @@
+# --- 1. IMPORTS ---
+import os
+import argparse
+from app import app
+from models import User, Material
+from routes import pages, blob_store, image_variants, pdf_pages
+from blob_store import blob_references
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def referenced_blobs():
+    """Hashes of every blob used by a post (drafts included), material or profile picture."""
+    hashes = set()
+    # Raw files rather than parsed pages, so front-matter and broken posts count too
+    for cur_path, _, filenames in os.walk(pages.root):
+        for filename in filenames:
+            with open(os.path.join(cur_path, filename), encoding='utf-8', errors='replace') as f:
+                hashes |= blob_references(f.read())
+    for (pdf_path,) in Material.query.with_entities(Material.pdf_path):
+        hashes |= blob_references(pdf_path)
+    for (image_path,) in User.query.with_entities(User.profile_image_path):
+        hashes |= blob_references(image_path)
+    return hashes
+
+def main():
+    """Deletes uploaded blobs that no post, material or media library entry uses anymore."""
+    parser = argparse.ArgumentParser(description="Remove unused files from the upload blob store.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only list the files that would be removed.")
+    args = parser.parse_args()
+
+    with app.app_context():
+        removed = blob_store.collect_garbage(referenced_blobs(), dry_run=args.dry_run)
+        for static_path, size in removed:
+            print(f"{'Would remove' if args.dry_run else 'Removed'} {static_path} ({size} bytes)")
+            if not args.dry_run:
+                image_variants.remove(static_path) # Resized copies and previews of it
+                pdf_pages.remove(static_path)
+
+    total = sum(size for _, size in removed)
+    print(f"{len(removed)} unused file(s), {total / (1024 * 1024):.1f} MB{' (dry run)' if args.dry_run else ' freed'}.")
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
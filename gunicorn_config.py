@@ -11,4 +11,51 @@ bind = '0.0.0.0:8000'
 # The level of detail for logging.
 # Options include 'debug', 'info', 'warning', 'error', 'critical'.
 # 'info' is a good default for production.
-loglevel = 'info'
\ No newline at end of file
+loglevel = 'info'
+
+# --- Background Jobs ---
+# With JOB_RUNNER=external (the default), uploads are processed by a separate
+# `python job_worker.py` process instead of threads inside the web workers.
+# The Gunicorn master starts one once it is ready, restarts it if it dies and
+# stops it on shutdown. Set JOB_WORKER_AUTOSTART=false when the job worker
+# runs elsewhere (e.g. in its own container).
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv() # Same settings as config.py, which reads .env too
+
+job_worker = {'process': None, 'stopping': False}
+
+def when_ready(server):
+    runner = (os.getenv('JOB_RUNNER') or 'external').lower()
+    autostart = os.getenv('JOB_WORKER_AUTOSTART', 'true').lower() in ('1', 'true', 'yes')
+    if runner == 'external' and autostart:
+        threading.Thread(target=supervise_job_worker, args=(server,), name='job-worker', daemon=True).start()
+
+def supervise_job_worker(server):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_worker.py')
+    while not job_worker['stopping']:
+        process = subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script))
+        job_worker['process'] = process
+        server.log.info("Started job worker (pid: %s)", process.pid)
+        process.wait()
+        if not job_worker['stopping']:
+            server.log.warning("Job worker exited (status %s); restarting in 5 seconds", process.returncode)
+            time.sleep(5)
+
+def on_exit(server):
+    job_worker['stopping'] = True
+    process = job_worker['process']
+    if process is None or process.poll() is not None:
+        return
+    # Stopped as Ctrl+C would; a job cut short is run again later (STALE_AFTER in job_queue.py)
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
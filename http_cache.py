@@ -0,0 +1,43 @@
+import os
+import hashlib
+from flask import make_response, request
+from werkzeug.http import is_resource_modified
+
+# --- Validators ---
+def make_etag(*parts):
+    """Builds a strong ETag value from the things a response depends on."""
+    return hashlib.sha1('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def template_fingerprint(template_dir):
+    """Identifies the deployed templates, so a new deploy never matches old ETags.
+
+    Based on file names, sizes and mtimes, which are the same for every worker.
+    """
+    entries = []
+    for cur_path, _, filenames in os.walk(template_dir):
+        for name in filenames:
+            full_name = os.path.join(cur_path, name)
+            stat = os.stat(full_name)
+            entries.append((os.path.relpath(full_name, template_dir), stat.st_mtime_ns, stat.st_size))
+    return make_etag(*sorted(entries))
+
+# --- Conditional Responses ---
+def conditional_response(etag, last_modified, render):
+    """Answers 304 Not Modified when the client's copy is still current.
+
+    `render` is only called when the page actually has to be sent.
+    """
+    if request.method in ('GET', 'HEAD') and not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified):
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Browsers and proxies may keep a copy, but must revalidate it every time
+    response.cache_control.no_cache = True
+    # Logged-in users see a different page (admin links) at the same URL
+    response.vary.add('Cookie')
+    return response
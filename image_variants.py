@@ -0,0 +1,258 @@
+import os
+import io
+import json
+import base64
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from PIL import Image, ImageFilter, ImageOps, features
+
+try:
+    import fcntl # Locks the manifest between Gunicorn workers (not available on Windows)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# --- Variant Settings ---
+# Raster formats we can resize (SVGs are already small and scalable)
+SOURCE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif'}
+# Widths (in pixels) of the resized copies; never larger than the original
+DEFAULT_WIDTHS = (320, 640, 1280)
+# Encoder quality per output format
+QUALITY = {'avif': 50, 'webp': 80}
+# The blurred placeholder is inlined in the HTML, so it must stay tiny
+PLACEHOLDER_WIDTH = 16
+
+# Folder (inside the upload folder) holding every variant and the manifest
+VARIANTS_DIRNAME = '_variants'
+# Other files derived from an upload (see media_jobs.py), named '<original name>.<suffix>'
+DERIVED_SUFFIXES = ('preview.jpg', 'poster.jpg')
+
+def output_formats():
+    """Formats this Pillow build can encode, best compression first."""
+    formats = ['avif'] if features.check('avif') else []
+    return formats + ['webp']
+
+def is_supported(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in SOURCE_EXTENSIONS
+
+# --- Image Variants ---
+# Resized WebP/AVIF copies of uploaded images, plus a blurred placeholder, so
+# templates can emit `srcset` instead of shipping the original to everyone.
+# Every image is recorded in a JSON manifest keyed by its path inside static/
+# (the same value used in post front-matter, e.g. 'uploads/news/x/banner.png'):
+#
+#   {"uploads/news/x/banner.png": {
+#       "width": 2400, "height": 1200, "source": [mtime_ns, size],
+#       "srcset": {"avif": [[320, "uploads/_variants/news/x/banner-1a2b3c4d-320.avif"], ...],
+#                  "webp": [...]},
+#       "placeholder": "data:image/webp;base64,..."}}
+class ImageVariants:
+    def __init__(self, widths=DEFAULT_WIDTHS):
+        self.widths = tuple(widths)
+        self.static_folder = None
+        self.variants_dir = None
+        self.manifest_path = None
+        # Parsed manifest and the mtime it was read at (reloaded when another worker writes it)
+        self._manifest = {}
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.widths = tuple(app.config.get('IMAGE_VARIANT_WIDTHS') or self.widths)
+        upload_folder = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+        self.variants_dir = os.path.join(upload_folder, VARIANTS_DIRNAME)
+        self.manifest_path = os.path.join(self.variants_dir, 'manifest.json')
+        # Templates: {{ image_variants(post.meta.image) }} (see partials/picture.html)
+        app.jinja_env.globals['image_variants'] = self.get
+
+    # --- Public API ---
+    def get(self, static_path):
+        """Returns the manifest entry of an image, or None if it has no variants."""
+        if not static_path:
+            return None
+        return self._load_manifest().get(static_path)
+
+    @property
+    def version(self):
+        """Changes whenever the manifest is written (by any worker), 0 before the first variant."""
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except (OSError, TypeError):
+            return 0
+
+    def generate(self, static_path, force=False):
+        """Creates (or refreshes) the variants of one image and records them.
+
+        Returns the manifest entry, or None for files that can't be resized.
+        """
+        source_file = self.static_file(static_path)
+        if not is_supported(source_file) or not os.path.isfile(source_file):
+            return None
+        stat = os.stat(source_file)
+        source_stamp = [stat.st_mtime_ns, stat.st_size]
+
+        current = self.get(static_path)
+        if current and current['source'] == source_stamp and not force:
+            return current # Already up to date
+
+        try:
+            entry = self._build(static_path, source_file, source_stamp)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning("Could not create image variants for %s: %s", static_path, e)
+            return None
+
+        with self._locked_manifest() as manifest:
+            old_entry = manifest.get(static_path)
+            if entry is None:
+                manifest.pop(static_path, None)
+            else:
+                manifest[static_path] = entry
+        # Files of the previous version (their names contain the old content hash)
+        self._remove_files(old_entry, keep=entry)
+        return entry
+
+    def remove(self, static_path):
+        """Deletes the variants and derived files of an upload (e.g. when the original is deleted)."""
+        with self._locked_manifest() as manifest:
+            entry = manifest.pop(static_path, None)
+        self._remove_files(entry)
+        for suffix in DERIVED_SUFFIXES:
+            try:
+                os.remove(self.derived_file(static_path, suffix)[1])
+            except OSError:
+                pass
+
+    def derived_file(self, static_path, suffix):
+        """Returns (path inside static/, filesystem path) for a file derived from an upload.
+
+        E.g. ('uploads/x/talk.mp4', 'poster.jpg') -> 'uploads/_variants/x/talk.mp4.poster.jpg'.
+        """
+        name = static_path[len('uploads/'):] if static_path.startswith('uploads/') else static_path
+        filename = os.path.join(self.variants_dir, *name.split('/')) + '.' + suffix
+        return os.path.relpath(filename, self.static_folder).replace(os.sep, '/'), filename
+
+    def backfill(self, folder, force=False):
+        """Generates missing or outdated variants for every image under a static/ subfolder.
+
+        Returns (number of images processed, number skipped).
+        """
+        processed = skipped = 0
+        root = self.static_file(folder)
+        for cur_path, dirnames, filenames in os.walk(root):
+            # Never make variants of variants
+            dirnames[:] = [d for d in dirnames if os.path.join(cur_path, d) != self.variants_dir]
+            for filename in sorted(filenames):
+                if not is_supported(filename):
+                    continue
+                static_path = os.path.relpath(os.path.join(cur_path, filename), self.static_folder).replace(os.sep, '/')
+                if self.generate(static_path, force=force):
+                    processed += 1
+                else:
+                    skipped += 1
+        return processed, skipped
+
+    # --- Internals ---
+    def static_file(self, static_path):
+        """Filesystem path of a file given by its path inside static/."""
+        return os.path.join(self.static_folder, *static_path.split('/'))
+
+    def _build(self, static_path, source_file, source_stamp):
+        with open(source_file, 'rb') as f:
+            data = f.read()
+        image = Image.open(io.BytesIO(data))
+        if getattr(image, 'is_animated', False):
+            return None # Resizing would drop the animation
+        image = ImageOps.exif_transpose(image) # Phone photos are often stored sideways
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+
+        # The content hash in the file names lets browsers cache variants forever
+        digest = hashlib.sha1(data).hexdigest()[:8]
+        stem = os.path.splitext(static_path)[0]
+        if stem.startswith('uploads/'):
+            stem = stem[len('uploads/'):]
+        out_base = os.path.join(self.variants_dir, *stem.split('/'))
+        os.makedirs(os.path.dirname(out_base), exist_ok=True)
+
+        # Always include one copy at the original width when it's below the largest size
+        widths = sorted({w for w in self.widths if w < image.width} | {min(image.width, max(self.widths))})
+        srcset = {}
+        for fmt in output_formats():
+            srcset[fmt] = []
+            for width in widths:
+                out_file = f"{out_base}-{digest}-{width}.{fmt}"
+                if not os.path.exists(out_file):
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                    tmp_file = out_file + '.tmp'
+                    resized.save(tmp_file, format=fmt.upper(), quality=QUALITY[fmt])
+                    os.replace(tmp_file, out_file)
+                srcset[fmt].append([width, os.path.relpath(out_file, self.static_folder).replace(os.sep, '/')])
+
+        return {
+            'width': image.width,
+            'height': image.height,
+            'source': source_stamp,
+            'srcset': srcset,
+            'placeholder': self._placeholder(image),
+        }
+
+    @staticmethod
+    def _placeholder(image):
+        """A blurred thumbnail of a few hundred bytes, inlined as a data: URI."""
+        height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+        thumb = image.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+        buffer = io.BytesIO()
+        thumb.save(buffer, format='WEBP', quality=30)
+        return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    def _remove_files(self, entry, keep=None):
+        if not entry:
+            return
+        kept = {path for paths in (keep or {}).get('srcset', {}).values() for _, path in paths}
+        for paths in entry['srcset'].values():
+            for _, path in paths:
+                if path not in kept:
+                    try:
+                        os.remove(self.static_file(path))
+                    except OSError:
+                        pass
+
+    def _load_manifest(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return {} # No variants generated yet
+        if mtime != self._manifest_mtime:
+            with self._lock:
+                try:
+                    with open(self.manifest_path, encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                    self._manifest_mtime = mtime
+                except (OSError, ValueError) as e:
+                    logger.warning("Could not read image manifest: %s", e)
+        return self._manifest
+
+    @contextmanager
+    def _locked_manifest(self):
+        """Read-modify-write of the manifest, locked against other workers and saved atomically."""
+        os.makedirs(self.variants_dir, exist_ok=True)
+        with open(self.manifest_path + '.lock', 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX) # Released when the file is closed
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+
+            yield manifest
+
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
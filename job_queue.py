@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# A job that failed this many times is left as 'failed'
+MAX_ATTEMPTS = 3
+# Seconds before a failed job is tried again, doubled after each further failure
+RETRY_DELAY = 30
+# A 'running' job older than this (in seconds) belongs to a worker that died; run it again
+STALE_AFTER = 15 * 60
+# Finished jobs are kept this long (in seconds) so their status can still be polled
+KEEP_FINISHED = 7 * 24 * 60 * 60
+
+# --- Job Queue ---
+# Local background jobs stored in a SQLite file, so slow post-upload work
+# (resizing images, PDF previews, video posters, checksums) runs outside the
+# request that uploaded the file. Jobs are run either only by separate
+# `python job_worker.py` processes (JOB_RUNNER='external', the default outside
+# debug mode, so pdftoppm and ffmpeg don't compete with the sync workers;
+# gunicorn_config.py starts one) or by a thread inside each worker
+# (JOB_RUNNER='thread', handy in development). A failed job is retried after
+# RETRY_DELAY seconds, doubling.
+class JobQueue:
+    def __init__(self):
+        self.app = None
+        self.db_path = None
+        self.runner = 'thread'
+        # kind -> function(**payload) returning a JSON-serializable result
+        self._handlers = {}
+        # One connection per process and thread (workers are forked after import)
+        self._local = threading.local()
+        self._thread = None
+        self._pid = None
+        # Set by enqueue(), so this process's runner thread starts right away
+        self._wakeup = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.db_path = app.config.get('JOB_QUEUE_PATH') or os.path.join(app.instance_path, 'jobs.sqlite3')
+        self.runner = (app.config.get('JOB_RUNNER') or ('thread' if app.debug else 'external')).lower()
+        if self.runner not in ('thread', 'external'):
+            raise ValueError(f"Unknown JOB_RUNNER: {self.runner!r}")
+
+    def handler(self, kind):
+        """Registers the function that runs jobs of the given kind."""
+        def decorator(func):
+            self._handlers[kind] = func
+            return func
+        return decorator
+
+    # --- Public API ---
+    def enqueue(self, kind, **payload):
+        """Adds a job and returns its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO job (kind, payload, status, attempts, created_at) VALUES (?, ?, ?, 0, ?)',
+                (kind, json.dumps(payload), 'queued', time.time())
+            )
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def get(self, job_id):
+        """Returns a job's status as a dict, or None if it doesn't exist."""
+        row = self._connect().execute(
+            'SELECT id, kind, status, attempts, result, error, created_at, finished_at FROM job WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'status': row[2],   # 'queued', 'running', 'done' or 'failed'
+            'attempts': row[3],
+            'result': json.loads(row[4]) if row[4] else None,
+            'error': row[5],
+            'created_at': row[6],
+            'finished_at': row[7],
+        }
+
+    def run_next(self):
+        """Claims and runs the oldest queued job. Returns False if there was none."""
+        job = self._claim()
+        if job is None:
+            return False
+        job_id, kind, payload = job
+
+        try:
+            handler = self._handlers[kind]
+            with self.app.app_context():
+                result = handler(**json.loads(payload))
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            self._finish(job_id, error=f"{type(e).__name__}: {e}")
+        else:
+            self._finish(job_id, result=result)
+        return True
+
+    def work(self, stop=None, poll_interval=1.0):
+        """Runs jobs until `stop` (a threading.Event) is set, sleeping while the queue is empty."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                ran = self.run_next()
+            except sqlite3.Error as e:
+                logger.warning("Job queue unavailable: %s", e)
+                ran = False
+            if not ran:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+
+    def start(self):
+        """Starts this process's runner thread (JOB_RUNNER='thread'), once per process."""
+        if self.runner != 'thread' or (self._pid == os.getpid() and self._thread is not None):
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self.work, name='job-runner', daemon=True)
+        self._thread.start()
+
+    # --- Internals ---
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        # Transactions are managed explicitly (BEGIN IMMEDIATE when claiming)
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL') # Pollers never block the web workers
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' kind TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL,'
+            ' result TEXT,'
+            ' error TEXT,'
+            ' created_at REAL NOT NULL,'
+            ' started_at REAL,'
+            ' finished_at REAL,'
+            ' run_after REAL)'
+        )
+        # Queue files created before retries were delayed
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(job)')]
+        if 'run_after' not in columns:
+            try:
+                conn.execute('ALTER TABLE job ADD COLUMN run_after REAL')
+            except sqlite3.OperationalError:
+                pass # Another process added it first
+        conn.execute('CREATE INDEX IF NOT EXISTS job_status ON job (status, id)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _claim(self):
+        conn = self._connect()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so two runners never claim the same job
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs left 'running' by a worker that died are queued again
+            conn.execute(
+                "UPDATE job SET status = 'queued' WHERE status = 'running' AND started_at < ?",
+                (now - STALE_AFTER,)
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload FROM job WHERE status = 'queued'"
+                " AND (run_after IS NULL OR run_after <= ?) ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE job SET status = 'running', attempts = attempts + 1, started_at = ? WHERE id = ?",
+                    (now, row[0])
+                )
+            else:
+                # Nothing to do: a good moment to forget old finished jobs
+                conn.execute(
+                    "DELETE FROM job WHERE status IN ('done', 'failed') AND finished_at < ?",
+                    (now - KEEP_FINISHED,)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _finish(self, job_id, result=None, error=None):
+        conn = self._connect()
+        if error is None:
+            conn.execute(
+                "UPDATE job SET status = 'done', result = ?, error = NULL, finished_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+        else:
+            # Retry later (RETRY_DELAY, then twice that, ...) unless it has already failed too often
+            now = time.time()
+            conn.execute(
+                "UPDATE job SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END,"
+                " run_after = ? + ? * (1 << (attempts - 1)), error = ?, finished_at = ? WHERE id = ?",
+                (MAX_ATTEMPTS, now, RETRY_DELAY, error, now, job_id)
+            )
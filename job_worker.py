@@ -0,0 +1,35 @@
+# --- 1. IMPORTS ---
+import argparse
+import logging
+from app import app
+from routes import job_queue
+
+# --- 2. MAIN SCRIPT LOGIC ---
+def main():
+    """Runs background jobs (thumbnails, PDF previews, video posters, checksums) until stopped."""
+    parser = argparse.ArgumentParser(description="Run the site's background job queue.")
+    parser.add_argument('--once', action='store_true',
+                        help="Run every queued job, then exit (e.g. from cron).")
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help="Seconds to wait between checks of an empty queue (default: 1).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    # --- Drain the Queue ---
+    if args.once:
+        count = 0
+        while job_queue.run_next():
+            count += 1
+        print(f"Ran {count} job(s).")
+        return
+
+    # --- Run Forever ---
+    print(f"Waiting for jobs in '{job_queue.db_path}' (Ctrl+C to stop)...")
+    try:
+        job_queue.work(poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+# --- 3. SCRIPT EXECUTION ---
+if __name__ == "__main__":
+    main()
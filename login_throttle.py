@@ -0,0 +1,214 @@
+import os
+import math
+import time
+import sqlite3
+import logging
+import ipaddress
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- Token Buckets ---
+# A bucket holds up to `capacity` attempts and refills at `per_second`. Each
+# attempt takes one token; with none left, the attempt is refused and the
+# caller is told how long until the next token. A bucket that has refilled
+# completely is the same as one that was never used, so it can be forgotten.
+def refill(tokens, updated, capacity, per_second, now):
+    return min(capacity, tokens + (now - updated) * per_second)
+
+def take_token(tokens, per_second, cost=1):
+    """Returns (tokens left, seconds to wait: 0 if the attempt is allowed).
+
+    A `cost` of 0 only looks: it says whether a token is there without taking it.
+    """
+    if tokens >= 1:
+        return tokens - cost, 0.0
+    return tokens, (1 - tokens) / per_second
+
+def full_at(tokens, capacity, per_second, now):
+    return now + (capacity - tokens) / per_second
+
+# --- Backends ---
+# Both backends expose take(key, capacity, per_second, cost=1) -> seconds to
+# wait (0 = allowed), reset(key) and clear().
+
+class MemoryBuckets:
+    """In-process buckets. Each worker counts its own attempts, so with N workers
+    a client may get up to N times the limits."""
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated, full_at), oldest update first
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, cost=1):
+        now = time.time()
+        with self._lock:
+            tokens, updated, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens, wait = take_token(refill(tokens, updated, capacity, per_second, now), per_second, cost)
+            self._buckets[key] = (tokens, now, full_at(tokens, capacity, per_second, now))
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _prune(self, now):
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        # Still too many (a flood of distinct keys): forget the least recently used
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+class SQLiteBuckets:
+    """Local SQLite file shared by every Gunicorn worker, so a limit holds for the whole site (the default)."""
+    # Delete the refilled buckets every this many attempts
+    PRUNE_EVERY = 200
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # One connection per process and thread (workers are forked after import)
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        # Transactions are managed explicitly (BEGIN IMMEDIATE around each read-modify-write)
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS login_bucket ('
+            ' key TEXT PRIMARY KEY,'
+            ' tokens REAL NOT NULL,'
+            ' updated REAL NOT NULL,'
+            ' full_at REAL NOT NULL)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, capacity, per_second, cost=1):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM login_bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, wait = take_token(refill(tokens, updated, capacity, per_second, now), per_second, cost)
+            conn.execute(
+                'INSERT OR REPLACE INTO login_bucket (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, full_at(tokens, capacity, per_second, now))
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM login_bucket WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def reset(self, key):
+        self._connect().execute('DELETE FROM login_bucket WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM login_bucket')
+
+def client_network(ip):
+    """The /24 (IPv4) or /64 (IPv6) network of a client, as a string."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return str(ip)
+    prefix = 24 if address.version == 4 else 64
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+# --- Login Throttle ---
+# Every password check (the login form and the password prompt of the account
+# settings) is guarded by two buckets. A refused attempt costs no database
+# query and no bcrypt verification, so a credential-stuffing burst is answered
+# with cheap 429s instead of occupying the sync workers that serve the public site.
+#
+#   * The IP bucket: every attempt takes a token, before bcrypt runs. It stops
+#     one client from trying many passwords or accounts.
+#   * The account bucket, per account *and client network* (/24 or /64): only
+#     wrong passwords take a token (failed()), and attempts are refused while
+#     it is empty. Several addresses of one network can't share out a guessing
+#     run, while failures from elsewhere never lock the owner out of their
+#     own account. A correct password empties the count (succeeded()).
+class LoginThrottle:
+    def __init__(self):
+        self.backend = None
+        self.ip_limit = (10, 5 / 60)      # (burst, attempts per second)
+        self.account_limit = (5, 1 / 60)
+        self.refused = 0                  # Attempts refused by this worker, for the metrics endpoint
+
+    def init_app(self, app):
+        backend = (app.config.get('LOGIN_THROTTLE_BACKEND') or 'sqlite').lower()
+        if backend == 'memory':
+            self.backend = MemoryBuckets()
+        elif backend == 'sqlite':
+            db_path = app.config.get('LOGIN_THROTTLE_PATH') or os.path.join(app.instance_path, 'login_throttle.sqlite3')
+            self.backend = SQLiteBuckets(db_path)
+        elif backend == 'off':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown LOGIN_THROTTLE_BACKEND: {backend!r}")
+
+        self.ip_limit = (app.config.get('LOGIN_IP_BURST', 10), app.config.get('LOGIN_IP_PER_MINUTE', 5) / 60)
+        self.account_limit = (app.config.get('LOGIN_ACCOUNT_BURST', 5), app.config.get('LOGIN_ACCOUNT_PER_MINUTE', 1) / 60)
+
+    def check(self, ip, account):
+        """Takes one attempt for this IP and checks the account's failures from
+        its network. Returns 0 if the password may be verified, otherwise the
+        whole seconds to wait (for a Retry-After header)."""
+        if self.backend is None:
+            return 0
+        wait = self._take(f'ip:{ip}', self.ip_limit)
+        if not wait:
+            wait = self._take(account_key(ip, account), self.account_limit, cost=0)
+        if wait:
+            self.refused += 1
+            return max(1, math.ceil(wait))
+        return 0
+
+    def failed(self, ip, account):
+        """Counts a wrong password for this account from the client's network."""
+        if self.backend is not None:
+            self._take(account_key(ip, account), self.account_limit)
+
+    def succeeded(self, ip, account):
+        """Forgets the failed attempts against an account once its password was given correctly."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.reset(account_key(ip, account))
+        except sqlite3.Error as e:
+            logger.warning("Login throttle reset failed: %s", e)
+
+    # Backend errors (e.g. a locked SQLite file) never lock everyone out
+    def _take(self, key, limit, cost=1):
+        capacity, per_second = limit
+        try:
+            return self.backend.take(key, capacity, per_second, cost)
+        except sqlite3.Error as e:
+            logger.warning("Login throttle check failed: %s", e)
+            return 0
+
+def normalize_account(account):
+    return (account or '').strip().lower()
+
+def account_key(ip, account):
+    return f'account:{normalize_account(account)}:{client_network(ip)}'
+
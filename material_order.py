@@ -0,0 +1,109 @@
+from sqlalchemy import case, func, select, update
+from models import db, Material
+
+# Rows per UPDATE ... CASE statement: 3 bound values each, which keeps a
+# statement under the 999-variable limit of older SQLite builds
+MAX_CASE_ROWS = 300
+
+class OrderError(Exception):
+    """A rejected reorder request; carries the HTTP status to answer with."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+# --- Material Order ---
+# Materials are listed by `position`, kept dense (0, 1, 2, ...), so a row's
+# position is its index on the page. Reordering never loads Material objects:
+#
+#   * reorder(ids) checks the complete new order against the table with one
+#     SELECT and writes only the positions that changed, in one
+#     `UPDATE ... SET position = CASE id WHEN ... END` per MAX_CASE_ROWS rows.
+#   * move(id, index) moves one material and shifts the rows between its old
+#     and new index by one, in a single UPDATE over just that range.
+#
+# Neither commits; the caller does, so a failed request changes nothing.
+# Page order. Ties (legacy rows all at position 0) are broken the same way
+# every time; materials_listing.py lists the page with it too.
+PAGE_ORDER = (Material.position, Material.date_created, Material.id)
+
+def current_order():
+    """[(id, position)] of every material, in page order."""
+    query = select(Material.id, Material.position).order_by(*PAGE_ORDER)
+    return db.session.execute(query).all()
+
+def reorder(ids):
+    """Gives every material the position of its id in `ids`. Returns how many rows changed."""
+    if not isinstance(ids, list) or not all(isinstance(item_id, str) for item_id in ids):
+        raise OrderError("'order' must be a list of material ids")
+    if len(set(ids)) != len(ids):
+        raise OrderError("'order' lists a material more than once")
+    current = dict(current_order())
+    if set(ids) != set(current):
+        # Someone added or deleted a material since the page was loaded
+        raise OrderError("The materials changed since this page was loaded; reload it and try again.", status=409)
+    changes = {item_id: index for index, item_id in enumerate(ids) if current[item_id] != index}
+    _set_positions(changes)
+    return len(changes)
+
+def move(item_id, index):
+    """Moves one material to `index` (0 = first). Returns how many rows changed."""
+    if not isinstance(item_id, str) or not isinstance(index, int) or isinstance(index, bool):
+        raise OrderError("'move' needs a material 'id' and a numeric 'index'")
+    if not _is_dense():
+        normalize()
+    old = db.session.execute(select(Material.position).where(Material.id == item_id)).scalar()
+    if old is None:
+        raise OrderError("Material not found.", status=404)
+    count = db.session.execute(select(func.count()).select_from(Material)).scalar()
+    if not 0 <= index < count:
+        raise OrderError(f"'index' must be between 0 and {count - 1}")
+    if index == old:
+        return 0
+
+    # Moving down shifts the rows in between up one place, and vice versa
+    shift = -1 if index > old else 1
+    result = db.session.execute(
+        update(Material)
+        .where(Material.position.between(min(old, index), max(old, index)))
+        .values(position=case((Material.id == item_id, index), else_=Material.position + shift))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def normalize():
+    """Renumbers positions 0..n-1 in the current order (after deletes or legacy duplicates)."""
+    order = current_order()
+    _set_positions({item_id: index for index, (item_id, position) in enumerate(order) if position != index})
+
+def close_gap(position):
+    """Shifts the materials after a deleted one up by one place, keeping positions dense."""
+    db.session.execute(
+        update(Material)
+        .where(Material.position > position)
+        .values(position=Material.position - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def next_position():
+    """Position of a material added at the end of the list."""
+    last = db.session.execute(select(func.max(Material.position))).scalar()
+    return 0 if last is None else last + 1
+
+# --- Internals ---
+def _is_dense():
+    count, distinct, lowest, highest = db.session.execute(select(
+        func.count(), func.count(func.distinct(Material.position)),
+        func.min(Material.position), func.max(Material.position)
+    )).one()
+    return count == 0 or (count == distinct and lowest == 0 and highest == count - 1)
+
+def _set_positions(changes):
+    items = list(changes.items())
+    for start in range(0, len(items), MAX_CASE_ROWS):
+        chunk = dict(items[start:start + MAX_CASE_ROWS])
+        db.session.execute(
+            update(Material)
+            .where(Material.id.in_(chunk))
+            .values(position=case(chunk, value=Material.id))
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,106 @@
+import logging
+import threading
+from collections import namedtuple
+from sqlalchemy import inspect, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError, SQLAlchemyError
+from models import db, Material, CacheGeneration
+import material_order
+
+logger = logging.getLogger(__name__)
+
+# Name of the materials counter in the cache_generation table
+GENERATION_NAME = 'materials'
+
+# What the templates read from a material (same attribute names as the model)
+MaterialRow = namedtuple('MaterialRow', ['id', 'title', 'description', 'pdf_path', 'position'])
+
+# --- Materials Listing ---
+# Every worker keeps the materials list as a tuple of plain MaterialRows. A
+# request costs one query, the materials generation number; the list is only
+# loaded again when another request (in any worker) has bumped it with
+# bump(), which every route that changes a material calls after its commit.
+#
+# The repo doesn't version a migrations/ folder, so init_app() creates the
+# cache_generation table and the index on material.position when they are
+# missing (existing databases get them without a `flask db upgrade`).
+class MaterialsListing:
+    def __init__(self):
+        self._generation = None
+        self._rows = ()
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def init_app(self, app):
+        with app.app_context():
+            try:
+                self._ensure_schema()
+            except SQLAlchemyError as e:
+                logger.warning("Could not create the materials cache schema: %s", e)
+
+    def get(self):
+        """The materials in page order, as a tuple of MaterialRows."""
+        try:
+            generation = self._current_generation()
+        except (OperationalError, ProgrammingError):
+            # The cache_generation table doesn't exist until `flask db upgrade` runs
+            db.session.rollback()
+            if not self._warned:
+                logger.warning("cache_generation table missing; materials are loaded on every request")
+                self._warned = True
+            return self._load()
+
+        if generation == self._generation:
+            return self._rows
+        rows = self._load()
+        with self._lock:
+            self._generation, self._rows = generation, rows
+        return rows
+
+    def generation(self):
+        """The materials generation number (None if it can't be read), e.g. for cache versions."""
+        try:
+            return self._current_generation()
+        except (OperationalError, ProgrammingError):
+            db.session.rollback()
+            return None
+
+    def bump(self):
+        """Marks every worker's copy as outdated. Commits."""
+        try:
+            result = db.session.execute(
+                update(CacheGeneration)
+                .where(CacheGeneration.name == GENERATION_NAME)
+                .values(value=CacheGeneration.value + 1)
+            )
+            if result.rowcount == 0:
+                db.session.add(CacheGeneration(name=GENERATION_NAME, value=1))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created the row at the same moment; bump that one
+            db.session.rollback()
+            self.bump()
+        except (OperationalError, ProgrammingError) as e:
+            # No cache_generation table: get() isn't caching either, so nothing is stale
+            db.session.rollback()
+            logger.warning("Could not bump the materials generation: %s", e)
+
+    # --- Internals ---
+    def _ensure_schema(self):
+        tables = inspect(db.engine).get_table_names()
+        if 'material' not in tables:
+            return # A new database: `flask db upgrade` creates everything
+        CacheGeneration.__table__.create(db.engine, checkfirst=True)
+        for index in Material.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    def _current_generation(self):
+        value = db.session.execute(
+            select(CacheGeneration.value).where(CacheGeneration.name == GENERATION_NAME)
+        ).scalar()
+        return value or 0
+
+    def _load(self):
+        # Same order as material_order.current_order(), which drag indexes refer to
+        query = select(Material.id, Material.title, Material.description, Material.pdf_path, Material.position) \
+            .order_by(*material_order.PAGE_ORDER)
+        return tuple(MaterialRow(*row) for row in db.session.execute(query))
@@ -0,0 +1,118 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from image_variants import is_supported as has_image_variants
+from pdf_pages import THUMBNAIL_SUFFIX, parse_pdfinfo
+
+# Extensions that get a preview or poster frame
+PDF_EXTENSIONS = {'pdf'}
+VIDEO_EXTENSIONS = {'webm', 'mp4', 'mov'}
+
+# External tools get this long (in seconds) per file
+TOOL_TIMEOUT = 120
+
+def _extension(static_path):
+    return static_path.rsplit('.', 1)[-1].lower() if '.' in static_path else ''
+
+def _run_tool(args):
+    """Runs poppler/ffmpeg and returns its output, raising RuntimeError with it on failure."""
+    result = subprocess.run(args, capture_output=True, timeout=TOOL_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip()[-500:] or f"{args[0]} failed")
+    return result.stdout.decode('utf-8', 'replace')
+
+# --- Post-Upload Jobs ---
+# Handlers for the background job queue. Each receives the uploaded file's path
+# inside static/ (e.g. 'uploads/news/x/talk.mp4') and returns a JSON result
+# that the media library shows once the job is done.
+def register_media_jobs(job_queue, image_variants, pdf_pages, on_images_changed=None, on_pdfs_changed=None):
+    static_file = image_variants.static_file
+
+    @job_queue.handler('image_variants')
+    def make_image_variants(path):
+        """Resized WebP/AVIF copies and placeholder (see image_variants.py)."""
+        entry = image_variants.generate(path)
+        if entry is None:
+            return {'skipped': 'not a resizable image'}
+        if on_images_changed:
+            on_images_changed() # Pages cached before the variants existed lack srcset
+        return {'widths': [width for width, _ in entry['srcset']['webp']], 'formats': list(entry['srcset'])}
+
+    @job_queue.handler('pdf_preview')
+    def make_pdf_preview(path):
+        """Page count and sizes, a JPEG of the first page and, with PDF_PAGE_PREVIEWS,
+        of the others (see pdf_pages.py), using poppler's pdfinfo and pdftoppm when installed."""
+        if not shutil.which('pdftoppm') or not shutil.which('pdfinfo'):
+            return {'skipped': 'pdftoppm/pdfinfo (poppler-utils) are not installed'}
+        source = static_file(path)
+        # Sizes of the first pages only; -l past the last page is clamped by pdfinfo
+        count, sizes = parse_pdfinfo(_run_tool(['pdfinfo', '-f', '1', '-l', str(pdf_pages.max_preview_pages), source]))
+
+        preview_path, preview_file = image_variants.derived_file(path, THUMBNAIL_SUFFIX)
+        os.makedirs(os.path.dirname(preview_file), exist_ok=True)
+        # pdftoppm adds the extension itself
+        _run_tool(['pdftoppm', '-f', '1', '-l', '1', '-singlefile', '-jpeg', '-scale-to', '640',
+                   source, preview_file[:-len('.jpg')]])
+
+        previews = []
+        if pdf_pages.previews and count:
+            last = min(count, pdf_pages.max_preview_pages)
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(preview_file)) as tmp_dir:
+                # One run for all pages; pdftoppm names them 'page-01.jpg', 'page-02.jpg', ...
+                _run_tool(['pdftoppm', '-f', '1', '-l', str(last), '-jpeg', '-scale-to-x', str(pdf_pages.preview_width),
+                           '-scale-to-y', '-1', source, os.path.join(tmp_dir, 'page')])
+                rendered = {int(name[len('page-'):-len('.jpg')]): name for name in os.listdir(tmp_dir)}
+                for number in range(1, last + 1):
+                    if number not in rendered:
+                        break
+                    page_path, page_file = pdf_pages.page_file(path, number)
+                    os.replace(os.path.join(tmp_dir, rendered[number]), page_file)
+                    previews.append(page_path)
+
+        # Page images from an earlier run that rendered more pages
+        pdf_pages.remove_pages(path, len(previews) + 1)
+        pdf_pages.save(path, {'pages': count, 'sizes': sizes, 'thumbnail': preview_path, 'previews': previews})
+        if on_pdfs_changed:
+            on_pdfs_changed() # The materials page shows the thumbnail and page count
+        return {'preview': preview_path, 'pages': count, 'page_previews': len(previews)}
+
+    @job_queue.handler('video_poster')
+    def make_video_poster(path):
+        """JPEG frame from the start of a video, using ffmpeg when installed."""
+        if not shutil.which('ffmpeg'):
+            return {'skipped': 'ffmpeg is not installed'}
+        poster_path, poster_file = image_variants.derived_file(path, 'poster.jpg')
+        os.makedirs(os.path.dirname(poster_file), exist_ok=True)
+        # One second in skips black intro frames; very short clips fall back to the first frame
+        for seek in ('1', '0'):
+            _run_tool(['ffmpeg', '-y', '-loglevel', 'error', '-ss', seek, '-i', static_file(path),
+                       '-frames:v', '1', '-vf', 'scale=min(1280\\,iw):-2', poster_file])
+            if os.path.exists(poster_file):
+                return {'poster': poster_path}
+        raise RuntimeError("ffmpeg produced no frame")
+
+    @job_queue.handler('checksum')
+    def compute_checksum(path):
+        """SHA-256 of the uploaded file, read in chunks to keep memory flat."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(static_file(path), 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        return {'sha256': digest.hexdigest(), 'size': size}
+
+def jobs_for_upload(static_path):
+    """Returns the job kinds to run after a file is uploaded."""
+    kinds = []
+    extension = _extension(static_path)
+    if has_image_variants(static_path):
+        kinds.append('image_variants')
+    elif extension in PDF_EXTENSIONS:
+        kinds.append('pdf_preview')
+    elif extension in VIDEO_EXTENSIONS:
+        kinds.append('video_poster')
+    kinds.append('checksum')
+    return kinds
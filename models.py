@@ -1,6 +1,8 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from flask_bcrypt import Bcrypt
+from password_hashing import hashing_metrics, hash_rounds
 import uuid
 from datetime import datetime
 
@@ -17,7 +19,8 @@ class User(db.Model, UserMixin):
     # --- Columns ---
     # Primary key, using UUID4 for globally unique IDs.
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    # User's email address, must be unique. Used for login.
+    # User's email address, must be unique. Used for login and to find post authors
+    # (the UNIQUE constraint is backed by an index, so both lookups are indexed).
     email = db.Column(db.String(128), unique=True, nullable=False)
     # User's display name (optional).
     name = db.Column(db.String(100), nullable=True)
@@ -33,15 +36,27 @@ class User(db.Model, UserMixin):
     # Hashes the provided password automatically.
     def __init__(self, email: str, password: str, name: str):
         self.email = email
-        # Store the password hash as a UTF-8 decoded string
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.set_password(password)
         self.name = name
 
     # --- Methods ---
+    # Hashes a new password with the configured work factor (BCRYPT_LOG_ROUNDS).
+    def set_password(self, password: str):
+        rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        with hashing_metrics.timed('hash', rounds):
+            # Store the password hash as a UTF-8 decoded string
+            self.password_hash = bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
     # Checks if a given plain-text password matches the stored hash.
     # Returns True if the password is correct, False otherwise.
     def check_password(self, password: str) -> bool:
-        return bcrypt.check_password_hash(self.password_hash, password)
+        with hashing_metrics.timed('check', hash_rounds(self.password_hash)):
+            return bcrypt.check_password_hash(self.password_hash, password)
+
+    # True when the stored hash was made with a different work factor than the
+    # configured one; the login route then re-hashes the password it just verified.
+    def password_needs_rehash(self) -> bool:
+        return hash_rounds(self.password_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
     
 # --- Material Model ---
 # Represents an item in the "Materials" accordion page
@@ -54,8 +69,8 @@ class Material(db.Model):
     description = db.Column(db.Text, nullable=True)
     pdf_path = db.Column(db.String(255), nullable=False) # Stores path like 'static/uploads/material.pdf'
     
-    # This new column will control the sorting
-    position = db.Column(db.Integer, default=0) 
+    # This new column will control the sorting (indexed: every listing orders by it)
+    position = db.Column(db.Integer, default=0, index=True)
     
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -63,4 +78,14 @@ class Material(db.Model):
         self.title = title
         self.description = description
         self.pdf_path = pdf_path
-        self.position = position
\ No newline at end of file
+        self.position = position
+
+# --- Cache Generation Model ---
+# A counter per cached read-model (e.g. 'materials'), bumped whenever its data
+# changes, so each worker can tell with a single query whether its copy is current.
+class CacheGeneration(db.Model):
+    __tablename__ = 'cache_generation'
+
+    # --- Columns ---
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
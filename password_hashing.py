@@ -0,0 +1,66 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+logger = logging.getLogger(__name__)
+
+def hash_rounds(pw_hash):
+    """The work factor a bcrypt hash was made with ('$2b$12$...' -> 12), or None."""
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+# --- Hashing Metrics ---
+# bcrypt is deliberately slow, and every hash or verification holds a sync
+# worker for its whole duration. This records how long they take:
+#   * per worker, as a count, total and maximum per operation ('hash', 'check'),
+#     read by the /api/metrics/password-hashing endpoint;
+#   * per request, as a `Server-Timing: bcrypt;dur=...` response header;
+#   * in the log, as a warning for any single one slower than BCRYPT_SLOW_MS.
+class HashingMetrics:
+    def __init__(self):
+        self.slow_ms = 500
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.slow_ms = app.config.get('BCRYPT_SLOW_MS', self.slow_ms)
+
+        @app.after_request
+        def add_hashing_server_timing(response):
+            elapsed = g.get('password_hashing_ms')
+            if elapsed is not None:
+                response.headers.add('Server-Timing', f'bcrypt;dur={elapsed:.1f}')
+            return response
+
+    @contextmanager
+    def timed(self, operation, rounds=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, (time.perf_counter() - start) * 1000, rounds)
+
+    def record(self, operation, elapsed_ms, rounds=None):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        if has_request_context():
+            g.password_hashing_ms = g.get('password_hashing_ms', 0.0) + elapsed_ms
+        if elapsed_ms > self.slow_ms:
+            logger.warning("bcrypt %s took %.0f ms (work factor %s)", operation, elapsed_ms, rounds)
+
+    def snapshot(self):
+        """{operation: {'count', 'total_ms', 'max_ms', 'mean_ms'}} for this worker."""
+        with self._lock:
+            return {
+                operation: dict(stats, mean_ms=stats['total_ms'] / stats['count'])
+                for operation, stats in self._stats.items()
+            }
+
+hashing_metrics = HashingMetrics()
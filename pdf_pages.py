@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import threading
+
+# Written next to the other files derived from an upload (see image_variants.py):
+# 'uploads/_variants/_blobs/ab/ab12....pdf.pages.json'
+PAGES_SUFFIX = 'pages.json'
+# First-page thumbnail, also shown by the media library
+THUMBNAIL_SUFFIX = 'preview.jpg'
+# Rendered page N (only with PDF_PAGE_PREVIEWS)
+PAGE_SUFFIX = 'page-{}.jpg'
+
+# `pdfinfo -f 1 -l N` output: page count and the size of each page, in points
+PDFINFO_PAGES_RE = re.compile(r'^Pages:\s+(\d+)', re.M)
+PDFINFO_SIZE_RE = re.compile(r'^Page\s+(\d+)\s+size:\s+([\d.]+) x ([\d.]+) pts', re.M)
+
+def parse_pdfinfo(output):
+    """Returns (page count, [[width, height] in points of each page pdfinfo sized]).
+
+    pdfinfo is only asked about the first pages (up to PDF_PREVIEW_MAX_PAGES);
+    the viewer assumes every later page has the size of the first.
+    """
+    match = PDFINFO_PAGES_RE.search(output)
+    if not match:
+        raise RuntimeError("pdfinfo printed no page count")
+    sizes = {}
+    for number, width, height in PDFINFO_SIZE_RE.findall(output):
+        sizes[int(number)] = [round(float(width), 1), round(float(height), 1)]
+    count = int(match.group(1))
+    first = sizes.get(1, [612.0, 792.0])
+    return count, [sizes.get(number, first) for number in range(1, min(count, max(sizes, default=1)) + 1)]
+
+# --- PDF Pages ---
+# What the `pdf_preview` job (media_jobs.py) learns about an uploaded PDF:
+#
+#   {"pages": 12, "sizes": [[595.3, 841.9], ...],   (at most PDF_PREVIEW_MAX_PAGES sizes)
+#    "thumbnail": "uploads/_variants/_blobs/ab/ab12....pdf.preview.jpg",
+#    "previews": ["uploads/_variants/_blobs/ab/ab12....pdf.page-1.jpg", ...]}
+#
+# The materials page shows the thumbnail and page count, and the PDF viewer
+# (static/js/pdf-embed.js) reads it from /api/pdf-pages/<path> to lay out
+# every page before any is loaded, then fetches only the pages scrolled into
+# view: as images when previews were rendered, with PDF.js otherwise.
+class PdfPages:
+    def __init__(self):
+        self.image_variants = None
+        self.previews = False
+        self.max_preview_pages = 60
+        self.preview_width = 1024
+        # path -> (sidecar mtime_ns, parsed data), so listing many PDFs costs a stat each
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, image_variants):
+        self.image_variants = image_variants
+        self.previews = app.config.get('PDF_PAGE_PREVIEWS', False)
+        self.max_preview_pages = app.config.get('PDF_PREVIEW_MAX_PAGES', self.max_preview_pages)
+        self.preview_width = app.config.get('PDF_PREVIEW_WIDTH', self.preview_width)
+        # Templates: {{ pdf_pages(item.pdf_path) }}
+        app.jinja_env.globals['pdf_pages'] = self.get
+
+    def get(self, static_path):
+        """Returns what is known about a PDF, or None before its job has run."""
+        if not static_path:
+            return None
+        _, sidecar = self.image_variants.derived_file(static_path, PAGES_SUFFIX)
+        try:
+            mtime = os.stat(sidecar).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._cache.get(static_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(sidecar, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._cache[static_path] = (mtime, data)
+        return data
+
+    def save(self, static_path, data):
+        _, sidecar = self.image_variants.derived_file(static_path, PAGES_SUFFIX)
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        with open(sidecar + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(sidecar + '.tmp', sidecar)
+
+    def page_file(self, static_path, number):
+        """(path inside static/, filesystem path) of the preview of page `number`."""
+        return self.image_variants.derived_file(static_path, PAGE_SUFFIX.format(number))
+
+    def remove_pages(self, static_path, first=1):
+        """Deletes the page previews from page `first` on, including any left by
+        an earlier run with a higher PDF_PREVIEW_MAX_PAGES (they are numbered
+        without gaps, so the first missing one is the end)."""
+        number = first
+        while True:
+            try:
+                os.remove(self.page_file(static_path, number)[1])
+            except FileNotFoundError:
+                return
+            except OSError:
+                pass
+            number += 1
+
+    def remove(self, static_path):
+        """Deletes the page previews and the sidecar (the thumbnail goes with image_variants.remove())."""
+        self.remove_pages(static_path)
+        try:
+            os.remove(self.image_variants.derived_file(static_path, PAGES_SUFFIX)[1])
+        except OSError:
+            pass
+        with self._lock:
+            self._cache.pop(static_path, None)
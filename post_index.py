@@ -0,0 +1,182 @@
+import os
+import bisect
+import hashlib
+import threading
+from datetime import datetime, date, timezone
+
+# --- Section Definitions ---
+# Every bucket the public routes read from. Each one is kept sorted by
+# normalized date (newest first), so a route only slices what it needs.
+SECTIONS = (
+    'news',                     # All published news (awards + others)
+    'news/awards',              # Published award posts
+    'news/others',              # Published general news posts
+    'months-problems',          # All published Problems of the Month
+    'months-problems/open',     # Published problems not yet solved
+    'months-problems/solved',   # Published problems marked as solved
+    'drafts',                   # Every post with status 'draft'
+)
+
+# --- Helper Function for Sorting by Date ---
+def sortable_date(page):
+    """Safely gets the date from post metadata, converting if necessary."""
+    date_val = page.meta.get('date')
+    if isinstance(date_val, date): # Handles both date and datetime objects
+        # If it's datetime, convert to date; otherwise, it's already a date
+        return date_val.date() if isinstance(date_val, datetime) else date_val
+    if isinstance(date_val, str):
+        try:
+            # Try parsing the standard YYYY-MM-DD format
+            return datetime.strptime(date_val, '%Y-%m-%d').date()
+        except ValueError:
+            # If parsing fails, return a minimum date for consistent sorting
+            pass
+    return date.min # Fallback for missing or unparseable dates
+
+def _sort_key(page):
+    # The path breaks ties so posts from the same day keep a stable order
+    return (sortable_date(page), page.path)
+
+# --- Cursors ---
+# A cursor points just past a post in a newest-first listing: 'YYYY-MM-DD:path'.
+# A bare 'YYYY-MM-DD' also works and means "everything older than that day".
+def make_cursor(page):
+    sort_date, path = _sort_key(page)
+    return f"{sort_date.isoformat()}:{path}"
+
+def parse_cursor(cursor):
+    """Turns a cursor string back into a sort key. Raises ValueError if malformed."""
+    date_text, _, path = cursor.partition(':')
+    return (date.fromisoformat(date_text), path)
+
+# --- Post Index ---
+# Groups FlatPages posts into pre-sorted buckets, built once per content change
+# instead of filtering and sorting every page on every request.
+class PostIndex:
+    def __init__(self, pages):
+        self.pages = pages
+        # Bumped every time the buckets are rebuilt
+        self.generation = 0
+        # Digest of the indexed front-matter. Unlike `generation`, it is the same
+        # on every worker for the same content, so it can be used in ETags.
+        self._version = None
+        # Newest modification time among the indexed post files
+        self._last_modified = None
+        # ContentStore generation the current buckets were built from
+        self._pages_generation = None
+        # name -> (posts newest first, their sort keys oldest first)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    # --- Public API ---
+    def section(self, name):
+        """Returns the sorted posts of a bucket (newest first) as a tuple."""
+        self._ensure_fresh()
+        return self._buckets[name][0]
+
+    def first(self, name):
+        """Returns the newest post of a bucket, or None if it is empty."""
+        posts = self.section(name)
+        return posts[0] if posts else None
+
+    def page(self, name, number, per_page):
+        """Returns (posts, page_count) for a 1-based page of a bucket.
+
+        An empty bucket still has one (empty) page.
+        """
+        posts = self.section(name)
+        page_count = max(1, -(-len(posts) // per_page))
+        start = (number - 1) * per_page
+        return posts[start:start + per_page], page_count
+
+    def older_than(self, name, cursor_key, limit):
+        """Returns up to `limit` posts of a bucket that are older than the cursor (newest first)."""
+        self._ensure_fresh()
+        posts, keys = self._buckets[name]
+        # Number of posts older than the cursor; they are the tail of the newest-first tuple
+        older = bisect.bisect_left(keys, cursor_key)
+        start = len(posts) - older
+        return posts[start:start + limit]
+
+    @property
+    def version(self):
+        self._ensure_fresh()
+        return self._version
+
+    @property
+    def last_modified(self):
+        self._ensure_fresh()
+        return self._last_modified
+
+    def invalidate(self):
+        """Forgets the buckets so they are rebuilt on next access."""
+        with self._lock:
+            self._pages_generation = None
+
+    # --- Internals ---
+    def _is_stale(self):
+        """Checks if the ContentStore has changed since the buckets were built."""
+        generation = self._pages_generation
+        return generation is None or generation != self.pages.generation
+
+    def _ensure_fresh(self):
+        if not self._is_stale():
+            return
+        with self._lock:
+            if self._is_stale():
+                self._rebuild()
+
+    def _rebuild(self):
+        # Read first: a change made while walking makes the next access rebuild again
+        pages_generation = self.pages.generation
+        seen = {}
+        buckets = {name: [] for name in SECTIONS}
+
+        for page in self.pages:
+            seen[page.path] = page
+            status = page.meta.get('status')
+
+            if status == 'draft':
+                buckets['drafts'].append(page)
+                continue
+            if status != 'published':
+                continue
+
+            if page.path.startswith('news/'):
+                buckets['news'].append(page)
+                if page.path.startswith('news/awards/'):
+                    buckets['news/awards'].append(page)
+                elif page.path.startswith('news/others/'):
+                    buckets['news/others'].append(page)
+            elif page.path.startswith('months-problems/'):
+                buckets['months-problems'].append(page)
+                if page.meta.get('is_solved'):
+                    buckets['months-problems/solved'].append(page)
+                else:
+                    buckets['months-problems/open'].append(page)
+
+        # Sort each bucket once, newest first, and freeze it. The keys are kept
+        # oldest first alongside, so cursors can be found with a binary search.
+        sorted_buckets = {}
+        for name, posts in buckets.items():
+            posts = tuple(sorted(posts, key=_sort_key, reverse=True))
+            sorted_buckets[name] = (posts, [_sort_key(page) for page in reversed(posts)])
+        self._buckets = sorted_buckets
+        self._version, self._last_modified = self._fingerprint(seen)
+        self._pages_generation = pages_generation
+        self.generation += 1
+
+    def _fingerprint(self, seen):
+        """Returns (digest of all paths and front-matter, newest file mtime)."""
+        digest = hashlib.sha1()
+        newest = None
+        extension = self.pages.config('extension')
+        for path in sorted(seen):
+            digest.update(repr((path, seen[path].meta)).encode('utf-8'))
+            try:
+                mtime = os.path.getmtime(os.path.join(self.pages.root, path + extension))
+            except OSError:
+                continue
+            newest = mtime if newest is None else max(newest, mtime)
+        last_modified = datetime.fromtimestamp(newest, timezone.utc) if newest is not None else None
+        return digest.hexdigest(), last_modified
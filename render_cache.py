@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, date, timezone
+from sanitizer import RULES_VERSION, sanitize, markdown_to_safe_html
+
+logger = logging.getLogger(__name__)
+
+# The sanitized HTML pieces of a single post
+RenderedPost = namedtuple('RenderedPost', ['body_html', 'solution_html'])
+
+# --- Rendering ---
+def render_post(post):
+    """Sanitizes a post's body and, for solved problems, renders its solution."""
+    # Sanitize the HTML rendered from Markdown to prevent XSS attacks
+    # (post.html is generated by Flask-FlatPages' Markdown processor)
+    body_html = sanitize(post.html, 'post')
+
+    solution_html = "" # Initialize as empty string
+    if post.path.startswith('months-problems/') and post.meta.get('is_solved'):
+        # Get the raw solution markdown from metadata
+        raw_solution = post.meta.get('solution_content', '')
+        if raw_solution:
+            # Convert the solution markdown to HTML and sanitize it using the *exact same* rules
+            solution_html = markdown_to_safe_html(raw_solution, 'solution')
+
+    return RenderedPost(body_html, solution_html)
+
+# --- Front-Matter Serialization ---
+# YAML front-matter may contain dates, which JSON can't represent natively.
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"Unsupported front-matter value: {value!r}")
+
+def _decode_value(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+def dump_meta(meta):
+    return json.dumps(meta, default=_encode_value)
+
+def load_meta(text):
+    return json.loads(text, object_hook=_decode_value)
+
+# --- Disk Render Store ---
+# SQLite file shared by every Gunicorn worker. Holds the parsed front-matter and
+# sanitized HTML of each post, so a fresh worker starts with warm content.
+class RenderStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # One connection per process and thread (workers are forked after import)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL') # Readers never block the writer
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rendered_post ('
+            ' path TEXT PRIMARY KEY,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' rules TEXT NOT NULL,'
+            ' meta TEXT,'
+            ' body_html TEXT NOT NULL,'
+            ' solution_html TEXT NOT NULL)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def load(self, path, stamp):
+        """Returns (meta, RenderedPost) stored for this exact file version, or None."""
+        row = self._connect().execute(
+            'SELECT meta, body_html, solution_html FROM rendered_post'
+            ' WHERE path = ? AND mtime_ns = ? AND size = ? AND rules = ?',
+            (path, stamp[0], stamp[1], RULES_VERSION)
+        ).fetchone()
+        if row is None:
+            return None
+        meta = load_meta(row[0]) if row[0] is not None else None
+        return meta, RenderedPost(row[1], row[2])
+
+    def load_all_meta(self):
+        """Returns {path: (stamp, meta)} for every stored post with front-matter."""
+        rows = self._connect().execute(
+            'SELECT path, mtime_ns, size, meta FROM rendered_post'
+            ' WHERE rules = ? AND meta IS NOT NULL', (RULES_VERSION,)
+        )
+        return {path: ((mtime_ns, size), load_meta(meta)) for path, mtime_ns, size, meta in rows}
+
+    def save(self, path, stamp, meta, rendered):
+        """Writes a post's entry atomically, replacing any older version."""
+        try:
+            meta_text = dump_meta(meta)
+        except (TypeError, ValueError):
+            meta_text = None # Front-matter we can't serialize is simply re-parsed
+        conn = self._connect()
+        with conn: # Commits (or rolls back) as a single transaction
+            conn.execute(
+                'INSERT OR REPLACE INTO rendered_post'
+                ' (path, mtime_ns, size, rules, meta, body_html, solution_html)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (path, stamp[0], stamp[1], RULES_VERSION, meta_text,
+                 rendered.body_html, rendered.solution_html)
+            )
+
+    def delete(self, path):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM rendered_post WHERE path = ?', (path,))
+
+# --- Render Cache ---
+# Per-worker LRU cache of sanitized post HTML, backed by the shared RenderStore.
+# Each entry is tied to the version of the Markdown file it was rendered from
+# (the Page's file_stamp, see content_store.py), so an edited file is never
+# served stale, and a Page read before an edit never poisons the new version.
+class RenderCache:
+    def __init__(self, pages, max_bytes=32 * 1024 * 1024):
+        self.pages = pages
+        # Memory budget for all cached HTML, in bytes
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # Shared on-disk level (set up in init_app)
+        self.store = None
+        # path -> (file stamp, RenderedPost, size in bytes), oldest first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('RENDER_CACHE_MAX_BYTES', self.max_bytes)
+        db_path = app.config.get('RENDER_CACHE_PATH') or os.path.join(app.instance_path, 'render_cache.sqlite3')
+        self.store = RenderStore(db_path)
+
+    # --- Public API ---
+    def get(self, post):
+        """Returns the RenderedPost for a FlatPages post, rendering it on a miss."""
+        stamp = self._page_stamp(post)
+        with self._lock:
+            entry = self._entries.get(post.path)
+            if entry and entry[0] == stamp:
+                self._entries.move_to_end(post.path) # Mark as recently used
+                return entry[1]
+
+        # Second level: another worker (or a previous run) may have rendered it
+        stored = self._load(post.path, stamp)
+        if stored:
+            meta, rendered = stored
+            self._prime_meta(post, meta)
+            self._remember(post.path, stamp, rendered)
+            return rendered
+
+        rendered = render_post(post)
+        self._remember(post.path, stamp, rendered)
+        self._save(post, stamp, rendered)
+        return rendered
+
+    def file_version(self, path):
+        """Returns (content hash, last modified datetime) of the version of a post being served."""
+        page = self.pages.get(path)
+        stamp = self._page_stamp(page) if page is not None else None
+        if stamp is None:
+            return None, None
+        return page.content_hash, datetime.fromtimestamp(stamp[0] / 1e9, timezone.utc)
+
+    def refresh(self, path, rendered=None):
+        """Renders a just-saved post and writes it to disk, so every worker finds it warm.
+
+        `rendered` is the RenderedPost already produced while saving, if any.
+        """
+        self.invalidate(path)
+        post = self.pages.get(path)
+        if post is None:
+            return
+        if rendered is None:
+            self.get(post)
+        else:
+            stamp = self._page_stamp(post)
+            self._remember(path, stamp, rendered)
+            self._save(post, stamp, rendered)
+
+    def invalidate(self, path):
+        """Drops the cached HTML of a single post, in memory and on disk."""
+        with self._lock:
+            self._drop(path)
+        if self.store:
+            try:
+                self.store.delete(path)
+            except sqlite3.Error as e:
+                logger.warning("Render store delete failed for %s: %s", path, e)
+
+    def clear(self):
+        """Drops every in-memory entry."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def warm(self):
+        """Fills in parsed front-matter for all pages from disk, once per worker."""
+        if self._warmed or not self.store:
+            return
+        self._warmed = True
+        try:
+            stored = self.store.load_all_meta()
+        except sqlite3.Error as e:
+            logger.warning("Render store warm-up failed: %s", e)
+            return
+        for page in self.pages:
+            entry = stored.get(page.path)
+            if entry and entry[0] == self._page_stamp(page):
+                self._prime_meta(page, entry[1])
+
+    # --- Internals ---
+    @staticmethod
+    def _page_stamp(page):
+        """Identifies the file version a Page was read from (None: don't cache it)."""
+        return getattr(page, 'file_stamp', None)
+
+    @staticmethod
+    def _prime_meta(page, meta):
+        # Page.meta is a cached property; seeding it skips the YAML parse
+        if meta is not None and 'meta' not in page.__dict__:
+            page.__dict__['meta'] = meta
+
+    def _load(self, path, stamp):
+        if stamp is None or not self.store:
+            return None
+        try:
+            return self.store.load(path, stamp)
+        except sqlite3.Error as e:
+            logger.warning("Render store read failed for %s: %s", path, e)
+            return None
+
+    def _save(self, post, stamp, rendered):
+        if stamp is None or not self.store:
+            return
+        try:
+            self.store.save(post.path, stamp, post.meta, rendered)
+        except sqlite3.Error as e:
+            logger.warning("Render store write failed for %s: %s", post.path, e)
+
+    def _remember(self, path, stamp, rendered):
+        size = sys.getsizeof(rendered.body_html) + sys.getsizeof(rendered.solution_html)
+        if stamp is None or size > self.max_bytes:
+            return # Don't cache missing files or entries bigger than the whole budget
+
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = (stamp, rendered, size)
+            self.current_bytes += size
+            # Evict the least recently used entries until we are within budget
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, old_size) = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+
+    def _drop(self, path):
+        entry = self._entries.pop(path, None)
+        if entry:
+            self.current_bytes -= entry[2]
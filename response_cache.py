@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+from flask import request, session, make_response
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+# A rendered response plus the versions it was rendered from
+CachedResponse = namedtuple('CachedResponse', ['stamp', 'status', 'headers', 'body'])
+
+# --- Backends ---
+# Both backends expose get(key), set(key, entry), delete_url(url) and clear().
+# A key is the request's host followed by its URL ('nemo.example.org/news'),
+# and delete_url() drops that URL on every host.
+
+def key_url(key):
+    slash = key.find('/')
+    return key[slash:] if slash >= 0 else key
+
+class MemoryBackend:
+    """In-process LRU store (the default). Each worker keeps its own copy."""
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key) # Mark as recently used
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # Evict the least recently used
+
+    def delete_url(self, url):
+        with self._lock:
+            for key in [key for key in self._entries if key_url(key) == url]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteBackend:
+    """Local SQLite file shared by every Gunicorn worker."""
+    def __init__(self, db_path, max_entries=512):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        # One connection per process and thread (workers are forked after import)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL') # Readers never block the writer
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cached_response ('
+            ' key TEXT PRIMARY KEY,'
+            ' stamp TEXT NOT NULL,'
+            ' status INTEGER NOT NULL,'
+            ' headers TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' used_at REAL NOT NULL)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT stamp, status, headers, body FROM cached_response WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        stamp = tuple(json.loads(row[0]))
+        headers = [tuple(header) for header in json.loads(row[2])]
+        return CachedResponse(stamp, row[1], headers, row[3])
+
+    def set(self, key, entry):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cached_response (key, stamp, status, headers, body, used_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (key, json.dumps(entry.stamp), entry.status, json.dumps(entry.headers), entry.body, time.time())
+            )
+            # Keep only the most recently stored entries
+            conn.execute(
+                'DELETE FROM cached_response WHERE key NOT IN'
+                ' (SELECT key FROM cached_response ORDER BY used_at DESC LIMIT ?)', (self.max_entries,)
+            )
+
+    def delete_url(self, url):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM cached_response WHERE substr(key, instr(key, \'/\')) = ?', (url,))
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM cached_response')
+
+# --- Response Cache ---
+# Full-page cache for anonymous visitors. Entries are keyed by host and URL
+# (pages hold absolute links built from the host they were asked for) and
+# checked against two versions before being served:
+#   * the content version given by the route (e.g. the post file's hash), which
+#     already changes on every worker when a post is edited, and
+#   * the generation of the entry's group ('posts', 'materials'), a shared file
+#     whose mtime is bumped by the invalidation hooks in every worker's view.
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        self.generation_dir = None
+
+    def init_app(self, app):
+        backend = (app.config.get('RESPONSE_CACHE_BACKEND') or 'memory').lower()
+        max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 512)
+        cache_dir = os.path.join(app.instance_path, 'response_cache')
+
+        if backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        elif backend == 'sqlite':
+            db_path = app.config.get('RESPONSE_CACHE_PATH') or os.path.join(cache_dir, 'responses.sqlite3')
+            self.backend = SQLiteBackend(db_path, max_entries)
+        elif backend == 'off':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend!r}")
+
+        self.generation_dir = cache_dir
+
+    # --- Decorator ---
+    def cached(self, group, version=lambda **kwargs: None):
+        """Caches a view's response for anonymous visitors.
+
+        `version` receives the view's arguments and returns a value that
+        changes whenever the page's content does.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                if not self._is_cacheable_request():
+                    return view(**kwargs)
+
+                key = request.host + (request.full_path if request.query_string else request.path)
+                stamp = (self._generation(group), version(**kwargs))
+                entry = self._get(key)
+                if entry is not None and entry.stamp == stamp:
+                    response = make_response(entry.body, entry.status, entry.headers)
+                    # Still honor ETag / Last-Modified, answering 304 when possible
+                    return response.make_conditional(request)
+
+                response = make_response(view(**kwargs))
+                # Only plain 200 pages that didn't touch the session are shared
+                if response.status_code == 200 and not response.direct_passthrough and not session.modified:
+                    headers = [(name, value) for name, value in response.headers.items() if name.lower() != 'set-cookie']
+                    self._set(key, CachedResponse(stamp, response.status_code, headers, response.get_data()))
+                return response
+            return wrapper
+        return decorator
+
+    # --- Invalidation Hooks ---
+    def invalidate(self, urls=(), group=None):
+        """Drops the given URLs (on every host) and, if a group is given, every page of that group in all workers."""
+        if self.backend is None:
+            return
+        for url in urls:
+            self._delete_url(url)
+        if group:
+            self._bump_generation(group)
+
+    def clear(self):
+        """Drops every cached page in this worker (and in the SQLite file, if used)."""
+        if self.backend is not None:
+            self.backend.clear()
+
+    # --- Internals ---
+    def _is_cacheable_request(self):
+        return (self.backend is not None
+                and request.method == 'GET'
+                and not current_user.is_authenticated # Logged-in users see admin links
+                and '_flashes' not in session)         # Pending messages are shown once
+
+    def _generation_file(self, group):
+        return os.path.join(self.generation_dir, f'{group}.generation')
+
+    def _generation(self, group):
+        try:
+            return os.stat(self._generation_file(group)).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _bump_generation(self, group):
+        filepath = self._generation_file(group)
+        try:
+            os.makedirs(self.generation_dir, exist_ok=True)
+            # Always move forward, even if two bumps happen within the same clock tick
+            new_mtime = max(time.time_ns(), self._generation(group) + 1)
+            with open(filepath, 'a'):
+                pass
+            os.utime(filepath, ns=(new_mtime, new_mtime))
+        except OSError as e:
+            logger.warning("Could not bump response cache generation for %s: %s", group, e)
+            self.clear() # At least this worker won't serve stale pages
+
+    # Backend errors (e.g. a locked SQLite file) never break a page view
+    def _get(self, key):
+        try:
+            return self.backend.get(key)
+        except sqlite3.Error as e:
+            logger.warning("Response cache read failed: %s", e)
+            return None
+
+    def _set(self, key, entry):
+        try:
+            self.backend.set(key, entry)
+        except sqlite3.Error as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def _delete_url(self, url):
+        try:
+            self.backend.delete_url(url)
+        except sqlite3.Error as e:
+            logger.warning("Response cache delete failed: %s", e)
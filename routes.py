@@ -1,57 +1,299 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash, abort, send_from_directory
+from flask import render_template, request, jsonify, redirect, url_for, flash, abort, send_from_directory, make_response, has_request_context
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 import os
-from datetime import datetime, date # Import date as well
-import yaml
-import re
+import sqlite3
+from datetime import datetime, date, timezone # Import date as well
 import slugify
-import bleach # Used for sanitizing HTML output
-import markdown
-from models import db, bcrypt, User, Material
-from flask_flatpages import FlatPages
-from datetime import datetime
-
-# Initialize Flask-FlatPages extension
-pages = FlatPages()
+from models import db, User, Material
+import material_order
+from materials_listing import MaterialsListing
+from content_store import ContentStore, parse_front_matter
+from content_watcher import ContentWatcher, RELOAD_ALL
+from post_index import PostIndex, make_cursor, parse_cursor, sortable_date
+from render_cache import RenderCache, render_post
+from search_index import SearchIndex
+from image_variants import ImageVariants
+from pdf_pages import PdfPages
+from job_queue import JobQueue
+from media_jobs import register_media_jobs, jobs_for_upload
+from chunked_upload import ChunkedUploads, UploadError
+from blob_store import BlobStore, KIND_FILTERS
+from static_files import StaticFiles
+from asset_manifest import AssetManifest
+from asset_bundles import AssetBundles
+from static_export import export_changed, affected_urls
+from response_cache import ResponseCache
+from http_cache import conditional_response, make_etag, template_fingerprint
+from sanitizer import RULES_VERSION
+from login_throttle import LoginThrottle
+from password_hashing import hashing_metrics
+from user_cache import UserCache
+
+# Initialize Flask-FlatPages extension (with single-page updates)
+pages = ContentStore()
+# Pre-sorted buckets of posts, rebuilt only when the content changes
+post_index = PostIndex(pages)
+# Sanitized HTML of viewed posts, shared across requests in this worker
+render_cache = RenderCache(pages)
+# Full-page cache of public pages for anonymous visitors
+response_cache = ResponseCache()
+# Full-text index of the published posts, kept in sync with FlatPages
+search_index = SearchIndex(pages)
+# Resized WebP/AVIF copies of uploaded images, used by templates for srcset
+image_variants = ImageVariants()
+# Page count, thumbnail and page previews of uploaded PDFs, for the materials page and PDF viewer
+pdf_pages = PdfPages()
+# Background jobs for slow post-upload processing
+job_queue = JobQueue()
+# Content-addressed storage of uploads, with the name each was uploaded under
+blob_store = BlobStore()
+# Serves /static/ with precompressed files, long-lived caching and proxy offload
+static_files = StaticFiles()
+# Content-hashed names of the static files, used by url_for('static', ...)
+asset_manifest = AssetManifest()
+# Per-page CSS/JS bundles and inlined critical CSS, used by templates/partials/bundles.html
+asset_bundles = AssetBundles()
+# The materials list, cached per worker until a change bumps its generation
+materials_listing = MaterialsListing()
+# Per-IP and per-account limits on password attempts, checked before bcrypt runs
+login_throttle = LoginThrottle()
+# Logged-in users and post authors, kept per worker so they don't cost a query per request
+user_cache = UserCache()
 
 # Function to register all routes with the Flask app instance
 def register_routes(app):
     # Initialize FlatPages with the app context
     pages.init_app(app)
+    render_cache.init_app(app)
+    response_cache.init_app(app)
+    image_variants.init_app(app)
+    pdf_pages.init_app(app, image_variants)
+    job_queue.init_app(app)
+    blob_store.init_app(app)
+    static_files.init_app(app)
+    asset_manifest.init_app(app)
+    asset_bundles.init_app(app, resolve=asset_manifest.resolve)
+    login_throttle.init_app(app)
+    hashing_metrics.init_app(app)
+    user_cache.init_app(app)
+    materials_listing.init_app(app)
+    # Thumbnails, PDF previews, video posters and checksums
+    register_media_jobs(job_queue, image_variants, pdf_pages,
+                        on_images_changed=lambda: response_cache.invalidate(group='posts'),
+                        on_pdfs_changed=lambda: response_cache.invalidate(['/materials'], group='materials'))
+    # Resumable uploads of large media, assembled under UPLOAD_FOLDER/_partial
+    chunked_uploads = ChunkedUploads(os.path.join(app.root_path, app.config['UPLOAD_FOLDER']),
+                                     max_bytes=app.config.get('CHUNKED_UPLOAD_MAX_BYTES', 1024 ** 3),
+                                     chunk_bytes=app.config.get('CHUNKED_UPLOAD_CHUNK_BYTES', 8 * 1024 ** 2))
+
+    # Seed post front-matter from the shared render cache on a worker's first request
+    @app.before_request
+    def warm_render_cache():
+        render_cache.warm()
+
+    # Start this worker's background job runner (a no-op with JOB_RUNNER='external')
+    @app.before_request
+    def start_job_runner():
+        job_queue.start()
+
+    # --- Upload Processing ---
+    def enqueue_upload_jobs(static_path):
+        """Queues the post-upload processing of a file; returns [{'id', 'kind', 'status_url'}]."""
+        jobs = []
+        for kind in jobs_for_upload(static_path):
+            job_id = job_queue.enqueue(kind, path=static_path)
+            jobs.append({'id': job_id, 'kind': kind, 'status_url': url_for('job_status', job_id=job_id)})
+        return jobs
+
+    def enqueue_material_jobs(pdf_path, created):
+        """Queues the processing of a material's PDF, also when an identical file
+        was stored before its page count and thumbnail were being made."""
+        if created:
+            enqueue_upload_jobs(pdf_path)
+        elif pdf_pages.get(pdf_path) is None:
+            job_queue.enqueue('pdf_preview', path=pdf_path)
+
+    # --- Static Export Helper ---
+    def refresh_static_export(post_paths=(), materials=False):
+        """Re-exports the public pages affected by a change, if STATIC_EXPORT_DIR is set."""
+        out_dir = app.config.get('STATIC_EXPORT_DIR')
+        if not out_dir:
+            return
+        # The content watcher runs outside any request; it exports as export_static.py does
+        base_url = request.host_url if has_request_context() else 'http://localhost'
+        try:
+            export_changed(app, out_dir, post_paths, materials, base_url=base_url)
+        except Exception as e:
+            # The change itself succeeded; the export can be redone with export_static.py
+            app.logger.warning(f"Static export failed: {e}")
+
+    # --- Content Change Hooks ---
+    def post_changed(path, rendered=None):
+        """Updates every cache that depends on a post after it was saved, created or deleted."""
+        # Re-read only the changed file, so the edit is visible immediately
+        # (write_post() has already loaded the new version)
+        if rendered is None:
+            pages.update(path)
+        post_index.invalidate()
+        # Store the new version's HTML and share it with every worker
+        # (or just drop it, if the post is gone)
+        render_cache.refresh(path, rendered)
+        response_cache.invalidate(affected_urls(path))
+        refresh_static_export([path])
+
+    def posts_changed_on_disk(paths):
+        """Applies Markdown files changed outside the editor (runs in the watcher thread)."""
+        if paths is RELOAD_ALL:
+            pages.reload() # Bulk change: re-read the whole tree on next access
+            post_index.invalidate()
+            response_cache.invalidate(group='posts')
+            return
+        # Skip the files this worker saved itself; post_changed() already handled them
+        paths = [path for path in paths if not pages.is_current(path)]
+        if not paths:
+            return
+        for path in paths:
+            pages.update(path)
+            # Drop whatever a request rendered meanwhile, then render the new version
+            # now, so readers don't have to
+            render_cache.refresh(path)
+            response_cache.invalidate(affected_urls(path))
+        post_index.invalidate()
+        refresh_static_export(paths)
+
+    # --- Sanitize-on-Write Pipeline ---
+    def write_post(path, full_content):
+        """Validates, renders and sanitizes a post, then writes it atomically.
+
+        Raises ValueError for invalid front-matter; nothing is written in that case.
+        """
+        page = pages.parse(full_content, path)
+        # Render and sanitize before touching disk, so a failure leaves the old file intact
+        rendered = render_post(page)
+        pages.write(path, full_content, page)
+        post_changed(path, rendered)
+
+    def materials_changed():
+        """Updates every cache that depends on the materials list."""
+        # Bump first, so nothing rendered after the invalidation can still read the old list
+        materials_listing.bump()
+        response_cache.invalidate(['/materials'], group='materials')
+        refresh_static_export(materials=True)
+
+    # --- Content Watcher ---
+    # With FLATPAGES_AUTO_RELOAD off, nothing re-scans the posts folder per request,
+    # so each worker watches it for files changed directly on disk (e.g. a git pull).
+    watcher_mode = app.config.get('CONTENT_WATCHER', 'auto')
+    if watcher_mode != 'off' and not app.config.get('FLATPAGES_AUTO_RELOAD'):
+        content_watcher = ContentWatcher(pages.root, pages.config('extension'),
+                                         on_change=posts_changed_on_disk,
+                                         mode=watcher_mode)
+
+        # Started lazily so it runs inside each forked Gunicorn worker
+        @app.before_request
+        def start_content_watcher():
+            content_watcher.start()
+
+    # --- Conditional GET Helper ---
+    # Anything deployed that changes the HTML of every page (templates, sanitizer rules, static file names)
+    site_fingerprint = make_etag(template_fingerprint(os.path.join(app.root_path, app.template_folder)), RULES_VERSION,
+                                 asset_manifest.version, asset_bundles.version)
+
+    def page_fingerprint():
+        """site_fingerprint plus what changes while running: the image variants behind every srcset."""
+        return make_etag(site_fingerprint, image_variants.version)
+
+    def page_last_modified(last_modified):
+        """The newer of a page's own Last-Modified and the image variants manifest."""
+        variants_mtime = image_variants.version
+        if last_modified is None or not variants_mtime:
+            return last_modified
+        return max(last_modified, datetime.fromtimestamp(variants_mtime / 1e9, timezone.utc))
+
+    def listing_response(render):
+        """Adds ETag/Last-Modified to a post listing page and answers 304 when unchanged."""
+        # Logged-in users get admin links and flash messages, so only anonymous pages are validated
+        if current_user.is_authenticated:
+            return render()
+        # The query string is part of the page (e.g. the API's cursor)
+        etag = make_etag(page_fingerprint(), post_index.version, request.full_path)
+        return conditional_response(etag, page_last_modified(post_index.last_modified), render)
+
+    # --- Pagination Helpers ---
+    def listing_version(**kwargs):
+        """Response cache version of every listing page: changes with any post's front-matter."""
+        return post_index.version
+
+    def paginate(section, page):
+        """Returns (posts, pagination) for one page of a listing; 404 past the last page."""
+        posts, page_count = post_index.page(section, page, app.config.get('POSTS_PER_PAGE', 12))
+        if page < 1 or page > page_count:
+            abort(404)
+        # Used by templates/partials/pagination.html to build the page links
+        pagination = {'endpoint': request.endpoint, 'page': page, 'page_count': page_count}
+        return posts, pagination
 
     # --- Public Routes ---
 
+    # Sections listed by the JSON API
+    API_SECTIONS = ('news', 'news/awards', 'news/others',
+                    'months-problems', 'months-problems/open', 'months-problems/solved')
+
+    def post_summary(post):
+        """The fields a listing needs to show a post, as JSON-ready values."""
+        post_date = sortable_date(post)
+        image = post.meta.get('image')
+        return {
+            'title': post.meta.get('title'),
+            'desc': post.meta.get('desc'),
+            'date': post_date.isoformat() if post_date != date.min else None,
+            'image': url_for('static', filename=image) if image else None,
+            'path': post.path,
+            'url': url_for('view_post', path=post.path)
+        }
+
     ## Home Page
     @app.route('/')
+    @response_cache.cached('posts', version=listing_version)
     def index():
-        # Get all pages marked as 'published'
-        published_pages = [p for p in pages if p.meta.get('status') == 'published']
-        # Sort pages by date, newest first, using current time as fallback
-        sorted_pages = sorted(published_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-        # Get the 6 most recent news posts
-        news_posts = [p for p in sorted_pages if p.path.startswith('news/')][:6]
-        # Get the current "Problem of the Month" (first one found that isn't solved)
-        problem_post = next((p for p in sorted_pages if p.path.startswith('months-problems/') and not p.meta.get('is_solved')), None)
+        # Get the 6 most recent published news posts
+        news_posts = post_index.section('news')[:6]
+        # Get the current "Problem of the Month" (newest one that isn't solved)
+        problem_post = post_index.first('months-problems/open')
         # Render the index template with the fetched posts
-        return render_template('index.html', 
+        return listing_response(lambda: render_template('index.html', 
                                logado=current_user.is_authenticated, 
                                news_posts=news_posts, 
                                problem_post=problem_post,
-                               title="NEMO Home") # Add title
+                               title="NEMO Home")) # Add title
 
     ## Login Page
     @app.route('/login', methods=['GET', 'POST'])
     def login():
         if request.method == 'POST':
+            # Refuse bursts before spending a query and a bcrypt verification on them
+            retry_after = login_throttle.check(request.remote_addr, request.form['email'])
+            if retry_after:
+                flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'danger')
+                response = make_response(render_template('login.html', title="Login"), 429)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
             # Find user by email
             user = User.query.filter_by(email=request.form['email']).first()
             # Check if user exists and password is correct
             if user and user.check_password(request.form['password']):
+                login_throttle.succeeded(request.remote_addr, request.form['email'])
+                # Hashed with another work factor (BCRYPT_LOG_ROUNDS changed): re-hash it now
+                if user.password_needs_rehash():
+                    user.set_password(request.form['password'])
+                    db.session.commit()
                 # Log the user in with Flask-Login
                 login_user(user, remember=True) # Remember session across browser closes
                 return redirect(url_for('index'))
             else:
+                login_throttle.failed(request.remote_addr, request.form['email'])
                 # Show error message if login fails
                 flash('Invalid credentials.', 'danger')
         # Render login page (handles GET requests and failed POST requests)
@@ -74,9 +316,10 @@ def register_routes(app):
 
     ## Materials Page
     @app.route('/materials')
+    @response_cache.cached('materials', version=lambda **kwargs: materials_listing.generation())
     def materials():
-        # Get all materials from DB, ordered by position
-        all_materials = Material.query.order_by(Material.position.asc()).all()
+        # All materials, ordered by position (cached until one changes)
+        all_materials = materials_listing.get()
 
         return render_template(
             'materials.html', 
@@ -103,19 +346,13 @@ def register_routes(app):
             # --- Save the PDF File ---
             if pdf_file and allowed_file(pdf_file.filename):
                 filename = secure_filename(pdf_file.filename)
-                # We save PDFs to a subfolder to keep uploads organized
-                save_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'pdfs')
-                os.makedirs(save_dir, exist_ok=True) # Create 'static/uploads/pdfs/' if it doesn't exist
-                save_path = os.path.join(save_dir, filename)
-                pdf_file.save(save_path)
-                
+                # PDFs go to the blob store, so the same file used by two materials is kept once.
                 # Store the *relative* path for use in url_for()
-                db_path = os.path.join('uploads/pdfs', filename).replace('\\', '/')
+                db_path, created = blob_store.store(pdf_file.stream, filename)
 
-                # --- Get Max Position ---
-                # Find the highest position number and add 1
-                max_pos = db.session.query(db.func.max(Material.position)).scalar() or 0
-                new_position = max_pos + 1
+                # --- Get Next Position ---
+                # Right after the last material (positions are 0, 1, 2, ...)
+                new_position = material_order.next_position()
                 
                 # --- Create Database Entry ---
                 new_material = Material(
@@ -126,6 +363,9 @@ def register_routes(app):
                 )
                 db.session.add(new_material)
                 db.session.commit()
+                materials_changed()
+                # Page count, thumbnail and checksum, in the background
+                enqueue_material_jobs(db_path, created)
                 flash('New material added successfully.', 'success')
             else:
                 flash('Invalid file type. Only PDFs are allowed (for now).', 'danger')
@@ -134,7 +374,7 @@ def register_routes(app):
 
         # --- Handle GET Request ---
         # Get all materials, sorted by their position, for display
-        all_materials = Material.query.order_by(Material.position.asc()).all()
+        all_materials = materials_listing.get()
         return render_template(
             'manage-materials.html',
             materials=all_materials,
@@ -152,17 +392,21 @@ def register_routes(app):
             return redirect(url_for('manage_materials'))
         
         # (Optional but recommended: Delete the actual PDF file from disk)
+        # Blobs may be shared with other materials; gc_blobs.py removes them once unused
         try:
             # Construct the full filesystem path
             file_path = os.path.join('static', material_to_delete.pdf_path)
-            if os.path.exists(file_path):
+            if not blob_store.is_blob(material_to_delete.pdf_path) and os.path.exists(file_path):
                 os.remove(file_path)
         except OSError as e:
             flash(f"Error deleting file from disk: {e}", "warning")
 
-        # Delete the entry from the database
+        # Delete the entry from the database, moving the ones after it up a place
         db.session.delete(material_to_delete)
+        if material_to_delete.position is not None:
+            material_order.close_gap(material_to_delete.position)
         db.session.commit()
+        materials_changed()
         flash('Material deleted successfully.', 'success')
         return redirect(url_for('manage_materials'))
 
@@ -186,137 +430,202 @@ def register_routes(app):
                 # --- (Optional) Delete the old PDF file ---
                 try:
                     old_file_path = os.path.join('static', material_to_update.pdf_path)
-                    if os.path.exists(old_file_path):
+                    if not blob_store.is_blob(material_to_update.pdf_path) and os.path.exists(old_file_path):
                         os.remove(old_file_path)
                 except OSError as e:
                     flash(f"Error deleting old file: {e}", "warning")
                 
                 # --- Save the new PDF file ---
                 filename = secure_filename(pdf_file.filename)
-                save_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'pdfs')
-                os.makedirs(save_dir, exist_ok=True)
-                save_path = os.path.join(save_dir, filename)
-                pdf_file.save(save_path)
+                pdf_path, created = blob_store.store(pdf_file.stream, filename)
+                enqueue_material_jobs(pdf_path, created)
                 
                 # Update the path in the database
-                material_to_update.pdf_path = os.path.join('uploads/pdfs', filename).replace('\\', '/')
+                material_to_update.pdf_path = pdf_path
             else:
                 flash('Invalid new file type. Only PDFs are allowed.', 'danger')
                 return redirect(url_for('edit_material', id=id))
+        else:
+            # Materials added before PDFs were processed get their thumbnail on the next edit
+            enqueue_material_jobs(material_to_update.pdf_path, created=False)
             
         # Commit changes to the database
         db.session.commit()
+        materials_changed()
         flash('Material updated successfully.', 'success')
         return redirect(url_for('manage_materials'))
 
     ## Save Material Order Action (from AJAX)
+    # Either {"order": [every material id, in the new order]} or, after a single
+    # drag, {"move": {"id": ..., "index": ...}}, which only rewrites the rows
+    # between the old and new place (see material_order.py).
     @app.route('/manage-materials/save-order', methods=['POST'])
     @login_required
     def save_material_order():
         # Get the JSON data sent from the JavaScript
-        data = request.json
-        if not data or 'order' not in data:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or ('order' not in data and 'move' not in data):
             return jsonify({'error': 'No order data provided'}), 400
-        
-        id_list = data.get('order')
-        
+
         try:
-            # Loop through the list of IDs. The index (0, 1, 2...)
-            # will be their new position.
-            for index, item_id in enumerate(id_list):
-                material = Material.query.filter_by(id=item_id).first()
-                if material:
-                    material.position = index
-                    db.session.add(material)
-            
+            if 'move' in data:
+                target = data['move'] if isinstance(data['move'], dict) else {}
+                changed = material_order.move(target.get('id'), target.get('index'))
+            else:
+                changed = material_order.reorder(data['order'])
             db.session.commit()
-            flash('Material order saved successfully.', 'success')
-            return jsonify({'status': 'success', 'message': 'Order saved!'})
-        
+        except material_order.OrderError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), e.status
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
-    # --- Helper Function for Sorting by Date ---
-    def get_sortable_date(page):
-        """Safely gets the date from post metadata, converting if necessary."""
-        date_val = page.meta.get('date')
-        if isinstance(date_val, date): # Handles both date and datetime objects
-            # If it's datetime, convert to date; otherwise, it's already a date
-            return date_val.date() if isinstance(date_val, datetime) else date_val 
-        if isinstance(date_val, str):
-            try:
-                # Try parsing the standard YYYY-MM-DD format
-                return datetime.strptime(date_val, '%Y-%m-%d').date()
-            except ValueError:
-                # If parsing fails, return a minimum date for consistent sorting
-                pass 
-        return date.min # Fallback for missing or unparseable dates
+        if changed:
+            materials_changed()
+        flash('Material order saved successfully.', 'success')
+        return jsonify({'status': 'success', 'message': 'Order saved!', 'changed': changed})
 
     ## Problems of the Month Page
-    @app.route('/months-problems')
-    def months_problems():
-        # Get all published problem pages
-        problem_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('months-problems/')]
-
-        # Sort problems using the safer helper function
-        sorted_problems_by_date = sorted(problem_pages, key=get_sortable_date, reverse=True)
-
-        # Find the first problem in the sorted list that isn't marked as solved
-        current_problem = next((p for p in sorted_problems_by_date if not p.meta.get('is_solved')), None)
-        # Get all problems marked as solved
-        solved_problems = [p for p in sorted_problems_by_date if p.meta.get('is_solved')]
-
-        return render_template(
+    @app.route('/months-problems', defaults={'page': 1})
+    @app.route('/months-problems/page/<int:page>')
+    @response_cache.cached('posts', version=listing_version)
+    def months_problems(page):
+        # Find the newest published problem that isn't marked as solved
+        current_problem = post_index.first('months-problems/open')
+        # One page of the published problems marked as solved, newest first
+        solved_problems, pagination = paginate('months-problems/solved', page)
+
+        return listing_response(lambda: render_template(
             'months-problems.html', 
             logado=current_user.is_authenticated, 
             current_problem=current_problem,
             solved_problems=solved_problems,
+            pagination=pagination,
             title="Problemas do Mês" # Add title
-        )
+        ))
 
     ## News Overview Page (Shows sliders)
     @app.route('/news')
+    @response_cache.cached('posts', version=listing_version)
     def news():
-        # Get all published news pages
-        news_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('news/')]
-        # Sort news by date (using simpler lambda, assumes date is valid datetime or missing)
-        sorted_news = sorted(news_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-        # Filter for award posts
-        award_posts = [p for p in sorted_news if p.path.startswith('news/awards/')]
-        # Filter for other general news posts
-        other_news_posts = [p for p in sorted_news if p.path.startswith('news/others/')]
-        return render_template('news.html', 
+        # Published award posts, newest first
+        award_posts = post_index.section('news/awards')
+        # Published general news posts, newest first
+        other_news_posts = post_index.section('news/others')
+        return listing_response(lambda: render_template('news.html', 
                                logado=current_user.is_authenticated, 
                                award_posts=award_posts, 
                                other_news_posts=other_news_posts,
-                               title="Notícias") # Add title
+                               title="Notícias")) # Add title
     
     ## News Awards Page (List View)
-    @app.route('/news-awards')
-    def news_awards():
-        news_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('news/')]
-        sorted_news = sorted(news_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-        award_posts = [p for p in sorted_news if p.path.startswith('news/awards/')]
-        return render_template(
+    @app.route('/news-awards', defaults={'page': 1})
+    @app.route('/news-awards/page/<int:page>')
+    @response_cache.cached('posts', version=listing_version)
+    def news_awards(page):
+        award_posts, pagination = paginate('news/awards', page)
+        return listing_response(lambda: render_template(
             'news-awards.html', 
             logado=current_user.is_authenticated, 
             award_posts=award_posts,
+            pagination=pagination,
             title="Prêmios e Conquistas" # Pass a title for the <title> tag
-        )
+        ))
     
     ## News General Page (List View)
-    @app.route('/news-general')
-    def news_general():
-        news_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('news/')]
-        sorted_news = sorted(news_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-        other_news_posts = [p for p in sorted_news if p.path.startswith('news/others/')]
-        return render_template(
+    @app.route('/news-general', defaults={'page': 1})
+    @app.route('/news-general/page/<int:page>')
+    @response_cache.cached('posts', version=listing_version)
+    def news_general(page):
+        other_news_posts, pagination = paginate('news/others', page)
+        return listing_response(lambda: render_template(
             'news-general.html', 
             logado=current_user.is_authenticated, 
             other_news_posts=other_news_posts,
+            pagination=pagination,
             title="Notícias Gerais" # Pass a title for the <title> tag
-        )
+        ))
+
+    ## Post Summaries API (for infinite scroll)
+    # GET /api/posts/news/others?limit=12 returns the newest posts of a section;
+    # pass the returned `next` cursor as ?before=... to get the following batch.
+    # ?offset=N is also accepted. Drafts are never listed.
+    @app.route('/api/posts/<path:section>')
+    @response_cache.cached('posts', version=listing_version)
+    def api_posts(section):
+        if section not in API_SECTIONS:
+            abort(404)
+
+        limit = request.args.get('limit', app.config.get('POSTS_PER_PAGE', 12), type=int)
+        limit = min(limit, app.config.get('API_POSTS_MAX_LIMIT', 50))
+        if limit < 1:
+            return jsonify({'error': 'limit must be a positive number'}), 400
+
+        # Fetch one extra post to know whether there is a next batch
+        before = request.args.get('before')
+        if before:
+            try:
+                cursor_key = parse_cursor(before)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            posts = post_index.older_than(section, cursor_key, limit + 1)
+        else:
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            posts = post_index.section(section)[offset:offset + limit + 1]
+
+        has_more = len(posts) > limit
+        posts = posts[:limit]
+        return listing_response(lambda: jsonify({
+            'posts': [post_summary(post) for post in posts],
+            'next': make_cursor(posts[-1]) if has_more else None
+        }))
+
+    ## Search API
+    # GET /api/search?q=solucao+geometria returns the published posts containing
+    # every word (accents ignored), best matches first. Optional: ?section=news
+    # or ?section=months-problems, and ?limit=N.
+    @app.route('/api/search')
+    def api_search():
+        query = request.args.get('q', '').strip()
+        section = request.args.get('section')
+        if section and section not in API_SECTIONS:
+            return jsonify({'error': 'Unknown section'}), 400
+        limit = min(request.args.get('limit', 20, type=int), app.config.get('API_POSTS_MAX_LIMIT', 50))
+        if limit < 1:
+            return jsonify({'error': 'limit must be a positive number'}), 400
+
+        results = []
+        for path, snippet in search_index.search(query, limit, section):
+            post = pages.get(path)
+            if post is not None:
+                results.append({**post_summary(post), 'snippet': snippet})
+        return jsonify({'query': query, 'results': results})
+
+    ## PDF Pages API
+    # GET /api/pdf-pages/uploads/_blobs/ab/ab12....pdf returns the page count,
+    # page sizes and preview images of an uploaded PDF (see pdf_pages.py), used
+    # by static/js/pdf-embed.js to load only the pages in view. `ready` is false
+    # until the PDF's background job has run.
+    @app.route('/api/pdf-pages/<path:static_path>')
+    def api_pdf_pages(static_path):
+        source = safe_join(app.static_folder, static_path)
+        if not static_path.startswith('uploads/') or not static_path.lower().endswith('.pdf') \
+                or source is None or not os.path.isfile(source):
+            return jsonify({'error': 'PDF not found'}), 404
+
+        data = pdf_pages.get(static_path)
+        body = {'url': url_for('static', filename=static_path), 'ready': data is not None,
+                'pages': None, 'sizes': [], 'thumbnail_url': None, 'preview_urls': []}
+        if data:
+            body.update({
+                'pages': data['pages'],
+                'sizes': data['sizes'],
+                'thumbnail_url': url_for('static', filename=data['thumbnail']),
+                'preview_urls': [url_for('static', filename=path) for path in data['previews']],
+            })
+        etag = make_etag(static_path, sorted(body.items()))
+        return conditional_response(etag, None, lambda: jsonify(body))
 
     ## Team Page (Note: Seems unused currently, template may not exist)
     # @app.route('/team')
@@ -339,68 +648,46 @@ def register_routes(app):
     ## View Single Post Page
     # The <path:path> converter allows slashes in the URL path
     @app.route('/post/<path:path>')
+    @response_cache.cached('posts', version=lambda path: render_cache.file_version(path)[0])
     def view_post(path):
         # Get the FlatPage object or return a 404 error if not found
         post = pages.get_or_404(path)
+
         # If the post is a draft, only show it to logged-in users
+        # (checked first, so anonymous requests never render or store a draft)
         if post.meta.get('status') == 'draft' and not current_user.is_authenticated:
             abort(404) # Return 404 for non-logged-in users trying to view drafts
 
-        # Find the author's User object based on email in metadata, if provided
+        # --- Sanitized HTML (cached per file version) ---
+        # Body and solution HTML are rendered and sanitized by render_cache,
+        # so repeated views of the same post skip Markdown and Bleach entirely.
+        rendered = render_cache.get(post)
+        post_html = rendered.body_html
+        solution_html = rendered.solution_html
+
+        # Find the author's card (name, bio, photo) based on email in metadata, if provided
         author = None
         author_email = post.meta.get('author_email')
         if author_email:
-            author = User.query.filter_by(email=author_email).first()
-
-        # --- HTML Sanitization using Bleach ---
-        # Define allowed HTML tags (start with defaults and add necessary ones)
-        allowed_tags = list(bleach.sanitizer.ALLOWED_TAGS) + [
-            'h1', 'h2', 'h3', 'p', 'br', 'img', 'a', 'ul', 'li', 'ol',
-            'strong', 'em', 'u', 's', 'blockquote', 'pre', 'code',
-            'video', 'iframe',
-            'div'
-        ]
-        # Define allowed attributes for specific tags
-        allowed_attrs = {
-            **bleach.sanitizer.ALLOWED_ATTRIBUTES, # Include default allowed attributes
-            'img': ['src', 'alt', 'title', 'width', 'height'],
-            'video': ['src', 'width', 'height', 'controls', 'preload', 'muted', 'loop', 'autoplay', 'playsinline'],
-            'a': ['href', 'title', 'class'],
-            'iframe': ['src', 'width', 'height', 'frameborder', 'allow', 'allowfullscreen', 'title'],
-            'div': ['class']
-        }
-        # Sanitize the HTML rendered from Markdown to prevent XSS attacks
-        post_html = bleach.clean(
-            post.html, # The HTML generated by Flask-FlatPages' Markdown processor
-            tags=allowed_tags,
-            attributes=allowed_attrs
-        )
-        # --- End Sanitization ---
-
-        # --- Process and Sanitize Solution Content ---
-        solution_html = "" # Initialize as empty string
-        if post.path.startswith('months-problems/') and post.meta.get('is_solved'):
-            # 2. Get the raw solution markdown from metadata
-            raw_solution = post.meta.get('solution_content', '')
-            if raw_solution:
-                # 3. Convert the solution markdown to HTML
-                html_solution = markdown.markdown(raw_solution)
-                # 4. Sanitize the new HTML using the *exact same* rules
-                solution_html = bleach.clean(
-                    html_solution,
-                    tags=allowed_tags,
-                    attributes=allowed_attrs
-                )
-        # --- END OF BLOCK ---
+            author = user_cache.author(author_email)
 
         # Render the template to display the post
-        return render_template('view-post-flat.html', 
-                               post=post, 
-                               author=author, 
-                               logado=current_user.is_authenticated, 
-                               post_html=post_html,
-                               solution_html=solution_html,
-                               title=post.meta.get('title', 'Post')) # Use post title for page title
+        def render():
+            return render_template('view-post-flat.html', 
+                                   post=post, 
+                                   author=author, 
+                                   logado=current_user.is_authenticated, 
+                                   post_html=post_html,
+                                   solution_html=solution_html,
+                                   title=post.meta.get('title', 'Post')) # Use post title for page title
+
+        # Anonymous visitors get validators from the post file itself, so a
+        # revalidation costs a hash compare instead of a render
+        if current_user.is_authenticated:
+            return render()
+        content_hash, last_modified = render_cache.file_version(post.path)
+        etag = make_etag(page_fingerprint(), content_hash, author.name if author else '')
+        return conditional_response(etag, page_last_modified(last_modified), render)
 
     # --- Admin Routes ---
 
@@ -409,12 +696,19 @@ def register_routes(app):
     @login_required # Protect this route
     def account_settings():
         if request.method == 'POST':
+            # Same limits as the login form, so a stolen session can't guess the password quickly
+            retry_after = login_throttle.check(request.remote_addr, current_user.email)
+            if retry_after:
+                flash(f'Too many attempts. Please try again in {retry_after} seconds.', 'danger')
+                return redirect(url_for('account_settings'))
+            # current_user is a cached snapshot; changes are made to the User itself
+            user = db.session.get(User, current_user.id)
             # Verify current password before allowing changes
-            if not current_user.check_password(request.form.get('current_password')):
+            if not user.check_password(request.form.get('current_password')):
+                login_throttle.failed(request.remote_addr, user.email)
                 flash('Incorrect password. Please try again.', 'danger')
                 return redirect(url_for('account_settings'))
-
-            user = current_user # Get the currently logged-in user object
+            login_throttle.succeeded(request.remote_addr, user.email)
             
             # Check if the new email is different and already exists
             new_email = request.form.get('email')
@@ -430,7 +724,7 @@ def register_routes(app):
             # Update password only if a new one is provided
             new_password = request.form.get('password')
             if new_password:
-                user.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+                user.set_password(new_password)
 
             # Handle profile picture upload
             if 'profile_pic' in request.files:
@@ -440,9 +734,15 @@ def register_routes(app):
                     image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                     profile_pic.save(image_path)
                     user.profile_image_path = image_path # Update user's profile image path
+                    # Resized copies, so the photo isn't shipped at full resolution
+                    enqueue_upload_jobs(f'uploads/{filename}')
 
             # Commit changes to the database
             db.session.commit()
+            # The logged-in user and author names are cached by every worker
+            user_cache.invalidate()
+            # Author names appear on cached post pages
+            response_cache.invalidate(group='posts')
             flash('Your settings have been updated successfully!', 'success')
             return redirect(url_for('account_settings'))
         
@@ -468,7 +768,7 @@ def register_routes(app):
                 # Use FlatPages to parse the metadata separately
                 page = pages.get(path) 
                 if page:
-                    post_data = page.meta # Get metadata (title, date, etc.)
+                    post_data = dict(page.meta) # Copy metadata (title, date, etc.) so the cached page isn't modified
                     post_data['path'] = path # Add path for context
                     post_data['title'] = page.meta.get('title', 'Untitled') # Ensure title exists
                     post_data['content'] = full_raw_content # Add the raw content for the editor
@@ -505,16 +805,16 @@ def register_routes(app):
              return jsonify({'status': 'error', 'message': f'Error: Cannot save, original file not found at {filepath}'}), 404
 
         try:
-            # Write the new content, overwriting the old file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(full_new_content)
-            
-            # Reload FlatPages cache to reflect changes immediately
-            pages.reload() 
+            # Validate, render and atomically overwrite the file, then refresh
+            # the page index, caches and static export
+            write_post(path, full_new_content)
 
             # Instead of redirecting, return success JSON
             return jsonify({'status': 'success', 'message': 'Post saved!'})
-            
+
+        except ValueError as e:
+            # Invalid front-matter: the file on disk is left untouched
+            return jsonify({'status': 'error', 'message': f'Error parsing Markdown file: {e}'}), 400
         except Exception as e:
             flash(f"Error saving file: {e}", "danger")
             # Redirect back to the editor if saving failed
@@ -540,18 +840,10 @@ def register_routes(app):
 
         # --- Parse Metadata and Content ---
         try:
-            match = re.match(r'^---\s*(.*?)\s*---\s*(.*)', full_content, re.DOTALL)
-            if not match: raise ValueError("Could not find YAML front-matter separator '---'")
+            metadata = parse_front_matter(full_content)
+            title = metadata['title']
 
-            yaml_string = match.group(1)
-            metadata = yaml.safe_load(yaml_string)
-            if not metadata or not isinstance(metadata, dict):
-                raise ValueError("Invalid YAML front-matter format")
-
-            title = metadata.get('title')
-            if not title: raise ValueError("Metadata must contain a 'title'")
-
-        except (yaml.YAMLError, ValueError) as e:
+        except ValueError as e:
             # Return a JSON error
             return jsonify({'status': 'error', 'message': f'Error parsing Markdown file: {e}'}), 400
         # --- End Parsing ---
@@ -581,13 +873,9 @@ def register_routes(app):
         
         # --- Save the File ---
         try:
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(full_content)
-
-            pages.reload()
-
             page_path = os.path.join(directory, filename_base + (f"-{counter}" if counter > 0 else ""))
+            # Render, sanitize and write atomically, then refresh every cache
+            write_post(page_path, full_content)
             
             # Instead of flashing and redirecting, return success JSON
             return jsonify({
@@ -614,8 +902,8 @@ def register_routes(app):
                 # Delete the file from the filesystem
                 os.remove(filepath)
                 flash(f"Post '{path}' deleted successfully.", "success")
-                # Reload FlatPages cache to remove the deleted post
-                pages.reload()
+                # Drop the deleted post from FlatPages and from every cache
+                post_changed(path)
                 # Redirect back to the drafts page (or another appropriate page)
                 return redirect(url_for('drafts'))
             except OSError as e:
@@ -629,10 +917,8 @@ def register_routes(app):
     @app.route('/drafts')
     @login_required # Protect this route
     def drafts():
-        # Get all pages with status 'draft'
-        draft_pages = [p for p in pages if p.meta.get('status') == 'draft']
-        # Sort drafts by date, newest first (using min date as fallback)
-        sorted_drafts = sorted(draft_pages, key=lambda p: p.meta.get('date', datetime.min), reverse=True)
+        # Get all drafts, newest first (posts without a date go last)
+        sorted_drafts = post_index.section('drafts')
         # Render the drafts template
         return render_template('drafts.html', 
                                post_list=sorted_drafts, 
@@ -646,24 +932,12 @@ def register_routes(app):
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-    ## ⬆️ Upload Asset Endpoint (UPDATED)
-    @app.route('/upload-asset', methods=['POST'])
-    @login_required
-    def upload_asset():
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file part'}), 400
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
-
-        # --- NEW: Context-Aware Path Logic ---
-        # Get the desired subfolder path (e.g., "news/my-post")
-        post_path = request.form.get('post_path', '')
-        
+    def upload_target(post_path):
+        """Returns (safe subfolder, target directory) for uploads of a post; the directory is None if invalid."""
         # Sanitize the subfolder path to prevent directory traversal
         # We split by '/' and secure each part, then rejoin
         safe_parts = [secure_filename(part) for part in post_path.split('/') if part not in ('', '.', '..')]
-        safe_subfolder = os.path.join(*safe_parts)
+        safe_subfolder = os.path.join(*safe_parts) if safe_parts else ''
         
         # Define the full target directory
         target_dir = os.path.join(app.config['UPLOAD_FOLDER'], safe_subfolder)
@@ -674,73 +948,181 @@ def register_routes(app):
         target_path = os.path.abspath(target_dir)
 
         if not target_path.startswith(base_path):
+            return safe_subfolder, None
+        return safe_subfolder, target_dir
+
+    def markdown_link_for(url_path, filename):
+        """Markdown snippet for an uploaded file: an image, or a plain link."""
+        file_url = url_for('static', filename=url_path)
+        file_extension = filename.rsplit('.', 1)[1].lower()
+        if file_extension in {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}:
+            return f"![{filename}]({file_url})"
+        return f"[{filename}]({file_url})"
+
+    ## ⬆️ Upload Asset Endpoint (UPDATED)
+    @app.route('/upload-asset', methods=['POST'])
+    @login_required
+    def upload_asset():
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+
+        # --- NEW: Context-Aware Path Logic ---
+        # Get the desired subfolder path (e.g., "news/my-post")
+        safe_subfolder, target_dir = upload_target(request.form.get('post_path', ''))
+        if target_dir is None:
              return jsonify({'error': 'Invalid path specified'}), 403
-        
-        # Create the directory if it doesn't exist
-        os.makedirs(target_dir, exist_ok=True)
+        folder = safe_subfolder.replace('\\', '/')
         # --- End Path Logic ---
 
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            save_path = os.path.join(target_dir, filename)
             
             try:
-                file.save(save_path)
-                
-                # Create the relative path for the URL
-                url_path = os.path.join('uploads', safe_subfolder, filename).replace('\\', '/')
-                file_url = url_for('static', filename=url_path)
+                # Stored once under its content hash; the post's folder maps the name to it
+                url_path, created = blob_store.store(file.stream, filename)
+                blob_store.link(folder, filename, url_path)
 
-                # Generate the correct Markdown link
-                file_extension = filename.rsplit('.', 1)[1].lower()
-                if file_extension in {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}:
-                    markdown_link = f"![{filename}]({file_url})"
-                else:
-                    markdown_link = f"[{filename}]({file_url})"
+                # Thumbnails, previews and checksum are made in the background;
+                # the media library polls each job's status_url.
+                # A duplicate was already processed when it was first uploaded.
+                jobs = enqueue_upload_jobs(url_path) if created else []
 
-                return jsonify({'markdownLink': markdown_link}), 200
+                # Generate the correct Markdown link
+                return jsonify({'markdownLink': markdown_link_for(url_path, filename), 'jobs': jobs}), 200
 
             except Exception as e:
                 return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
         else:
             return jsonify({'error': 'File type not allowed'}), 400
 
+    ## ⬆️ Chunked Upload Endpoints
+    # Large media goes up in pieces: POST /uploads starts an upload, each chunk is
+    # PUT at its offset (resumable after a dropped connection, see GET), and
+    # POST .../finalize adds the file to the blob store like upload_asset() does.
+    def upload_error(e):
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status
+
+    @app.route('/uploads', methods=['POST'])
+    @login_required
+    def chunked_upload_start():
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get('filename') or '')
+        if not filename or not allowed_file(filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+        try:
+            size = int(data.get('size'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'File size is required'}), 400
+
+        safe_subfolder, target_dir = upload_target(data.get('post_path') or '')
+        if target_dir is None:
+            return jsonify({'error': 'Invalid path specified'}), 403
+
+        try:
+            upload_id = chunked_uploads.create(size, data.get('sha256'),
+                                               meta={'folder': safe_subfolder.replace('\\', '/'), 'name': filename})
+        except UploadError as e:
+            return upload_error(e)
+        return jsonify({
+            'upload_id': upload_id,
+            'offset': 0,
+            'chunk_size': chunked_uploads.chunk_bytes,
+            'upload_url': url_for('chunked_upload', upload_id=upload_id),
+            'finalize_url': url_for('chunked_upload_finalize', upload_id=upload_id),
+        }), 201
+
+    @app.route('/uploads/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+    @login_required
+    def chunked_upload(upload_id):
+        try:
+            if request.method == 'PUT':
+                # Raw chunk body at ?offset=N, with an optional X-Chunk-SHA256 header
+                offset = request.args.get('offset', type=int)
+                if offset is None:
+                    return jsonify({'error': 'Offset is required'}), 400
+                new_offset = chunked_uploads.append(upload_id, offset, request.stream,
+                                                    request.content_length,
+                                                    request.headers.get('X-Chunk-SHA256'))
+                return jsonify({'offset': new_offset})
+            if request.method == 'DELETE':
+                chunked_uploads.abort(upload_id)
+                return jsonify({'success': True})
+            return jsonify(chunked_uploads.status(upload_id))
+        except UploadError as e:
+            return upload_error(e)
+
+    @app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+    @login_required
+    def chunked_upload_finalize(upload_id):
+        try:
+            meta, url_path, created = chunked_uploads.finalize(upload_id, blob_store)
+        except UploadError as e:
+            return upload_error(e)
+        except (OSError, sqlite3.Error) as e:
+            # finalize() has removed what was made of the upload
+            return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
+        jobs = enqueue_upload_jobs(url_path) if created else []
+        return jsonify({'markdownLink': markdown_link_for(url_path, meta['name']), 'jobs': jobs}), 200
+
     ## 🖼️ List Assets Endpoint (NEW)
+    # Paginated and filterable: ?post_path=news/x&offset=0&limit=60&kind=image&q=banner
+    # Reads the asset index (see blob_store.py), so large folders don't cost a stat per file
     @app.route('/list-assets', methods=['GET'])
     @login_required
     def list_assets():
-        post_path = request.args.get('post_path', '')
-        
-        # Sanitize the subfolder path (same logic as upload)
-        safe_parts = [secure_filename(part) for part in post_path.split('/') if part not in ('', '.', '..')]
-        safe_subfolder = os.path.join(*safe_parts)
-        target_dir = os.path.join(app.config['UPLOAD_FOLDER'], safe_subfolder)
-        
-        # --- CRITICAL: Path Validation ---
-        base_path = os.path.abspath(app.config['UPLOAD_FOLDER'])
-        target_path = os.path.abspath(target_dir)
-
-        if not target_path.startswith(base_path) or not os.path.isdir(target_path):
+        safe_subfolder, target_dir = upload_target(request.args.get('post_path', ''))
+        if target_dir is None:
              return jsonify({'error': 'Invalid path or directory not found'}), 404
-        
-        files = []
+
+        kind = request.args.get('kind') or None
+        if kind is not None and kind not in KIND_FILTERS:
+            return jsonify({'error': f"Unknown kind: {kind}"}), 400
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 60, type=int), 1), app.config.get('ASSETS_MAX_LIMIT', 200))
+
+        folder = safe_subfolder.replace('\\', '/')
         try:
-            for filename in os.listdir(target_dir):
-                # Only list files, not subdirectories
-                if os.path.isfile(os.path.join(target_dir, filename)):
-                    url_path = os.path.join('uploads', safe_subfolder, filename).replace('\\', '/')
-                    file_url = url_for('static', filename=url_path)
-                    files.append({
-                        'name': filename,
-                        'url': file_url,
-                        'path': os.path.join(safe_subfolder, filename).replace('\\', '/') # Relative path for delete
-                    })
-            # Sort files by name
-            files.sort(key=lambda f: f['name'])
-            return jsonify(files)
-        except Exception as e:
+            # Picks up files saved directly in the folder (one stat when nothing changed)
+            blob_store.sync_folder(folder, target_dir)
+            files, total = blob_store.listing(folder, offset, limit, kind=kind, query=request.args.get('q'))
+        except (OSError, sqlite3.Error) as e:
             return jsonify({'error': str(e)}), 500
 
+        for file in files:
+            file['url'] = url_for('static', filename=file['path'])
+            # Smallest resized copy, so the grid doesn't download full-size originals
+            variants = image_variants.get(file['path'])
+            file['thumb_url'] = url_for('static', filename=variants['srcset']['webp'][0][1]) if variants else None
+            file['path'] = f"{folder}/{file['name']}" if folder else file['name'] # Relative path for delete
+
+        next_offset = offset + len(files) if offset + len(files) < total else None
+        return jsonify({'files': files, 'total': total, 'next_offset': next_offset})
+
+    ## Background Job Status Endpoint
+    # Polled by the media library after an upload until the job is 'done' or 'failed'
+    @app.route('/jobs/<int:job_id>', methods=['GET'])
+    @login_required
+    def job_status(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
+    ## Password Hashing Metrics Endpoint
+    # bcrypt timings and refused login attempts, as seen by the worker that answers
+    @app.route('/api/metrics/password-hashing', methods=['GET'])
+    @login_required
+    def password_hashing_metrics():
+        return jsonify({
+            'pid': os.getpid(),
+            'work_factor': app.config.get('BCRYPT_LOG_ROUNDS', 12),
+            'operations': hashing_metrics.snapshot(),
+            'refused_attempts': login_throttle.refused,
+        })
+
     ## 🗑️ Delete Asset Endpoint (NEW)
     @app.route('/delete-asset', methods=['POST'])
     @login_required
@@ -757,9 +1139,21 @@ def register_routes(app):
         if not os.path.abspath(safe_path).startswith(base_path):
             return jsonify({'error': 'Permission denied: Invalid path'}), 403
 
+        # Names in the blob store only lose their mapping; the blob itself may be
+        # used by posts (or other names) and is removed by gc_blobs.py once it isn't
+        folder, _, name = file_path.strip('/').rpartition('/')
+        indexed_path = blob_store.unlink(folder, name)
+        if indexed_path and blob_store.is_blob(indexed_path):
+            return jsonify({'status': 'success', 'message': f'File {file_path} deleted.'})
+        # Files saved directly in the folder are deleted for real
+
         try:
             if os.path.exists(safe_path) and os.path.isfile(safe_path):
                 os.remove(safe_path)
+                # Drop its resized copies and page previews too
+                static_path = os.path.relpath(safe_path, app.static_folder).replace('\\', '/')
+                image_variants.remove(static_path)
+                pdf_pages.remove(static_path)
                 return jsonify({'status': 'success', 'message': f'File {file_path} deleted.'})
             else:
                 return jsonify({'error': 'File not found'}), 404
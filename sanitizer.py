@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import bleach # Used for sanitizing HTML output
+import markdown
+
+# --- Sanitization Policies ---
+# Built once at import time instead of on every request.
+# Allowed HTML tags for post content (start with defaults and add necessary ones)
+POST_TAGS = frozenset(bleach.sanitizer.ALLOWED_TAGS) | {
+    'h1', 'h2', 'h3', 'p', 'br', 'img', 'a', 'ul', 'li', 'ol',
+    'strong', 'em', 'u', 's', 'blockquote', 'pre', 'code',
+    'video', 'iframe',
+    'div'
+}
+# Allowed attributes for specific tags
+POST_ATTRS = {
+    **bleach.sanitizer.ALLOWED_ATTRIBUTES, # Include default allowed attributes
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'video': ['src', 'width', 'height', 'controls', 'preload', 'muted', 'loop', 'autoplay', 'playsinline'],
+    'a': ['href', 'title', 'class'],
+    'iframe': ['src', 'width', 'height', 'frameborder', 'allow', 'allowfullscreen', 'title'],
+    'div': ['class']
+}
+
+# Policy name -> (tags, attributes). Solutions use the *exact same* rules as post bodies.
+POLICIES = {
+    'post': (POST_TAGS, POST_ATTRS),
+    'solution': (POST_TAGS, POST_ATTRS),
+}
+
+# Fingerprint of everything that affects the sanitized output. HTML cached by
+# a previous deploy with different rules or library versions never matches.
+RULES_VERSION = hashlib.sha1(repr((
+    sorted((name, sorted(tags), sorted((tag, sorted(attrs)) for tag, attrs in attrs.items()))
+           for name, (tags, attrs) in POLICIES.items()),
+    bleach.__version__,
+    markdown.__version__,
+)).encode('utf-8')).hexdigest()[:16]
+
+# --- Reusable Instances ---
+# bleach.clean() builds a new Cleaner (and html5lib parser/serializer) on every
+# call, and markdown.markdown() a new Markdown instance. Both are built once per
+# thread here instead, since neither is safe to share between threads.
+_local = threading.local()
+
+def get_cleaner(policy):
+    """Returns this thread's prebuilt bleach.Cleaner for a named policy."""
+    cleaners = getattr(_local, 'cleaners', None)
+    if cleaners is None:
+        cleaners = _local.cleaners = {}
+    cleaner = cleaners.get(policy)
+    if cleaner is None:
+        tags, attrs = POLICIES[policy] # KeyError for unknown policies
+        cleaner = cleaners[policy] = bleach.Cleaner(tags=tags, attributes=attrs)
+    return cleaner
+
+def _get_markdown():
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = _local.markdown = markdown.Markdown()
+    return md
+
+# --- Public API ---
+def sanitize(html, policy='post'):
+    """Removes every tag and attribute the policy doesn't allow."""
+    return get_cleaner(policy).clean(html)
+
+def render_markdown(text):
+    """Converts Markdown to (unsanitized) HTML with this thread's Markdown instance."""
+    # reset() clears per-document state such as reference links and footnotes
+    return _get_markdown().reset().convert(text)
+
+def markdown_to_safe_html(text, policy='post'):
+    """Converts Markdown to HTML and sanitizes it with the given policy."""
+    return sanitize(render_markdown(text), policy)
@@ -0,0 +1,133 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Matches HTML tags embedded in the Markdown (videos, iframes, PDF links...)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+# Words typed by the user; everything else (quotes, operators) is dropped
+QUERY_WORD_RE = re.compile(r'\w+')
+
+# Column weights for ranking: a match in the title counts most
+RANK_WEIGHTS = (10.0, 5.0, 1.0, 1.0) # title, desc, body, solution
+
+# Sections that aren't folders but the solved/open split of the Problems of the
+# Month (see post_index.py): (folder, value of the `solved` column)
+SOLVED_SECTIONS = {
+    'months-problems/open': ('months-problems', '0'),
+    'months-problems/solved': ('months-problems', '1'),
+}
+
+# --- Search Index ---
+# Full-text index of the published posts, held in an in-memory SQLite FTS5
+# table per worker. Accents are folded by the tokenizer, so "solucao" finds
+# "solução". Like PostIndex, it is only checked against FlatPages when the
+# ContentStore generation has changed; then only the pages whose Page object
+# changed are re-indexed.
+class SearchIndex:
+    def __init__(self, pages):
+        self.pages = pages
+        self._conn = None
+        self._pid = None
+        # path -> Page object currently indexed (drafts included, so they aren't re-checked)
+        self._seen = {}
+        # ContentStore generation `_seen` was taken at
+        self._pages_generation = None
+        self._lock = threading.Lock()
+
+    # --- Public API ---
+    def search(self, query, limit=20, section=None):
+        """Returns [(path, snippet)] for the published posts matching every word of `query`.
+
+        `section` (e.g. 'months-problems') restricts the results to one folder,
+        or to the open or solved problems ('months-problems/open', '.../solved').
+        Returns an empty list for an empty query.
+        """
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        sql = ('SELECT path, snippet(post_search, 3, \'\', \'\', \'…\', 16) FROM post_search'
+               ' WHERE post_search MATCH ?')
+        params = [match]
+        if section:
+            folder, solved = SOLVED_SECTIONS.get(section, (section, None))
+            sql += ' AND (path LIKE ? ESCAPE \'\\\')'
+            params.append(folder.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%')
+            if solved is not None:
+                sql += ' AND solved = ?'
+                params.append(solved)
+        sql += ' ORDER BY bm25(post_search, 0, {}, {}, {}, {}, 0) LIMIT ?'.format(*RANK_WEIGHTS)
+        params.append(limit)
+
+        with self._lock:
+            self._sync()
+            return self._conn.execute(sql, params).fetchall()
+
+    # --- Internals ---
+    @staticmethod
+    def _match_expression(query):
+        """Turns free text into an FTS5 query: every word must match, as a prefix."""
+        words = QUERY_WORD_RE.findall(query or '')
+        # Quoting each word keeps FTS5 syntax (AND, NEAR, *, ...) out of user input
+        return ' '.join(f'"{word}"*' for word in words[:10])
+
+    def _connect(self):
+        if self._conn is not None and self._pid == os.getpid():
+            return
+        # New worker (or first use): build the index from scratch
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.execute(
+            'CREATE VIRTUAL TABLE post_search USING fts5('
+            ' path UNINDEXED, title, desc, body, solution, solved UNINDEXED,'
+            " tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self._conn = conn
+        self._pid = os.getpid()
+        self._seen = {}
+        self._pages_generation = None
+
+    def _sync(self):
+        """Brings the index up to date with FlatPages, touching only changed pages."""
+        self._connect()
+        # Read first: a change made while walking makes the next query sync again
+        generation = self.pages.generation
+        if generation == self._pages_generation:
+            return
+        seen = self._seen
+        current = {}
+        changed = []
+        for page in self.pages:
+            current[page.path] = page
+            if seen.get(page.path) is not page:
+                changed.append(page)
+        removed = [path for path in seen if path not in current]
+        self._pages_generation = generation
+        if not changed and not removed:
+            return
+
+        with self._conn: # One transaction for the whole batch
+            for path in removed:
+                self._conn.execute('DELETE FROM post_search WHERE path = ?', (path,))
+            for page in changed:
+                self._conn.execute('DELETE FROM post_search WHERE path = ?', (page.path,))
+                if page.meta.get('status') == 'published':
+                    self._conn.execute(
+                        'INSERT INTO post_search (path, title, desc, body, solution, solved) VALUES (?, ?, ?, ?, ?, ?)',
+                        (page.path, *self._document(page), '1' if page.meta.get('is_solved') else '0')
+                    )
+        self._seen = current
+        if len(changed) > 1 or removed:
+            logger.debug("Search index: %d posts (re)indexed, %d removed", len(changed), len(removed))
+
+    @staticmethod
+    def _document(page):
+        """Returns the (title, desc, body, solution) text of a post."""
+        meta = page.meta
+        # Markdown punctuation is already ignored by the tokenizer; only tags need stripping
+        body = HTML_TAG_RE.sub(' ', page.body)
+        solution = HTML_TAG_RE.sub(' ', str(meta.get('solution_content') or ''))
+        return str(meta.get('title') or ''), str(meta.get('desc') or ''), body, solution
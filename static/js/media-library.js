@@ -13,26 +13,44 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
     const mediaFileInput = document.getElementById('media-upload-file');
     const mediaUploadBtn = document.getElementById('media-upload-btn');
     const mediaStatusText = document.getElementById('media-status-text');
+    const mediaLoadMoreBtn = document.getElementById('media-load-more');
+    const mediaFilterKind = document.getElementById('media-filter-kind');
+    const mediaFilterName = document.getElementById('media-filter-name');
     const csrfToken = document.querySelector('input[name="csrf_token"]').value;
 
     const uploadUrl = document.documentElement.dataset.uploadUrl;
     const deleteUrl = document.documentElement.dataset.deleteUrl;
     const listUrl = document.documentElement.dataset.listUrl;
+    const chunkedUploadUrl = document.documentElement.dataset.chunkedUploadUrl;
+
+    // Files larger than this are sent in resumable chunks (see uploadInChunks)
+    const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
 
     let currentPostPath = '';
+    let nextOffset = null; // Where the next page of files starts (null: no more pages)
 
     // --- 2. Main Function: Load Files ---
-    async function loadMediaFiles(postPath) {
+    // Lists one page of files; `append` adds the next page below the current one
+    async function loadMediaFiles(postPath, append = false) {
         currentPostPath = postPath; 
-        mediaGrid.innerHTML = '<p>Loading...</p>'; 
+        if (!append) {
+            mediaGrid.innerHTML = '<p>Loading...</p>'; 
+            nextOffset = 0;
+        }
+        mediaLoadMoreBtn.hidden = true;
+
+        const params = new URLSearchParams({ post_path: postPath, offset: nextOffset });
+        if (mediaFilterKind.value) params.set('kind', mediaFilterKind.value);
+        if (mediaFilterName.value.trim()) params.set('q', mediaFilterName.value.trim());
 
         try {
-            const response = await fetch(`${listUrl}?post_path=${encodeURIComponent(postPath)}`);
+            const response = await fetch(`${listUrl}?${params}`);
             if (!response.ok) throw new Error(`Server error: ${response.statusText}`);
-            const files = await response.json();
-            if (files.error) throw new Error(files.error);
+            const data = await response.json();
+            if (data.error) throw new Error(data.error);
+            const files = data.files;
 
-            if (files.length === 0) {
+            if (!append && files.length === 0) {
                 mediaGrid.innerHTML = '<p>Nenhum arquivo encontrado. Faça o upload!</p>';
                 return;
             }
@@ -48,20 +66,27 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
                              data-file-url="${file.url}" 
                              data-file-name="${file.name}" 
                              data-is-image="${isImg}"
-                             data-is-video="${isVid}"> ${isImg ? 
-                                `<img src="${file.url}" alt="${file.name}" loading="lazy">` : 
+                             data-is-video="${isVid}"
+                             title="${describeFile(file)}"> ${isImg ? 
+                                `<img src="${file.thumb_url || file.url}" alt="${file.name}" loading="lazy">` : 
                                 (isVid ? 
                                     `<span class="video-icon">🎥</span>` : // NEW: Show video icon
                                     `<span class="file-icon">📄</span>`
                                 )
                             }
-                            <span class="file-name">${file.name}</span>
+                            <span class="file-name">${file.name}<span class="file-meta">${describeFile(file)}</span></span>
                         </div>
                         <button class="btn btn-danger btn-sm delete-media-btn" data-file-path="${file.path}" title="Delete File">X</button>
                     </div>
                 `;
             });
-            mediaGrid.innerHTML = gridHTML;
+            if (append) {
+                mediaGrid.insertAdjacentHTML('beforeend', gridHTML);
+            } else {
+                mediaGrid.innerHTML = gridHTML;
+            }
+            nextOffset = data.next_offset;
+            mediaLoadMoreBtn.hidden = nextOffset === null;
         } catch (error) {
             console.error('Error loading media:', error);
             mediaGrid.innerHTML = `<p class="text-danger">Error loading media: ${error.message}</p>`;
@@ -74,6 +99,20 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
         loadMediaFiles(postPath);
     });
 
+    mediaLoadMoreBtn.addEventListener('click', function() {
+        loadMediaFiles(currentPostPath, true);
+    });
+
+    // Filters reload the list; typing waits for a short pause
+    let filterTimer = null;
+    mediaFilterKind.addEventListener('change', function() {
+        loadMediaFiles(currentPostPath);
+    });
+    mediaFilterName.addEventListener('input', function() {
+        clearTimeout(filterTimer);
+        filterTimer = setTimeout(() => loadMediaFiles(currentPostPath), 300);
+    });
+
     mediaUploadForm.addEventListener('submit', async function(e) {
         e.preventDefault();
         
@@ -87,17 +126,24 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
         mediaUploadBtn.textContent = 'Uploading...';
         mediaStatusText.textContent = '';
 
-        const formData = new FormData();
-        formData.append('file', mediaFileInput.files[0]);
-        formData.append('post_path', currentPostPath); 
+        const file = mediaFileInput.files[0];
 
         try {
-            const response = await fetch(uploadUrl, {
-                method: 'POST',
-                body: formData,
-                headers: { 'X-CSRFToken': csrfToken }
-            });
-            const data = await response.json();
+            let data;
+            if (chunkedUploadUrl && file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                data = await uploadInChunks(file, currentPostPath);
+            } else {
+                const formData = new FormData();
+                formData.append('file', file);
+                formData.append('post_path', currentPostPath); 
+
+                const response = await fetch(uploadUrl, {
+                    method: 'POST',
+                    body: formData,
+                    headers: { 'X-CSRFToken': csrfToken }
+                });
+                data = await response.json();
+            }
             if (data.error) throw new Error(data.error);
 
             mediaStatusText.textContent = 'Upload successful!';
@@ -120,6 +166,11 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
             insertTextAtCursor(insertCode);
             loadMediaFiles(currentPostPath);
 
+            // Thumbnails, previews and checksum are made in the background
+            if (data.jobs && data.jobs.length > 0) {
+                watchJobs(data.jobs);
+            }
+
         } catch (error) {
             console.error('Upload failed:', error);
             mediaStatusText.textContent = `Upload failed: ${error.message}`;
@@ -178,7 +229,116 @@ function initializeMediaLibrary(editorInstance, getPostPathCallback) {
         }
     });
 
-    // --- 4. Helper Functions ---
+    // --- 4. Background Job Status ---
+    // Polls each job's status_url until every job is 'done' or 'failed'
+    async function watchJobs(jobs) {
+        const pending = new Set(jobs.map(job => job.status_url));
+        const failed = [];
+        mediaStatusText.textContent = 'Upload successful! Processing file...';
+
+        for (let attempt = 0; attempt < 120 && pending.size > 0; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            for (const statusUrl of [...pending]) {
+                try {
+                    const response = await fetch(statusUrl);
+                    const job = await response.json();
+                    if (job.status === 'done' || job.status === 'failed' || job.error === 'Job not found') {
+                        pending.delete(statusUrl);
+                        if (job.status === 'failed') failed.push(`${job.kind}: ${job.error}`);
+                    }
+                } catch (error) {
+                    console.error('Could not check job status:', error);
+                }
+            }
+        }
+
+        if (failed.length > 0) {
+            mediaStatusText.textContent = `Upload successful, but processing failed (${failed.join('; ')})`;
+            mediaStatusText.className = 'text-warning';
+        } else if (pending.size > 0) {
+            mediaStatusText.textContent = 'Upload successful! Processing is still running in the background.';
+        } else {
+            mediaStatusText.textContent = 'Upload successful! File processed.';
+            loadMediaFiles(currentPostPath);
+        }
+    }
+
+    // --- 5. Chunked Uploads ---
+    // Sends a large file in pieces, each with its SHA-256 when the browser can
+    // compute it. After a network error the upload resumes from the offset the
+    // server reports, so only the interrupted chunk is sent again.
+    async function uploadInChunks(file, postPath) {
+        const start = await fetch(chunkedUploadUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken },
+            body: JSON.stringify({ filename: file.name, post_path: postPath, size: file.size })
+        });
+        const upload = await start.json();
+        if (upload.error) throw new Error(upload.error);
+
+        let offset = 0;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            const headers = { 'X-CSRFToken': csrfToken, 'Content-Type': 'application/octet-stream' };
+            const checksum = await sha256Hex(chunk);
+            if (checksum) headers['X-Chunk-SHA256'] = checksum;
+
+            try {
+                const response = await fetch(`${upload.upload_url}?offset=${offset}`, {
+                    method: 'PUT', headers: headers, body: chunk
+                });
+                const result = await response.json();
+                if (response.ok) {
+                    offset = result.offset;
+                    retries = 0;
+                } else if (result.offset !== null && result.offset !== undefined && retries < 5) {
+                    offset = result.offset; // Wrong offset, or a damaged chunk: resend from where the server is
+                    retries++;
+                } else {
+                    throw new Error(result.error);
+                }
+            } catch (error) {
+                if (!(error instanceof TypeError) || retries >= 5) throw error;
+                // Network error: wait, then ask the server how much it has
+                retries++;
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                const status = await (await fetch(upload.upload_url)).json();
+                if (status.error) throw new Error(status.error);
+                offset = status.offset;
+            }
+            mediaUploadBtn.textContent = `Uploading... ${Math.floor(offset * 100 / file.size)}%`;
+        }
+
+        const finish = await fetch(upload.finalize_url, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrfToken }
+        });
+        return await finish.json();
+    }
+
+    // crypto.subtle only exists on HTTPS (and localhost); chunks are then sent unchecked
+    async function sha256Hex(blob) {
+        if (!window.crypto || !window.crypto.subtle) return null;
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    // --- 6. Helper Functions ---
+    // E.g. "1280×720 · 245 KB"
+    function describeFile(file) {
+        const parts = [];
+        if (file.width && file.height) parts.push(`${file.width}×${file.height}`);
+        if (file.size !== null && file.size !== undefined) parts.push(formatSize(file.size));
+        return parts.join(' · ');
+    }
+
+    function formatSize(bytes) {
+        if (bytes < 1024) return `${bytes} B`;
+        if (bytes < 1024 * 1024) return `${Math.round(bytes / 1024)} KB`;
+        return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+    }
+
     function isImage(filename) {
         return /\.(jpe?g|png|gif|webp|svg)$/i.test(filename);
     }
@@ -1,107 +1,178 @@
-// Import the PDF.js library components needed.
-// Assumes pdf.mjs is located relative to this script file.
-import * as pdfjsLib from '../pdfjs/build/pdf.mjs'; //
+// Turns every <a class="pdf-embed" href="....pdf"> into an inline viewer that
+// only loads the pages scrolled into view. Uploaded PDFs are described by
+// /api/pdf-pages/<path> (page count, sizes and, when the server rendered them,
+// one image per page); PDF.js is only downloaded for pages without an image.
 
-// Wait until the basic HTML structure of the page is ready.
-document.addEventListener("DOMContentLoaded", function() {
-    
-    // Set the path to the PDF.js worker script. This is required by the library.
-    // The path should be relative to the web server's root.
-    pdfjsLib.GlobalWorkerOptions.workerSrc = '/static/pdfjs/build/pdf.worker.mjs'; //
+// --- PDF.js, imported on first use ---
+let pdfjsPromise = null;
+function loadPdfjs() {
+    if (!pdfjsPromise) {
+        // Assumes pdf.mjs is located relative to this script file.
+        pdfjsPromise = import('../pdfjs/build/pdf.mjs').then(pdfjsLib => {
+            // Set the path to the PDF.js worker script. This is required by the library.
+            // The path should be relative to the web server's root.
+            pdfjsLib.GlobalWorkerOptions.workerSrc = '/static/pdfjs/build/pdf.worker.mjs';
+            return pdfjsLib;
+        });
+    }
+    return pdfjsPromise;
+}
 
+// --- Visibility ---
+// One observer for every viewer and page; callbacks run once, a screen or so
+// before the element is reached. Hidden elements (e.g. a closed accordion) never run.
+const visibleCallbacks = new WeakMap();
+const visibilityObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            visibilityObserver.unobserve(entry.target);
+            visibleCallbacks.get(entry.target)();
+        }
+    });
+}, { rootMargin: '800px 0px' }) : null;
+
+function whenVisible(element, callback) {
+    if (!visibilityObserver) {
+        callback(); // Old browsers: load everything
+        return;
+    }
+    visibleCallbacks.set(element, callback);
+    visibilityObserver.observe(element);
+}
+
+// --- Page Data ---
+// Returns the server's description of an uploaded PDF, or null (not an upload,
+// not processed yet, or the request failed) to let PDF.js read the PDF itself.
+async function fetchPageInfo(url) {
+    const location = new URL(url, window.location.href);
+    if (location.origin !== window.location.origin || !location.pathname.startsWith('/static/uploads/')) {
+        return null;
+    }
+    try {
+        const response = await fetch('/api/pdf-pages/' + location.pathname.slice('/static/'.length));
+        if (!response.ok) return null;
+        const info = await response.json();
+        return info.ready && info.pages ? info : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// --- Viewer ---
+async function loadViewer(viewerContainer, downloadBtn, url) {
+    const info = await fetchPageInfo(url);
+
+    // The document is opened at most once, and only if a page needs PDF.js.
+    // Without auto-fetch, PDF.js requests just the byte ranges of the pages it renders.
+    let pdfPromise = null;
+    const getPdf = () => {
+        if (!pdfPromise) {
+            pdfPromise = loadPdfjs().then(pdfjsLib =>
+                pdfjsLib.getDocument({ url: url, disableAutoFetch: true, disableStream: true }).promise);
+        }
+        return pdfPromise;
+    };
+
+    let sizes = null;
+    if (info) {
+        // Only the first pages are sized; later ones are assumed like the first
+        const first = info.sizes[0] || [612, 792];
+        sizes = Array.from({ length: info.pages }, (_, index) => info.sizes[index] || first);
+    } else {
+        try {
+            // Page count from PDF.js; every placeholder gets the first page's shape until rendered
+            const pdf = await getPdf();
+            const firstPage = (await pdf.getPage(1)).getViewport({ scale: 1 });
+            sizes = Array.from({ length: pdf.numPages }, () => [firstPage.width, firstPage.height]);
+        } catch (reason) {
+            // Log the error reason to the console.
+            console.error("Error loading PDF:", reason);
+            // Display an error message inside the viewer container.
+            viewerContainer.textContent = "Error: Could not load PDF.";
+            return;
+        }
+    }
+
+    // One placeholder per page, sized like the page so the scrollbar doesn't jump
+    sizes.forEach(([width, height], index) => {
+        const pageNum = index + 1;
+        const placeholder = document.createElement('div');
+        placeholder.classList.add('pdf-page');
+        placeholder.style.aspectRatio = `${width} / ${height}`;
+        viewerContainer.insertBefore(placeholder, downloadBtn);
+
+        whenVisible(placeholder, () => {
+            const previewUrl = info && info.preview_urls[index];
+            if (previewUrl) {
+                const image = document.createElement('img');
+                image.src = previewUrl;
+                image.alt = `Página ${pageNum}`;
+                image.decoding = 'async';
+                placeholder.appendChild(image);
+            } else {
+                renderPage(getPdf, pageNum, placeholder);
+            }
+        });
+    });
+}
+
+// Renders one page onto a <canvas> inside its placeholder.
+async function renderPage(getPdf, pageNum, placeholder) {
+    try {
+        const page = await (await getPdf()).getPage(pageNum);
+
+        // --- Prepare Canvas for Rendering ---
+        const scale = 1.5; // Rendering scale factor (higher = better quality, larger size).
+        const viewport = page.getViewport({ scale: scale });
+        const canvas = document.createElement('canvas');
+        canvas.height = viewport.height;
+        canvas.width = viewport.width;
+        placeholder.appendChild(canvas);
+        placeholder.style.aspectRatio = `${viewport.width} / ${viewport.height}`;
+
+        // --- Render the Page ---
+        await page.render({ canvasContext: canvas.getContext('2d'), viewport: viewport }).promise;
+    } catch (pageReason) {
+        // Log an error if rendering a specific page fails.
+        console.error(`Error rendering page ${pageNum}:`, pageReason);
+        const errorMsg = document.createElement('p');
+        errorMsg.textContent = `Error loading page ${pageNum}.`;
+        errorMsg.style.color = 'red';
+        placeholder.style.aspectRatio = '';
+        placeholder.appendChild(errorMsg);
+    }
+}
+
+// Runs once the basic HTML structure of the page is ready. This module is
+// imported on demand by base_layout.html, sometimes after that has happened.
+function embedPdfs() {
     // Find all anchor (<a>) tags in the document that have the class 'pdf-embed'.
     // These links are expected to point directly to PDF files.
-    const pdfLinks = document.querySelectorAll('a.pdf-embed'); //
+    document.querySelectorAll('a.pdf-embed').forEach(link => {
+        const url = link.href;
 
-    // Iterate over each found PDF link.
-    pdfLinks.forEach(link => {
-        // Get the URL (href attribute) of the PDF file from the link.
-        const url = link.href; //
-        
         // --- Create DOM elements for the viewer ---
-        
-        // 1. Create the main container div for this PDF instance.
         const viewerContainer = document.createElement('div');
         viewerContainer.classList.add('pdf-viewer-container'); // Apply styling from pdf-viewer.css
-        
-        // 2. Create a download button.
+
         const downloadBtn = document.createElement('a');
         downloadBtn.href = url; // Link directly to the PDF file.
-        downloadBtn.textContent = 'Fazer Download do PDF'; // Button text.
-        downloadBtn.classList.add('pdf-download-btn'); // Apply styling.
+        downloadBtn.textContent = 'Fazer Download do PDF';
+        downloadBtn.classList.add('pdf-download-btn');
         // Extract the filename from the URL to suggest it for download.
-        downloadBtn.setAttribute('download', url.split('/').pop()); //
-        
-        // 3. Add the download button *inside* the main container.
-        viewerContainer.appendChild(downloadBtn); //
-        
-        // --- Replace the original link with the viewer container ---
-        // Find the parent node of the original link and replace the link with our new container.
-        link.parentNode.replaceChild(viewerContainer, link); //
-
-        // --- Asynchronous function to render all pages of a loaded PDF ---
-        // Takes a loaded PDF document object as input.
-        const renderAllPages = async (pdf) => {
-            // Loop through each page number, from 1 to the total number of pages.
-            for (let pageNum = 1; pageNum <= pdf.numPages; pageNum++) { //
-                try {
-                    // Asynchronously get the specific page object from the PDF document.
-                    const page = await pdf.getPage(pageNum); //
-                    
-                    // --- Prepare Canvas for Rendering ---
-                    const scale = 1.5; // Rendering scale factor (higher = better quality, larger size).
-                    // Get the viewport dimensions at the desired scale.
-                    const viewport = page.getViewport({ scale: scale }); //
-
-                    // Create a <canvas> element specifically for this page.
-                    const canvas = document.createElement('canvas'); //
-                    const context = canvas.getContext('2d'); // Get the 2D drawing context.
-                    // Set the canvas dimensions to match the PDF page's viewport.
-                    canvas.height = viewport.height; //
-                    canvas.width = viewport.width; //
-
-                    // Add the canvas to the DOM, placing it *before* the download button within the container.
-                    viewerContainer.insertBefore(canvas, downloadBtn); //
-
-                    // --- Render the Page ---
-                    // Define the rendering parameters.
-                    const renderContext = {
-                        canvasContext: context, // The canvas context to draw on.
-                        viewport: viewport      // The dimensions and scale to use.
-                    };
-                    // Asynchronously render the PDF page onto the canvas.
-                    // .promise ensures we wait until rendering is complete before logging.
-                    await page.render(renderContext).promise; //
-                    // console.log(`Page ${pageNum} rendered`); // Optional: Log success
-
-                } catch (pageReason) {
-                    // Log an error if rendering a specific page fails.
-                    console.error(`Error rendering page ${pageNum}:`, pageReason);
-                    // Optionally, display an error message for this specific page in the container.
-                    const errorMsg = document.createElement('p');
-                    errorMsg.textContent = `Error loading page ${pageNum}.`;
-                    errorMsg.style.color = 'red';
-                    viewerContainer.insertBefore(errorMsg, downloadBtn);
-                }
-            }
-        };
-
-        // --- Initialize PDF.js Loading ---
-        // Start the process of fetching and parsing the PDF document from the URL.
-        const loadingTask = pdfjsLib.getDocument(url); //
-        // Handle the promise returned by getDocument.
-        loadingTask.promise.then(
-            function(pdf) { // Success handler: called when the PDF is loaded and parsed.
-                // console.log('PDF loaded'); // Optional: Log success
-                // Call the function to render all pages into the container.
-                renderAllPages(pdf); //
-            }, 
-            function (reason) { // Error handler: called if loading/parsing fails.
-                // Log the error reason to the console.
-                console.error("Error loading PDF:", reason); //
-                // Display an error message inside the viewer container.
-                viewerContainer.textContent = "Error: Could not load PDF."; //
-            }
-        );
+        downloadBtn.setAttribute('download', url.split('/').pop());
+        viewerContainer.appendChild(downloadBtn);
+
+        // Replace the original link with the viewer container.
+        link.parentNode.replaceChild(viewerContainer, link);
+
+        // Nothing is downloaded until the viewer is about to be seen
+        whenVisible(viewerContainer, () => loadViewer(viewerContainer, downloadBtn, url));
     });
-});
\ No newline at end of file
+}
+
+if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", embedPdfs);
+} else {
+    embedPdfs();
+}
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Exported Pages ---
+# Public pages that don't depend on a specific post
+STATIC_URLS = ['/', '/news', '/news-awards', '/news-general', '/months-problems',
+               '/materials', '/about', '/faq', '/contact']
+
+# Listing pages that show posts from each section (by path prefix)
+SECTION_URLS = {
+    'news/awards/': ['/', '/news', '/news-awards'],
+    'news/others/': ['/', '/news', '/news-general'],
+    'months-problems/': ['/', '/months-problems'],
+}
+
+# Paginated listings (URL -> post index section); page N lives at '<url>/page/N'
+PAGINATED_URLS = {
+    '/news-awards': 'news/awards',
+    '/news-general': 'news/others',
+    '/months-problems': 'months-problems/solved',
+}
+
+# --- Helpers ---
+def post_url(path):
+    return f'/post/{path}'
+
+def output_file(out_dir, url):
+    """Maps a URL to the file nginx serves for it (e.g. '/news' -> 'news/index.html')."""
+    return os.path.join(out_dir, url.strip('/'), 'index.html')
+
+def normalize_post_path(path):
+    """Accepts 'news/others/x', 'posts/news/others/x.md' or similar and returns the page path."""
+    path = path.replace('\\', '/').strip('/')
+    if path.startswith('posts/'):
+        path = path[len('posts/'):]
+    if path.endswith('.md'):
+        path = path[:-len('.md')]
+    return path
+
+def affected_urls(path):
+    """Returns every public URL whose HTML depends on the given post."""
+    urls = [post_url(path)]
+    for prefix, listing_urls in SECTION_URLS.items():
+        if path.startswith(prefix):
+            urls.extend(listing_urls)
+    return urls
+
+def expand_pages(app, urls):
+    """Adds the extra pages of every paginated listing in `urls`.
+
+    One page past the last is included too, so a page left over from a
+    longer listing (e.g. after a post is deleted) is removed from the export.
+    """
+    from routes import post_index # Imported here so the app is fully set up first
+
+    expanded = []
+    per_page = app.config.get('POSTS_PER_PAGE', 12)
+    for url in urls:
+        expanded.append(url)
+        section = PAGINATED_URLS.get(url)
+        if section:
+            with app.app_context():
+                _, page_count = post_index.page(section, 1, per_page)
+            expanded.extend(f'{url}/page/{number}' for number in range(2, page_count + 2))
+    return expanded
+
+def _write_atomic(filepath, data):
+    # Write to a temporary file and swap it in, so nginx never serves a partial page
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, filepath)
+
+def _remove(filepath):
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+# --- Export ---
+def export_urls(app, out_dir, urls, base_url='http://localhost'):
+    """Renders each URL as an anonymous visitor and writes it under out_dir.
+
+    Pages that no longer exist (404) are removed from the export.
+    Returns the number of pages written.
+    """
+    client = app.test_client()
+    written = 0
+    for url in dict.fromkeys(urls): # Skip duplicates, keep order
+        filepath = output_file(out_dir, url)
+        # A fresh app context keeps the logged-in admin (stored on `g`) out of the
+        # exported page when this runs from inside one of their requests.
+        with app.app_context():
+            response = client.get(url, base_url=base_url)
+        if response.status_code == 200:
+            _write_atomic(filepath, response.get_data())
+            written += 1
+        elif response.status_code == 404:
+            _remove(filepath)
+        else:
+            logger.warning("Skipping %s: got HTTP %s", url, response.status_code)
+    return written
+
+def export_all(app, out_dir, base_url='http://localhost'):
+    """Exports every public page and every published post."""
+    from routes import pages # Imported here so the app is fully set up first
+
+    with app.app_context():
+        post_paths = [p.path for p in pages if p.meta.get('status') == 'published']
+    urls = expand_pages(app, STATIC_URLS) + [post_url(path) for path in sorted(post_paths)]
+    return export_urls(app, out_dir, urls, base_url)
+
+def export_changed(app, out_dir, post_paths=(), materials=False, base_url='http://localhost'):
+    """Re-exports only the pages affected by the given posts (and materials, if changed)."""
+    urls = []
+    for path in post_paths:
+        urls.extend(affected_urls(normalize_post_path(path)))
+    if materials:
+        urls.append('/materials')
+    return export_urls(app, out_dir, expand_pages(app, dict.fromkeys(urls)), base_url)
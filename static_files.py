@@ -0,0 +1,105 @@
+import os
+import re
+import mimetypes
+from urllib.parse import quote
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+from asset_manifest import HASH_LENGTH
+
+# Precompressed siblings, in order of preference when the browser accepts both
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Text formats worth compressing ahead of time (see compress_static.py)
+COMPRESSIBLE_EXTENSIONS = {'css', 'js', 'mjs', 'map', 'json', 'svg', 'html', 'txt', 'xml',
+                           'ftl', 'bcmap', 'pfb', 'ttf', 'otf', 'wasm'}
+
+# Files whose name changes whenever their contents do, so they can be cached forever:
+# uploaded blobs, the resized image variants (named '<name>-<hash>-<width>.<format>')
+# and the fingerprinted copies of the site's own files (see asset_manifest.py)
+IMMUTABLE_PATTERNS = [
+    re.compile(r'^uploads/_blobs/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$'),
+    re.compile(r'^uploads/_variants/.+-[0-9a-f]{8}-\d+\.(?:webp|avif)$'),
+    re.compile(r'^(?!uploads/).+\.[0-9a-f]{%d}\.\w+$' % HASH_LENGTH),
+]
+# A year, the longest lifetime caches honor
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# --- Static Files ---
+# Replaces Flask's `static` view for when no proxy serves /static/ itself:
+#
+#   * Range requests (video seeking, PDF.js loading a PDF in pieces) come from
+#     werkzeug's send_file, as before.
+#   * '.br'/'.gz' siblings made by `python compress_static.py` are sent to
+#     browsers that accept them, instead of compressing on every request.
+#   * Fingerprinted files (IMMUTABLE_PATTERNS) get `Cache-Control: immutable`
+#     for a year; everything else is revalidated with its ETag.
+#   * With STATIC_OFFLOAD='x-accel' (nginx) or 'x-sendfile' (Apache, lighttpd)
+#     the app only checks the path and sets the headers, and the server sends
+#     the bytes without holding a Gunicorn worker.
+class StaticFiles:
+    def __init__(self):
+        self.static_folder = None
+        self.offload = None
+        self.accel_prefix = None
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.offload = (app.config.get('STATIC_OFFLOAD') or 'off').lower()
+        if self.offload not in ('off', 'x-accel', 'x-sendfile'):
+            raise ValueError(f"Unknown STATIC_OFFLOAD: {self.offload!r}")
+        if self.offload == 'x-sendfile':
+            app.config['USE_X_SENDFILE'] = True
+        self.accel_prefix = '/' + (app.config.get('STATIC_ACCEL_PREFIX') or '/static-internal/').strip('/') + '/'
+        app.view_functions['static'] = self.serve
+
+    def is_immutable(self, filename):
+        return any(pattern.match(filename) for pattern in IMMUTABLE_PATTERNS)
+
+    # --- View ---
+    def serve(self, filename):
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        if self.offload == 'x-accel':
+            # nginx serves the file from an `internal` location (ranges and gzip_static included)
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = self.accel_prefix + quote(filename)
+        else:
+            encoding, suffix = self._pick_encoding(path, filename)
+            # Flask's send_file emits X-Sendfile itself when USE_X_SENDFILE is on
+            response = send_file(path + suffix, mimetype=mimetype, conditional=True)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            if suffix or self._is_compressible(filename):
+                response.vary.add('Accept-Encoding')
+
+        if self.is_immutable(filename):
+            response.cache_control.no_cache = None # Set by send_file when no max age is configured
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    # --- Internals ---
+    @staticmethod
+    def _is_compressible(filename):
+        return filename.rsplit('.', 1)[-1].lower() in COMPRESSIBLE_EXTENSIONS
+
+    def _pick_encoding(self, path, filename):
+        """Returns (Content-Encoding, file suffix) of the best precompressed copy, or (None, '')."""
+        if not self._is_compressible(filename):
+            return None, ''
+        source_mtime = os.stat(path).st_mtime
+        available = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                # A sibling older than the file was made from a previous version
+                if os.stat(path + suffix).st_mtime >= source_mtime:
+                    available[encoding] = suffix
+            except OSError:
+                pass
+        if not available:
+            return None, ''
+        encoding = request.accept_encodings.best_match([e for e, _ in ENCODINGS if e in available])
+        return (encoding, available[encoding]) if encoding else (None, '')
@@ -0,0 +1,93 @@
+import os
+import re
+import shutil
+import subprocess
+import pytest
+from asset_bundles import BUNDLES, CRITICAL_CSS, build_bundles, extract_rules, minify_css, minify_js
+
+STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+CSS_FILES = sorted(os.listdir(os.path.join(STATIC, 'styles')))
+JS_FILES = sorted(name for name in os.listdir(os.path.join(STATIC, 'js')) if name.endswith('.js'))
+
+def read(*parts):
+    with open(os.path.join(STATIC, *parts), encoding='utf-8') as f:
+        return f.read()
+
+def without_whitespace(text):
+    return re.sub(r'\s+', '', text)
+
+def is_subsequence(short, long):
+    chars = iter(long)
+    return all(c in chars for c in short)
+
+# --- CSS ---
+@pytest.mark.parametrize('name', CSS_FILES)
+def test_minify_css_only_drops_whitespace_and_comments(name):
+    source = read('styles', name)
+    minified = minify_css(source)
+    # ';}' -> '}' is the one other change
+    expected = without_whitespace(re.sub(r'/\*.*?\*/', '', source, flags=re.S)).replace(';}', '}')
+    assert without_whitespace(minified) == expected
+    assert len(minified) < len(source)
+
+def test_minify_css_keeps_significant_spaces():
+    assert minify_css('a :hover { color: red; }') == 'a :hover{color:red}'
+    assert minify_css('.x { width: calc(100% - 2px); }') == '.x{width:calc(100% - 2px)}'
+    assert minify_css('a > b, c { margin: 0 auto; }') == 'a>b,c{margin:0 auto}'
+
+def test_minify_css_leaves_strings_alone():
+    assert minify_css('a::before { content: "  /* x */  ;  "; }') == 'a::before{content:"  /* x */  ;  "}'
+
+# --- JavaScript ---
+@pytest.mark.parametrize('name', JS_FILES)
+def test_minify_js_only_drops_whitespace_and_comments(name):
+    source = read('js', name)
+    minified = minify_js(source)
+    assert is_subsequence(without_whitespace(minified), without_whitespace(source))
+    assert len(minified) < len(source)
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="needs node to parse JavaScript")
+@pytest.mark.parametrize('name', JS_FILES)
+def test_minified_js_still_parses(name, tmp_path):
+    target = tmp_path / name
+    target.write_text(minify_js(read('js', name)), encoding='utf-8')
+    result = subprocess.run(['node', '--check', str(target)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_minify_js_keeps_line_breaks_for_asi():
+    assert minify_js('let a = 1\n\n    // note\nlet b = 2') == 'let a = 1\nlet b = 2'
+
+def test_minify_js_leaves_strings_regexes_and_templates_alone():
+    source = "const u = 'http://x' // c\nconst r = /a\\/\\/b[/]/g\nconst t = `a ${ {k: 1}.k } // b`"
+    assert minify_js(source) == "const u = 'http://x'\nconst r = /a\\/\\/b[/]/g\nconst t = `a ${ {k: 1}.k } // b`"
+
+# --- Critical CSS ---
+def test_extract_rules_keeps_matching_rules_and_their_media_queries():
+    css = minify_css('''
+        .post-meta span { margin: 0; }
+        .post-metadata { color: red; }
+        .footer, .post-title { font-weight: bold; }
+        @media (max-width: 700px) { .post-title { font-size: 2rem; } .footer { display: none; } }
+        @media print { .footer { display: none; } }
+    ''')
+    assert extract_rules(css, ('.post-meta', '.post-title')) == (
+        '.post-meta span{margin:0}.footer,.post-title{font-weight:bold}'
+        '@media (max-width:700px){.post-title{font-size:2rem}}'
+    )
+
+@pytest.mark.parametrize('page', sorted(CRITICAL_CSS))
+def test_critical_css_is_a_subset_of_the_page_styles(page, tmp_path):
+    static = tmp_path / 'static'
+    shutil.copytree(STATIC, static, ignore=shutil.ignore_patterns('uploads', 'bundles'))
+    sizes = build_bundles(str(static))
+
+    critical = (static / 'bundles' / f'{page}.critical.css').read_text(encoding='utf-8')
+    # The bundles the page loads after the first paint
+    full = ''.join((static / 'bundles' / name).read_text(encoding='utf-8') for name in ('site.css', f'{page}.css'))
+    assert critical
+    # Only above-the-fold rules: a fraction of the files they come from
+    before, after = sizes[f'{page}.critical.css']
+    assert after < before / 2
+    for rule in re.findall(r'[^{}]+\{[^{}]*\}', critical):
+        assert without_whitespace(rule) in without_whitespace(full)
+    assert set(BUNDLES) <= set(sizes)
@@ -0,0 +1,99 @@
+import io
+import os
+import sqlite3
+import hashlib
+import pytest
+from blob_store import BlobStore
+from chunked_upload import ChunkedUploads, UploadError
+
+DATA = b'%PDF-1.4 ' + bytes(range(256)) * 40
+
+@pytest.fixture
+def blobs(tmp_path):
+    store = BlobStore()
+    store.static_folder = str(tmp_path / 'static')
+    store.blobs_dir = str(tmp_path / 'static' / 'uploads' / '_blobs')
+    store.db_path = str(tmp_path / 'assets.sqlite3')
+    return store
+
+@pytest.fixture
+def uploads(tmp_path):
+    return ChunkedUploads(str(tmp_path / 'static' / 'uploads'), max_bytes=1024 * 1024, chunk_bytes=4096)
+
+def send(uploads, data, name='paper.pdf', folder='materials'):
+    upload_id = uploads.create(len(data), hashlib.sha256(data).hexdigest(), {'name': name, 'folder': folder})
+    offset = 0
+    while offset < len(data):
+        chunk = data[offset:offset + uploads.chunk_bytes]
+        offset = uploads.append(upload_id, offset, io.BytesIO(chunk), len(chunk))
+    return upload_id
+
+def leftovers(uploads, blobs):
+    """Files left in the partial folder and in the blob store's temp folder."""
+    tmp_dir = os.path.join(blobs.blobs_dir, 'tmp')
+    return sorted(os.listdir(uploads.partial_dir)) + sorted(os.listdir(tmp_dir))
+
+def stored_blobs(blobs):
+    return [name for root, _, names in os.walk(blobs.blobs_dir) if not root.endswith('tmp') for name in names]
+
+def test_chunks_resume_from_the_file_size(uploads):
+    upload_id = uploads.create(10)
+    assert uploads.append(upload_id, 0, io.BytesIO(b'abcd'), 4) == 4
+    with pytest.raises(UploadError) as error:
+        uploads.append(upload_id, 0, io.BytesIO(b'abcd'), 4)
+    assert (error.value.status, error.value.offset) == (409, 4)
+    assert uploads.status(upload_id) == {'offset': 4, 'size': 10}
+
+def test_finalize_stores_and_links(uploads, blobs):
+    upload_id = send(uploads, DATA)
+    meta, static_path, created = uploads.finalize(upload_id, blobs)
+    assert meta == {'name': 'paper.pdf', 'folder': 'materials'}
+    assert created
+    assert blobs.lookup('materials', 'paper.pdf') == static_path
+    with open(os.path.join(blobs.static_folder, static_path), 'rb') as f:
+        assert f.read() == DATA
+    assert leftovers(uploads, blobs) == []
+
+def test_finalize_incomplete_upload_stays_resumable(uploads, blobs):
+    upload_id = uploads.create(len(DATA))
+    uploads.append(upload_id, 0, io.BytesIO(DATA[:100]), 100)
+    with pytest.raises(UploadError) as error:
+        uploads.finalize(upload_id, blobs)
+    assert (error.value.status, error.value.offset) == (409, 100)
+    assert uploads.status(upload_id)['offset'] == 100
+
+def test_failed_link_removes_everything(uploads, blobs, monkeypatch):
+    upload_id = send(uploads, DATA)
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(blobs, 'link', locked)
+    with pytest.raises(sqlite3.OperationalError):
+        uploads.finalize(upload_id, blobs)
+    assert leftovers(uploads, blobs) == []
+    assert stored_blobs(blobs) == []
+    with pytest.raises(UploadError) as error:
+        uploads.status(upload_id)
+    assert error.value.status == 404
+
+def test_failed_store_removes_everything(uploads, blobs, monkeypatch):
+    upload_id = send(uploads, DATA)
+    def full_disk(*args):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(blobs, '_commit', full_disk)
+    with pytest.raises(OSError):
+        uploads.finalize(upload_id, blobs)
+    assert leftovers(uploads, blobs) == []
+    assert stored_blobs(blobs) == []
+
+def test_failed_link_keeps_an_existing_blob(uploads, blobs, monkeypatch):
+    # The same file is already stored and linked under another name
+    _, static_path, _ = uploads.finalize(send(uploads, DATA, 'first.pdf'), blobs)
+    upload_id = send(uploads, DATA, 'second.pdf')
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(blobs, 'link', locked)
+    with pytest.raises(sqlite3.OperationalError):
+        uploads.finalize(upload_id, blobs)
+    assert leftovers(uploads, blobs) == []
+    assert os.path.exists(os.path.join(blobs.static_folder, static_path))
+    assert blobs.lookup('materials', 'first.pdf') == static_path
@@ -0,0 +1,89 @@
+import pytest
+from flask import Flask
+import login_throttle
+from login_throttle import LoginThrottle, client_network
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(login_throttle.time, 'time', clock)
+    return clock
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def throttle(request, tmp_path, clock):
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.update(
+        LOGIN_THROTTLE_BACKEND=request.param,
+        LOGIN_THROTTLE_PATH=str(tmp_path / 'throttle.sqlite3'),
+        LOGIN_IP_BURST=3, LOGIN_IP_PER_MINUTE=6,
+        LOGIN_ACCOUNT_BURST=2, LOGIN_ACCOUNT_PER_MINUTE=1,
+    )
+    throttle = LoginThrottle()
+    throttle.init_app(app)
+    return throttle
+
+def test_client_network():
+    assert client_network('203.0.113.7') == '203.0.113.0/24'
+    assert client_network('2001:db8::1') == '2001:db8::/64'
+    assert client_network('unknown') == 'unknown'
+
+def test_ip_burst_then_wait(throttle, clock):
+    assert [throttle.check('203.0.113.7', f'user{i}') for i in range(3)] == [0, 0, 0]
+    # 6 per minute: the next token comes in 10 seconds
+    assert throttle.check('203.0.113.7', 'user3') == 10
+    assert throttle.refused == 1
+    # Other addresses have their own bucket
+    assert throttle.check('203.0.113.8', 'user3') == 0
+    clock.now += 10
+    assert throttle.check('203.0.113.7', 'user3') == 0
+
+def test_check_alone_never_locks_an_account(throttle, clock):
+    for _ in range(5):
+        assert throttle.check('203.0.113.7', 'a@b.c') == 0
+        clock.now += 10
+
+def test_failures_lock_the_account_for_that_network(throttle, clock):
+    throttle.failed('203.0.113.7', 'a@b.c')
+    throttle.failed('203.0.113.7', 'A@B.c ')
+    # Same account, same /24 (the address doesn't matter, nor the spelling)
+    assert throttle.check('203.0.113.9', 'a@b.c') == 60
+    # Another network, or another account, is not affected
+    assert throttle.check('198.51.100.1', 'a@b.c') == 0
+    assert throttle.check('203.0.113.10', 'other@b.c') == 0
+    clock.now += 60
+    assert throttle.check('203.0.113.11', 'a@b.c') == 0
+
+def test_success_forgets_the_failures(throttle):
+    throttle.failed('203.0.113.7', 'a@b.c')
+    throttle.failed('203.0.113.7', 'a@b.c')
+    throttle.succeeded('203.0.113.7', 'a@b.c')
+    assert throttle.check('203.0.113.7', 'a@b.c') == 0
+
+def test_off_backend_allows_everything(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config['LOGIN_THROTTLE_BACKEND'] = 'off'
+    throttle = LoginThrottle()
+    throttle.init_app(app)
+    throttle.failed('203.0.113.7', 'a@b.c')
+    assert all(throttle.check('203.0.113.7', 'a@b.c') == 0 for _ in range(50))
+
+def test_backend_errors_do_not_lock_anyone_out(throttle, monkeypatch):
+    def broken(*args, **kwargs):
+        raise login_throttle.sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(throttle.backend, 'take', broken)
+    assert throttle.check('203.0.113.7', 'a@b.c') == 0
+
+def test_sqlite_buckets_are_shared(tmp_path, clock):
+    path = str(tmp_path / 'shared.sqlite3')
+    # Two workers, one file
+    first, second = login_throttle.SQLiteBuckets(path), login_throttle.SQLiteBuckets(path)
+    assert first.take('ip:x', 2, 1) == 0
+    assert second.take('ip:x', 2, 1) == 0
+    assert first.take('ip:x', 2, 1) == 1
@@ -0,0 +1,99 @@
+import pytest
+from flask import Flask
+from sqlalchemy import select
+import material_order
+from material_order import OrderError
+from models import db, Material
+
+@pytest.fixture
+def materials():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        rows = [Material(title=f'M{i}', description='', pdf_path=f'uploads/m{i}.pdf', position=i) for i in range(5)]
+        db.session.add_all(rows)
+        db.session.commit()
+        yield [row.id for row in rows]
+        db.session.remove()
+
+def titles():
+    return [row.title for row in db.session.execute(
+        select(Material.title).order_by(*material_order.PAGE_ORDER))]
+
+def positions():
+    return [position for _, position in material_order.current_order()]
+
+# --- reorder() ---
+def test_reorder_writes_only_the_changed_positions(materials):
+    a, b, c, d, e = materials
+    assert material_order.reorder([a, b, d, c, e]) == 2
+    db.session.commit()
+    assert titles() == ['M0', 'M1', 'M3', 'M2', 'M4']
+    assert positions() == [0, 1, 2, 3, 4]
+
+def test_reorder_in_chunks(materials, monkeypatch):
+    monkeypatch.setattr(material_order, 'MAX_CASE_ROWS', 2)
+    assert material_order.reorder(list(reversed(materials))) == 4
+    assert titles() == ['M4', 'M3', 'M2', 'M1', 'M0']
+
+@pytest.mark.parametrize('order, status', [
+    ('not a list', 400),
+    ([1, 2], 400),
+])
+def test_reorder_rejects_malformed_requests(materials, order, status):
+    with pytest.raises(OrderError) as error:
+        material_order.reorder(order)
+    assert error.value.status == status
+
+def test_reorder_rejects_duplicates(materials):
+    with pytest.raises(OrderError) as error:
+        material_order.reorder(materials[:4] + materials[:1])
+    assert error.value.status == 400
+
+def test_reorder_rejects_an_outdated_list(materials):
+    with pytest.raises(OrderError) as error:
+        material_order.reorder(materials[:4])
+    assert error.value.status == 409
+    assert titles() == ['M0', 'M1', 'M2', 'M3', 'M4']
+
+# --- move() ---
+@pytest.mark.parametrize('source, target, expected, changed', [
+    (0, 3, ['M1', 'M2', 'M3', 'M0', 'M4'], 4),
+    (4, 1, ['M0', 'M4', 'M1', 'M2', 'M3'], 4),
+    (2, 2, ['M0', 'M1', 'M2', 'M3', 'M4'], 0),
+])
+def test_move_shifts_only_the_rows_in_between(materials, source, target, expected, changed):
+    assert material_order.move(materials[source], target) == changed
+    db.session.commit()
+    assert titles() == expected
+    assert positions() == [0, 1, 2, 3, 4]
+
+def test_move_renumbers_legacy_positions_first(materials):
+    # Rows from before positions were kept dense: all at 0
+    db.session.execute(Material.__table__.update().values(position=0))
+    order = titles()
+    material_order.move(materials[0], 4)
+    assert positions() == [0, 1, 2, 3, 4]
+    assert titles()[-1] == 'M0'
+    assert [title for title in titles() if title != 'M0'] == [title for title in order if title != 'M0']
+
+@pytest.mark.parametrize('item, index, status', [
+    ('missing', 0, 404),
+    (None, 0, 400),
+    ('first', 5, 400),
+    ('first', -1, 400),
+    ('first', True, 400),
+])
+def test_move_rejects_bad_requests(materials, item, index, status):
+    item_id = materials[0] if item == 'first' else item
+    with pytest.raises(OrderError) as error:
+        material_order.move(item_id, index)
+    assert error.value.status == status
+
+def test_close_gap_keeps_positions_dense(materials):
+    db.session.delete(db.session.get(Material, materials[1]))
+    material_order.close_gap(1)
+    assert positions() == [0, 1, 2, 3]
+    assert material_order.next_position() == 4
@@ -0,0 +1,97 @@
+import pytest
+from flask import Flask
+from content_store import ContentStore
+from post_index import PostIndex, make_cursor, parse_cursor
+from datetime import date
+
+def write_post(root, path, title, day, status='published', extra=''):
+    filename = root / f'{path}.md'
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    filename.write_text(f"---\ntitle: {title}\ndate: {day}\nstatus: {status}\n{extra}---\n\nbody\n", encoding='utf-8')
+
+@pytest.fixture
+def posts(tmp_path):
+    root = tmp_path / 'posts'
+    # Two posts share a day, so the path has to break the tie
+    write_post(root, 'news/awards/a', 'A', '2025-01-01')
+    write_post(root, 'news/others/b', 'B', '2025-02-01')
+    write_post(root, 'news/others/c', 'C', '2025-02-01')
+    write_post(root, 'news/awards/d', 'D', '2025-03-01')
+    write_post(root, 'news/others/e', 'E', '2025-04-01', status='draft')
+    write_post(root, 'months-problems/p', 'P', '2025-01-15', extra='is_solved: true\n')
+    write_post(root, 'months-problems/q', 'Q', '2025-02-15')
+    return root
+
+@pytest.fixture
+def pages(posts):
+    app = Flask(__name__)
+    app.config.update(FLATPAGES_ROOT=str(posts), FLATPAGES_EXTENSION='.md', FLATPAGES_AUTO_RELOAD=False)
+    store = ContentStore(app)
+    with app.app_context():
+        yield store
+
+def paths(posts):
+    return [page.path for page in posts]
+
+# --- Sections ---
+def test_sections_are_sorted_newest_first(pages):
+    index = PostIndex(pages)
+    assert paths(index.section('news')) == ['news/awards/d', 'news/others/c', 'news/others/b', 'news/awards/a']
+    assert paths(index.section('drafts')) == ['news/others/e']
+    assert paths(index.section('months-problems/open')) == ['months-problems/q']
+    assert paths(index.section('months-problems/solved')) == ['months-problems/p']
+
+def test_page_counts_pages_and_keeps_one_empty_page(pages):
+    index = PostIndex(pages)
+    posts, page_count = index.page('news', 2, 3)
+    assert paths(posts) == ['news/awards/a'] and page_count == 2
+    assert index.page('news/awards', 1, 10)[1] == 1
+    assert index.page('months-problems/solved', 1, 10)[1] == 1
+
+# --- Cursors ---
+def test_cursor_round_trip(pages):
+    page = pages.get('news/others/b')
+    assert make_cursor(page) == '2025-02-01:news/others/b'
+    assert parse_cursor(make_cursor(page)) == (date(2025, 2, 1), 'news/others/b')
+
+@pytest.mark.parametrize('cursor', ['', 'yesterday', '2025-13-01:x'])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        parse_cursor(cursor)
+
+def test_cursors_walk_every_post_once(pages):
+    index = PostIndex(pages)
+    seen, batch = [], index.section('news')[:1]
+    while batch:
+        seen += paths(batch)
+        batch = index.older_than('news', parse_cursor(make_cursor(batch[-1])), 1)
+    assert seen == paths(index.section('news'))
+
+def test_bare_date_cursor_skips_that_whole_day(pages):
+    index = PostIndex(pages)
+    older = index.older_than('news', parse_cursor('2025-02-01'), 10)
+    assert paths(older) == ['news/awards/a']
+
+# --- Staleness ---
+def test_index_follows_content_store_changes(pages, posts):
+    index = PostIndex(pages)
+    assert paths(index.section('news/awards')) == ['news/awards/d', 'news/awards/a']
+    built = index.generation
+
+    # Nothing changed on disk: a re-walk keeps the index
+    pages.reload()
+    index.section('news')
+    assert index.generation == built
+
+    write_post(posts, 'news/awards/f', 'F', '2025-05-01')
+    pages.update('news/awards/f')
+    assert paths(index.section('news/awards'))[0] == 'news/awards/f'
+
+    (posts / 'news/awards/d.md').unlink()
+    pages.update('news/awards/d')
+    assert 'news/awards/d' not in paths(index.section('news'))
+
+    version = index.version
+    pages.write('news/others/e', "---\ntitle: E\ndate: 2025-04-01\nstatus: published\n---\n\nbody\n")
+    assert 'news/others/e' in paths(index.section('news/others'))
+    assert index.version != version
@@ -0,0 +1,82 @@
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+from response_cache import ResponseCache, key_url
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def site(request, tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.update(SECRET_KEY='test', RESPONSE_CACHE_BACKEND=request.param)
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: None)
+
+    cache = ResponseCache()
+    cache.init_app(app)
+    renders = []
+    versions = {'page': 1}
+
+    @app.route('/page')
+    @cache.cached('posts', version=lambda **kwargs: versions['page'])
+    def page():
+        renders.append('page')
+        return f'page {len(renders)}'
+
+    @app.route('/other')
+    @cache.cached('materials')
+    def other():
+        renders.append('other')
+        return f'other {len(renders)}'
+
+    app.cache, app.renders, app.versions = cache, renders, versions
+    return app
+
+def get(app, path, host='nemo.example.org'):
+    return app.test_client().get(path, base_url=f'http://{host}').get_data(as_text=True)
+
+def test_key_url():
+    assert key_url('nemo.example.org/news?page=2') == '/news?page=2'
+    assert key_url('localhost:5000/') == '/'
+
+def test_pages_are_cached_per_host(site):
+    assert get(site, '/page') == 'page 1'
+    assert get(site, '/page') == 'page 1'
+    # Another host renders (and caches) its own copy, with its own links
+    assert get(site, '/page', 'www.example.org') == 'page 2'
+    assert get(site, '/page', 'www.example.org') == 'page 2'
+    assert get(site, '/page') == 'page 1'
+    assert site.renders == ['page', 'page']
+
+def test_query_strings_are_separate_entries(site):
+    assert get(site, '/page?p=1') == 'page 1'
+    assert get(site, '/page?p=2') == 'page 2'
+    assert get(site, '/page?p=1') == 'page 1'
+
+def test_invalidate_drops_the_url_on_every_host(site):
+    get(site, '/page')
+    get(site, '/page', 'www.example.org')
+    get(site, '/other')
+    site.cache.invalidate(['/page'])
+    assert get(site, '/page') == 'page 4'
+    assert get(site, '/page', 'www.example.org') == 'page 5'
+    # Other URLs are kept
+    assert get(site, '/other') == 'other 3'
+
+def test_invalidate_group(site):
+    get(site, '/page')
+    get(site, '/other')
+    site.cache.invalidate(group='materials')
+    assert get(site, '/page') == 'page 1'
+    assert get(site, '/other') == 'other 3'
+
+def test_content_version_change_rerenders(site):
+    assert get(site, '/page') == 'page 1'
+    site.versions['page'] = 2
+    assert get(site, '/page') == 'page 2'
+    assert get(site, '/page') == 'page 2'
+
+def test_flashed_messages_bypass_the_cache(site):
+    client = site.test_client()
+    assert client.get('/page').get_data(as_text=True) == 'page 1'
+    with client.session_transaction() as session:
+        session['_flashes'] = [('message', 'Saved')]
+    assert client.get('/page').get_data(as_text=True) == 'page 2'
@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+import threading
+from collections import namedtuple
+from flask_login import UserMixin
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+# What current_user needs on a request: the columns, without the password hash.
+# Routes that change the account (or check its password) load the User model.
+class UserSnapshot(namedtuple('UserSnapshot', ['id', 'email', 'name', 'about_me', 'profile_image_path']), UserMixin):
+    @classmethod
+    def of(cls, user):
+        return cls(user.id, user.email, user.name, user.about_me, user.profile_image_path)
+
+# What a post page shows of its author
+AuthorCard = namedtuple('AuthorCard', ['name', 'about_me', 'profile_image_path'])
+
+# --- User Cache ---
+# Flask-Login loads the user on every authenticated request, and every post
+# view looks up its author by email. Both are answered from this worker's
+# memory, so neither costs a query:
+#
+#   * load(user_id) -> UserSnapshot (used by the user_loader in app.py)
+#   * author(email) -> AuthorCard, or None when no account has that email
+#
+# Entries live USER_CACHE_TTL seconds. Changes made through account_settings
+# or create_user.py call invalidate(), which empties this worker's cache and
+# touches a generation file whose mtime every other worker checks on lookup.
+class UserCache:
+    def __init__(self):
+        self.ttl = 60
+        self.generation_file = None
+        self._generation = None
+        self._users = {}     # id -> (expires_at, UserSnapshot or None)
+        self._authors = {}   # email -> (expires_at, AuthorCard or None)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.generation_file = os.path.join(app.instance_path, 'user_cache.generation')
+
+    def load(self, user_id):
+        """The logged-in user for Flask-Login, or None if the account no longer exists."""
+        return self._lookup(self._users, user_id, lambda: self._query_user(user_id))
+
+    def author(self, email):
+        """The author card of the account with this email, or None."""
+        return self._lookup(self._authors, email, lambda: self._query_author(email))
+
+    def invalidate(self):
+        """Drops the cached users in every worker; call after committing a change to a user."""
+        self.clear()
+        try:
+            os.makedirs(os.path.dirname(self.generation_file), exist_ok=True)
+            # Always move forward, even if two bumps happen within the same clock tick
+            new_mtime = max(time.time_ns(), self._current_generation() + 1)
+            with open(self.generation_file, 'a'):
+                pass
+            os.utime(self.generation_file, ns=(new_mtime, new_mtime))
+        except OSError as e:
+            logger.warning("Could not bump the user cache generation: %s", e)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._authors.clear()
+
+    # --- Internals ---
+    def _lookup(self, entries, key, query):
+        if self.ttl <= 0:
+            return query()
+        now = time.monotonic()
+        generation = self._current_generation()
+        with self._lock:
+            if generation != self._generation:
+                # Another process changed a user: everything cached may be stale
+                self._users.clear()
+                self._authors.clear()
+                self._generation = generation
+            cached = entries.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        value = query()
+        with self._lock:
+            if generation == self._generation:
+                entries[key] = (now + self.ttl, value)
+        return value
+
+    def _current_generation(self):
+        try:
+            return os.stat(self.generation_file).st_mtime_ns
+        except (OSError, TypeError):
+            return 0
+
+    @staticmethod
+    def _query_user(user_id):
+        user = db.session.get(User, user_id)
+        return UserSnapshot.of(user) if user else None
+
+    @staticmethod
+    def _query_author(email):
+        row = db.session.execute(
+            db.select(User.name, User.about_me, User.profile_image_path).where(User.email == email)
+        ).first()
+        return AuthorCard(*row) if row else None